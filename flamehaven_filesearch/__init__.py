@@ -10,7 +10,8 @@ __version__ = "1.0.0"
 __author__ = "FLAMEHAVEN"
 __license__ = "MIT"
 
+from .async_core import AsyncFlamehavenFileSearch
 from .config import Config
 from .core import FlamehavenFileSearch
 
-__all__ = ["FlamehavenFileSearch", "Config"]
+__all__ = ["FlamehavenFileSearch", "AsyncFlamehavenFileSearch", "Config"]
@@ -13,13 +13,15 @@ Production-ready API with:
 - Structured JSON logging
 """
 
+import asyncio
+import json
 import logging
 import os
 import shutil
 import tempfile
 import time
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 import psutil
 from fastapi import (
@@ -36,7 +38,7 @@ from fastapi.exception_handlers import (
     request_validation_exception_handler as fastapi_validation_handler,
 )
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
@@ -54,9 +56,11 @@ from .core import FlamehavenFileSearch
 from .dashboard import router as dashboard_router
 from .exceptions import (
     FileSearchException,
+    ResourceNotFoundError,
     ServiceUnavailableError,
     exception_to_response,
 )
+from .jobs import UploadJobQueue
 from .logging_config import setup_development_logging, setup_json_logging
 from .metrics import MetricsCollector, get_metrics_content_type, get_metrics_text
 from .middlewares import (
@@ -66,7 +70,9 @@ from .middlewares import (
     SecurityHeadersMiddleware,
     get_request_id,
 )
+from .search_executor import SearchExecutor
 from .security import get_current_api_key
+from .singleflight import RedisFlightLock, SingleFlight, search_key
 from .validators import validate_search_request, validate_upload_file
 
 # Configure structured JSON logging for production
@@ -134,6 +140,9 @@ app.include_router(batch_router)
 # Global instances
 searcher: Optional[FlamehavenFileSearch] = None
 search_cache = None  # Initialized lazily
+search_executor: Optional[SearchExecutor] = None
+search_flights: Optional[SingleFlight] = None
+upload_jobs: Optional[UploadJobQueue] = None  # Initialized on startup
 startup_time = time.time()
 
 
@@ -143,6 +152,12 @@ class SearchRequest(BaseModel):
 
     query: str = Field(..., description="Search query", min_length=0)
     store_name: str = Field(default="default", description="Store name to search in")
+    store_names: Optional[List[str]] = Field(
+        None,
+        description="Search several stores in one call (overrides store_name)",
+        min_length=1,
+        max_length=20,
+    )
     model: Optional[str] = Field(None, description="Model to use for generation")
     max_tokens: Optional[int] = Field(
         None, description="Maximum output tokens", gt=0, le=8192
@@ -150,6 +165,34 @@ class SearchRequest(BaseModel):
     temperature: Optional[float] = Field(
         None, description="Model temperature", ge=0.0, le=2.0
     )
+    mode: str = Field(
+        default="generate",
+        description="generate (answer) or retrieve (ranked chunks only)",
+        pattern="^(generate|retrieve)$",
+    )
+
+    @property
+    def stores(self) -> List[str]:
+        """Stores covered by the request, deduplicated"""
+        if self.store_names:
+            return list(dict.fromkeys(self.store_names))
+        return [self.store_name]
+
+    @property
+    def store_label(self) -> str:
+        """Comma-joined store names used for cache keys and metrics"""
+        return ",".join(self.stores)
+
+    def cache_params(self) -> Dict[str, Any]:
+        """Parameters that distinguish cached results for the same query"""
+        if self.mode == "retrieve":
+            # Own namespace; generation settings do not affect retrieval
+            return {"mode": self.mode, "model": self.model}
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+        }
 
 
 class SearchResponse(BaseModel):
@@ -161,6 +204,10 @@ class SearchResponse(BaseModel):
     model: Optional[str] = None
     query: Optional[str] = None
     store: Optional[str] = None
+    mode: Optional[str] = None
+    chunks: Optional[List[dict]] = None
+    route: Optional[str] = None
+    degraded: Optional[bool] = None
     message: Optional[str] = None
     request_id: Optional[str] = None
 
@@ -174,6 +221,24 @@ class UploadResponse(BaseModel):
     filename: Optional[str] = None
     size_mb: Optional[float] = None
     message: Optional[str] = None
+    sha256: Optional[str] = None
+    duplicate_of: Optional[str] = None
+    request_id: Optional[str] = None
+
+
+class UploadJobResponse(BaseModel):
+    """Background upload job status"""
+
+    job_id: str
+    status: str
+    store: str
+    filename: str
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
     request_id: Optional[str] = None
 
 
@@ -185,6 +250,7 @@ class MultipleUploadResponse(BaseModel):
     total: int
     successful: int
     failed: int
+    elapsed_sec: Optional[float] = None
     request_id: Optional[str] = None
 
 
@@ -232,7 +298,7 @@ class ErrorResponse(BaseModel):
 
 def initialize_services(force: bool = False) -> None:
     """Initialize searcher, caches, and metrics."""
-    global searcher, search_cache, startup_time
+    global searcher, search_cache, search_executor, search_flights, startup_time
 
     if not force and searcher is not None and search_cache is not None:
         return
@@ -245,6 +311,8 @@ def initialize_services(force: bool = False) -> None:
     try:
         searcher = FlamehavenFileSearch(config=config, allow_offline=True)
         logger.info("FLAMEHAVEN FileSearch v1.1.0 initialized successfully")
+        searcher.set_quota_wait_observer(MetricsCollector.record_gemini_quota_wait)
+        searcher.set_route_observer(MetricsCollector.record_search_route)
         # Set searcher for batch routes
         batch_routes.set_searcher(searcher)
     except Exception as exc:  # pragma: no cover - defensive guard
@@ -254,6 +322,13 @@ def initialize_services(force: bool = False) -> None:
         )
         searcher = None
 
+    if search_executor is None:
+        search_executor = SearchExecutor(
+            max_concurrency=config.search_concurrency,
+            max_queue=config.search_max_queue,
+        )
+        batch_routes.set_search_executor(search_executor)
+
     try:
         search_cache = config.create_search_cache()
         logger.info(
@@ -266,6 +341,12 @@ def initialize_services(force: bool = False) -> None:
         logger.warning("Failed to initialize cache system: %s", exc)
         search_cache = None
 
+    # Coalesce identical in-flight searches; across workers when on Redis
+    redis_client = getattr(search_cache, "redis_client", None)
+    search_flights = SingleFlight(
+        RedisFlightLock(redis_client) if redis_client is not None else None
+    )
+
     try:
         MetricsCollector.update_system_metrics()
         logger.info("Prometheus metrics enabled at /prometheus")
@@ -278,6 +359,11 @@ def initialize_services(force: bool = False) -> None:
 async def startup_event():
     """Initialize the searcher and caching on startup"""
     initialize_services(force=True)
+    # Resume orphaned upload jobs now rather than on the first job request
+    try:
+        get_upload_jobs()
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logger.warning("Failed to initialize upload job queue: %s", exc)
 
 
 # Ensure services are available even when FastAPI startup events are skipped
@@ -288,7 +374,16 @@ initialize_services()
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
+    global search_executor, upload_jobs
     logger.info("Shutting down FLAMEHAVEN FileSearch API")
+    if upload_jobs is not None:
+        upload_jobs.shutdown()
+        upload_jobs = None
+    if searcher is not None:
+        searcher.close()
+    if search_executor is not None:
+        search_executor.shutdown()
+        search_executor = None
 
 
 # Helper functions
@@ -459,6 +554,119 @@ async def upload_single_file_legacy(
     return await upload_single_file(request, file, store)
 
 
+def _run_upload_job(file_path: str, store: str) -> dict:
+    """Ingest a spooled upload on an upload job worker."""
+    if not searcher:
+        raise ServiceUnavailableError("FileSearch", "Service not initialized")
+    start_time = time.time()
+    result = searcher.upload_file(file_path, store_name=store)
+    MetricsCollector.record_file_upload(
+        store=store,
+        size_bytes=os.path.getsize(file_path),
+        duration=time.time() - start_time,
+        success=result.get("status") in ("success", "duplicate"),
+    )
+    return result
+
+
+def get_upload_jobs() -> UploadJobQueue:
+    """
+    Return the upload job queue
+
+    Created on startup; created here only when startup events were skipped.
+    """
+    global upload_jobs
+    if upload_jobs is None:
+        config = Config.from_env()
+        upload_jobs = UploadJobQueue(
+            _run_upload_job,
+            db_path=config.job_db_path,
+            workers=config.upload_job_workers,
+            lease_sec=config.upload_job_lease_sec,
+        )
+    return upload_jobs
+
+
+@app.post(
+    "/api/upload/jobs",
+    response_model=UploadJobResponse,
+    status_code=202,
+    tags=["Files"],
+)
+@limiter.limit("30/minute")
+async def submit_upload_job(
+    request: Request,
+    file: UploadFile = File(..., description="File to upload"),
+    store: str = Form(default="default", description="Store name"),
+    api_key: APIKeyInfo = Depends(get_current_api_key),
+):
+    """
+    Queue a file for background upload (Rate limited: 30/min)
+
+    The file is spooled to disk and ingested by a worker; poll
+    ``GET /api/jobs/{job_id}`` for the outcome.
+
+    Args:
+        file: File to upload (max 50MB)
+        store: Store name (creates if doesn't exist)
+
+    Returns:
+        Queued job with its ID (HTTP 202)
+
+    Raises:
+        InvalidFilenameError: If filename is invalid
+        FileSizeExceededError: If file size exceeds limit
+        ServiceUnavailableError: If service not initialized
+    """
+    request_id = get_request_id(request)
+
+    if not searcher:
+        raise ServiceUnavailableError("FileSearch", "Service not initialized")
+
+    file.file.seek(0, 2)
+    file_size = file.file.tell()
+    file.file.seek(0)
+
+    config = Config.from_env()
+    validated_filename, _ = validate_upload_file(
+        file.filename,
+        file_size,
+        file.content_type or "application/octet-stream",
+        config.max_file_size_mb,
+    )
+
+    job = get_upload_jobs().submit(file.file, validated_filename, store)
+    logger.info(f"[{request_id}] Queued upload job {job['job_id']}")
+    job["request_id"] = request_id
+    return job
+
+
+@app.get("/api/jobs/{job_id}", response_model=UploadJobResponse, tags=["Files"])
+@limiter.limit("300/minute")
+async def get_upload_job(
+    request: Request,
+    job_id: str,
+    api_key: APIKeyInfo = Depends(get_current_api_key),
+):
+    """
+    Get the status of a background upload job (Rate limited: 300/min)
+
+    Args:
+        job_id: ID returned by ``POST /api/upload/jobs``
+
+    Returns:
+        Job status; ``result`` holds the upload result once finished
+
+    Raises:
+        ResourceNotFoundError: If the job does not exist
+    """
+    job = get_upload_jobs().get(job_id)
+    if job is None:
+        raise ResourceNotFoundError("Upload job", job_id)
+    job["request_id"] = get_request_id(request)
+    return job
+
+
 @app.post("/api/upload/multiple", response_model=MultipleUploadResponse, tags=["Files"])
 @limiter.limit("5/minute")
 async def upload_multiple_files(
@@ -487,9 +695,11 @@ async def upload_multiple_files(
 
     temp_dir = tempfile.mkdtemp()
     file_paths = []
+    saved_entries = []
     results = []
     successful = 0
     failed = 0
+    elapsed_sec = None
 
     try:
         config = Config.from_env()
@@ -515,13 +725,13 @@ async def upload_multiple_files(
                     shutil.copyfileobj(file.file, f)
 
                 file_paths.append(file_path)
-                results.append(
-                    {
-                        "filename": validated_filename,
-                        "status": "saved",
-                        "size_mb": round(file_size / (1024 * 1024), 2),
-                    }
-                )
+                entry = {
+                    "filename": validated_filename,
+                    "status": "saved",
+                    "size_mb": round(file_size / (1024 * 1024), 2),
+                }
+                saved_entries.append(entry)
+                results.append(entry)
 
             except FileSearchException as e:
                 failed += 1
@@ -534,10 +744,22 @@ async def upload_multiple_files(
 
         logger.info(f"[{request_id}] Saved {len(file_paths)} files to temp")
 
-        # Upload all valid files
+        # Upload all valid files concurrently, off the event loop
         if file_paths:
-            searcher.upload_files(file_paths, store_name=store)
-            successful = len(file_paths)
+            summary = await asyncio.to_thread(
+                searcher.upload_files, file_paths, store_name=store
+            )
+            elapsed_sec = summary["elapsed_sec"]
+            for entry, item in zip(saved_entries, summary["results"]):
+                outcome = item["result"]
+                entry["duration_sec"] = item["duration_sec"]
+                if outcome["status"] in ("success", "duplicate"):
+                    successful += 1
+                    entry["status"] = outcome["status"]
+                else:
+                    failed += 1
+                    entry["status"] = "failed"
+                    entry["error"] = outcome.get("message")
 
         response_payload = {
             "status": "success" if successful > 0 else "failed",
@@ -545,6 +767,7 @@ async def upload_multiple_files(
             "total": len(files),
             "successful": successful,
             "failed": failed,
+            "elapsed_sec": elapsed_sec,
             "request_id": request_id,
         }
 
@@ -611,13 +834,9 @@ async def search(
         validated_query, _ = validate_search_request(search_request.query)
 
         # Check cache first
-        cache_key_params = {
-            "model": search_request.model,
-            "max_tokens": search_request.max_tokens,
-            "temperature": search_request.temperature,
-        }
+        cache_key_params = search_request.cache_params()
         cached_result = search_cache.get(
-            validated_query, search_request.store_name, **cache_key_params
+            validated_query, search_request.store_label, **cache_key_params
         )
 
         if cached_result:
@@ -629,7 +848,7 @@ async def search(
             MetricsCollector.record_cache_hit("search")
             results_count = len(cached_result.get("sources", []))
             MetricsCollector.record_search(
-                store=search_request.store_name,
+                store=search_request.store_label,
                 duration=duration,
                 results_count=results_count,
                 success=True,
@@ -644,21 +863,46 @@ async def search(
         MetricsCollector.record_cache_miss("search")
         logger.info(f"[{request_id}] Cache MISS for query: {validated_query[:50]}...")
 
-        result = searcher.search(
-            query=validated_query,
-            store_name=search_request.store_name,
-            model=search_request.model,
-            max_tokens=search_request.max_tokens,
-            temperature=search_request.temperature,
+        async def run_search() -> dict:
+            result = await search_executor.run(
+                searcher.search,
+                query=validated_query,
+                store_name=search_request.store_name,
+                store_names=search_request.store_names,
+                model=search_request.model,
+                max_tokens=search_request.max_tokens,
+                temperature=search_request.temperature,
+                mode=search_request.mode,
+            )
+            # Publish before the flight ends so followers elsewhere find it;
+            # mirror fallbacks are not cached so recovery is picked up
+            if result["status"] != "error" and not result.get("degraded"):
+                search_cache.set(
+                    validated_query,
+                    search_request.store_label,
+                    result,
+                    **cache_key_params,
+                )
+            return result
+
+        # Identical concurrent searches share one upstream call
+        shared_result, shared = await search_flights.do(
+            search_key(validated_query, search_request.store_label, **cache_key_params),
+            run_search,
+            lookup=lambda: search_cache.get(
+                validated_query, search_request.store_label, **cache_key_params
+            ),
         )
-
+        if shared:
+            MetricsCollector.record_search_coalesced()
+        result = dict(shared_result)
         result["request_id"] = request_id
 
         if result["status"] == "error":
             # Record failed search
             duration = time.time() - start_time
             MetricsCollector.record_search(
-                store=search_request.store_name,
+                store=search_request.store_label,
                 duration=duration,
                 results_count=0,
                 success=False,
@@ -671,16 +915,11 @@ async def search(
             )
             raise HTTPException(status_code=status_code, detail=result["message"])
 
-        # Cache the successful result
-        search_cache.set(
-            validated_query, search_request.store_name, result, **cache_key_params
-        )
-
         # Record metrics
         duration = time.time() - start_time
         results_count = len(result.get("sources", []))
         MetricsCollector.record_search(
-            store=search_request.store_name,
+            store=search_request.store_label,
             duration=duration,
             results_count=results_count,
             success=True,
@@ -695,7 +934,7 @@ async def search(
     except FileSearchException as e:
         duration = time.time() - start_time
         MetricsCollector.record_search(
-            store=search_request.store_name,
+            store=search_request.store_label,
             duration=duration,
             results_count=0,
             success=False,
@@ -709,7 +948,7 @@ async def search(
     except Exception as e:
         duration = time.time() - start_time
         MetricsCollector.record_search(
-            store=search_request.store_name,
+            store=search_request.store_label,
             duration=duration,
             results_count=0,
             success=False,
@@ -721,6 +960,149 @@ async def search(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _stream_search_events(
+    search_request: SearchRequest, query: str, request_id: str
+) -> Iterator[str]:
+    """
+    Relay ``searcher.search_stream`` events as SSE messages
+
+    Runs in Starlette's threadpool. A completed stream is assembled into a
+    regular search result and stored in ``search_cache``.
+    """
+    start_time = time.time()
+    store = search_request.store_label
+    cache_key_params = search_request.cache_params()
+    parts: List[str] = []
+    sources: List[dict] = []
+    success = False
+
+    try:
+        events = searcher.search_stream(
+            query=query,
+            store_name=search_request.store_name,
+            store_names=search_request.store_names,
+            model=search_request.model,
+            max_tokens=search_request.max_tokens,
+            temperature=search_request.temperature,
+        )
+        for event in events:
+            kind = event.pop("event")
+            if kind == "token":
+                parts.append(event["text"])
+            elif kind == "sources":
+                sources = event["sources"]
+            elif kind == "done":
+                success = True
+                event["request_id"] = request_id
+                if not event.get("degraded"):
+                    search_cache.set(
+                        query,
+                        store,
+                        {
+                            "status": "success",
+                            "answer": "".join(parts),
+                            "sources": sources,
+                            **event,
+                        },
+                        **cache_key_params,
+                    )
+            elif kind == "error":
+                event["request_id"] = request_id
+                MetricsCollector.record_error(
+                    error_type="SearchError", endpoint="/api/search/stream"
+                )
+            yield format_sse(kind, event)
+    except Exception as e:
+        logger.error(f"[{request_id}] Streaming search failed: {e}")
+        MetricsCollector.record_error(
+            error_type="UnexpectedError", endpoint="/api/search/stream"
+        )
+        yield format_sse(
+            "error", {"status": "error", "message": str(e), "request_id": request_id}
+        )
+    finally:
+        MetricsCollector.record_search(
+            store=store,
+            duration=time.time() - start_time,
+            results_count=len(sources),
+            success=success,
+        )
+
+
+@app.post("/api/search/stream", tags=["Search"])
+@limiter.limit("100/minute")
+async def search_stream(
+    request: Request,
+    search_request: SearchRequest,
+    api_key: APIKeyInfo = Depends(get_current_api_key),
+):
+    """
+    Stream an AI-generated answer as Server-Sent Events (Rate limited: 100/min)
+
+    Emits ``token`` events with answer text as it is generated, one
+    ``sources`` event once grounding metadata arrives, then ``done``. A
+    failure mid-stream is reported as an ``error`` event. Cached answers
+    are replayed as a single token.
+
+    Args:
+        search_request: Search request with query and parameters
+
+    Returns:
+        ``text/event-stream`` response
+
+    Raises:
+        EmptySearchQueryError: If query is empty
+        InvalidSearchQueryError: If query is invalid
+        ServiceUnavailableError: If service not initialized
+    """
+    request_id = get_request_id(request)
+
+    if not searcher:
+        raise ServiceUnavailableError("FileSearch", "Service not initialized")
+
+    validated_query, _ = validate_search_request(search_request.query)
+    if search_request.mode != "generate":
+        raise HTTPException(
+            status_code=400, detail="Streaming is only available for mode=generate"
+        )
+    missing = [name for name in search_request.stores if name not in searcher.stores]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Store '{missing[0]}' not found")
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    cached_result = search_cache.get(
+        validated_query, search_request.store_label, **search_request.cache_params()
+    )
+    if cached_result:
+        MetricsCollector.record_cache_hit("search")
+        done = {
+            "model": cached_result.get("model"),
+            "query": validated_query,
+            "store": search_request.store_label,
+            "request_id": request_id,
+        }
+        replay = [
+            format_sse("token", {"text": cached_result.get("answer", "")}),
+            format_sse("sources", {"sources": cached_result.get("sources", [])}),
+            format_sse("done", done),
+        ]
+        return StreamingResponse(
+            iter(replay), media_type="text/event-stream", headers=headers
+        )
+
+    MetricsCollector.record_cache_miss("search")
+    return StreamingResponse(
+        _stream_search_events(search_request, validated_query, request_id),
+        media_type="text/event-stream",
+        headers=headers,
+    )
+
+
 @app.get("/api/search", response_model=SearchResponse, tags=["Search"])
 @limiter.limit("100/minute")
 async def search_get(
@@ -891,6 +1273,8 @@ async def prometheus_metrics(request: Request):
     if searcher:
         stores = searcher.list_stores()
         MetricsCollector.update_stores_count(len(stores))
+        MetricsCollector.update_gemini_resilience(searcher.get_resilience_stats())
+        MetricsCollector.update_gemini_quota_queue(searcher.get_quota_stats()["queued"])
 
     # Get metrics in Prometheus format
     metrics_text = get_metrics_text()
@@ -917,6 +1301,12 @@ async def get_metrics(request: Request):
     cache_stats = get_all_cache_stats()
     if cache_stats:
         metrics["cache"] = cache_stats
+    if search_executor is not None:
+        metrics["search_executor"] = search_executor.get_stats()
+    if upload_jobs is not None:
+        metrics["upload_jobs"] = upload_jobs.get_stats()
+    if search_flights is not None:
+        metrics["search_coalescing"] = search_flights.get_stats()
 
     return metrics
 
@@ -1059,6 +1449,7 @@ def main():
         print("  HOST=0.0.0.0        - Server host")
         print("  PORT=8000           - Server port")
         print("  WORKERS=4           - Number of workers (production)")
+        print("                        (must be 1 when LOCAL_STORE_DIR is set)")
         print("  RELOAD=true         - Enable auto-reload (development)")
         print("  GEMINI_API_KEY=...  - Google Gemini API key (required)")
         print("\nExample:")
@@ -1091,6 +1482,12 @@ def main():
         print("Example: export GEMINI_API_KEY='your-api-key'")
         sys.exit(1)
 
+    # Each worker would open the same store directories; they allow one writer
+    if workers > 1 and not reload and os.getenv("LOCAL_STORE_DIR"):
+        print("Error: LOCAL_STORE_DIR requires WORKERS=1")
+        print("Local stores are locked to a single process; unset one of them")
+        sys.exit(1)
+
     print(f"Starting FLAMEHAVEN FileSearch API v1.1.0 on {host}:{port}")
     print(f"Workers: {workers}, Reload: {reload}")
     print("\nEndpoints:")
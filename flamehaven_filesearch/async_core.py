@@ -0,0 +1,449 @@
+"""
+FLAMEHAVEN FileSearch - asyncio SDK
+
+``AsyncFlamehavenFileSearch`` mirrors the ``FlamehavenFileSearch`` surface
+with coroutines. Remote calls go through the google-genai async client
+(``client.aio``) and upload operations are polled with ``asyncio.sleep``,
+so a single event loop can keep many requests in flight. Local fallback
+work (extraction, indexing, disk I/O, mirror upkeep) runs in worker threads.
+
+Searches share the sync SDK's policies: per-key quota, local-first
+routing, the circuit breaker with its mirror fallback and the per-call
+deadline. Hedged duplicate requests are not sent from the async client.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import Config
+from .core import (
+    RETRIEVE_INSTRUCTION,
+    RETRIEVE_MAX_TOKENS,
+    SEARCH_MODES,
+    FlamehavenFileSearch,
+)
+from .resilience import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncFlamehavenFileSearch:
+    """
+    Async counterpart of FlamehavenFileSearch
+
+    Examples:
+        >>> searcher = AsyncFlamehavenFileSearch()
+        >>> await searcher.upload_file("document.pdf")
+        >>> answer = await searcher.search("What are the key findings?")
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        config: Optional[Config] = None,
+        allow_offline: bool = False,
+        max_concurrent_uploads: int = 8,
+    ):
+        """
+        Initialize async FLAMEHAVEN FileSearch
+
+        Args:
+            api_key: Google GenAI API key (optional if set in environment)
+            config: Configuration object (optional)
+            allow_offline: Allow local fallback mode without an API key
+            max_concurrent_uploads: Uploads in flight per ``upload_files`` call
+        """
+        if max_concurrent_uploads <= 0:
+            raise ValueError("max_concurrent_uploads must be positive")
+        # Shares validation, dedup registry, local stores and result shaping
+        self._sync = FlamehavenFileSearch(
+            api_key=api_key, config=config, allow_offline=allow_offline
+        )
+        self.max_concurrent_uploads = max_concurrent_uploads
+
+    @property
+    def config(self) -> Config:
+        """Active configuration"""
+        return self._sync.config
+
+    @property
+    def stores(self) -> Dict[str, str]:
+        """Store names mapped to remote IDs or local handles"""
+        return self._sync.stores
+
+    @property
+    def _aio(self):
+        return self._sync.client.aio
+
+    def _store_aio(self, store_name: str) -> Tuple[int, Any]:
+        """Key-pool slot and async client that own ``store_name``"""
+        slot, client = self._sync._store_client(store_name)
+        return slot, client.aio
+
+    async def create_store(self, name: str = "default") -> str:
+        """
+        Create file search store
+
+        Args:
+            name: Store name
+
+        Returns:
+            Store resource name
+        """
+        if name in self.stores:
+            logger.info("Store '%s' already exists", name)
+            return self.stores[name]
+
+        if not self._sync._use_native_client:
+            return await asyncio.to_thread(self._sync.create_store, name)
+
+        registered = self._sync._registered_store(name)
+        if registered is not None:
+            return registered
+        pool = self._sync._key_pool
+        slot = pool.assign()
+        aio = self._sync._clients[slot].aio
+        try:
+            with pool.lease(slot):
+                store = await aio.file_search_stores.create()
+        except Exception as e:
+            pool.unassign(slot)
+            logger.error("Failed to create store '%s': %s", name, e)
+            raise
+        if not self._sync._remember_store(name, store.name, slot):
+            # Another worker registered the name first; drop our duplicate
+            pool.unassign(slot)
+            try:
+                with pool.lease(slot):
+                    await aio.file_search_stores.delete(name=store.name)
+            except Exception as e:
+                logger.error("Failed to delete duplicate store %s: %s", store.name, e)
+            return self.stores[name]
+        logger.info("Created store '%s': %s", name, store.name)
+        return store.name
+
+    def list_stores(self) -> Dict[str, str]:
+        """
+        List all created stores
+
+        Returns:
+            Dictionary of store names to resource names
+        """
+        return self._sync.list_stores()
+
+    async def upload_file(
+        self,
+        file_path: str,
+        store_name: str = "default",
+        max_size_mb: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Upload file with basic validation
+
+        Args:
+            file_path: Path to file to upload
+            store_name: Store name to upload to
+            max_size_mb: Maximum file size (defaults to config)
+
+        Returns:
+            Upload result dict with status, store, and file info
+        """
+        if not self._sync._use_native_client:
+            return await asyncio.to_thread(
+                self._sync.upload_file, file_path, store_name, max_size_mb
+            )
+
+        # Create the store on the loop so _prepare_upload never blocks on it
+        if store_name not in self.stores:
+            logger.info("Creating new store: %s", store_name)
+            await self.create_store(store_name)
+
+        # Size checks and hashing touch the disk; keep them off the loop
+        early_result, size_mb, digest = await asyncio.to_thread(
+            self._sync._prepare_upload, file_path, store_name, max_size_mb
+        )
+        if early_result is not None:
+            return early_result
+
+        try:
+            logger.info("Uploading file: %s (%.2f MB)", file_path, size_mb)
+            slot, aio = self._store_aio(store_name)
+            with self._sync._key_pool.lease(slot):
+                upload_op = await aio.file_search_stores.upload_to_file_search_store(
+                    file_search_store_name=self.stores[store_name], file=file_path
+                )
+
+            # Same adaptive schedule as the sync SDK's shared poller
+            delays = self._sync._upload_poller.delays()
+            deadline = time.monotonic() + self.config.upload_timeout_sec
+            while not upload_op.done:
+                delay = next(delays)
+                if time.monotonic() + delay > deadline:
+                    return {"status": "error", "message": "Upload timeout"}
+                await asyncio.sleep(delay)
+                upload_op = await aio.operations.get(upload_op)
+
+            # Mirror extraction and segment writes block; run them off the loop
+            return await asyncio.to_thread(
+                self._sync._remote_upload_done, file_path, store_name, size_mb, digest
+            )
+
+        except Exception as e:
+            logger.error("Upload failed: %s", e)
+            return {"status": "error", "message": str(e)}
+
+    async def upload_files(
+        self, file_paths: List[str], store_name: str = "default"
+    ) -> Dict[str, Any]:
+        """
+        Upload multiple files concurrently
+
+        Args:
+            file_paths: List of file paths
+            store_name: Store name to upload to
+
+        Returns:
+            Dict with upload results and timings for each file
+        """
+        if not self._sync._use_native_client:
+            return await asyncio.to_thread(
+                self._sync.upload_files, file_paths, store_name
+            )
+
+        start = time.perf_counter()
+        if file_paths and store_name not in self.stores:
+            await self.create_store(store_name)
+
+        semaphore = asyncio.Semaphore(self.max_concurrent_uploads)
+
+        async def bounded_upload(file_path: str) -> Tuple[Dict[str, Any], float]:
+            async with semaphore:
+                began = time.perf_counter()
+                result = await self.upload_file(file_path, store_name)
+                return result, time.perf_counter() - began
+
+        outcomes: List[Optional[Dict[str, Any]]] = [None] * len(file_paths)
+        durations = [0.0] * len(file_paths)
+        groups = await asyncio.to_thread(self._sync._digest_groups, file_paths)
+        for batch in self._sync._upload_rounds(groups, outcomes):
+            timed = await asyncio.gather(
+                *(bounded_upload(file_paths[index]) for index in batch)
+            )
+            for index, (result, duration) in zip(batch, timed):
+                outcomes[index], durations[index] = result, duration
+        return self._sync._summarize_uploads(
+            file_paths, outcomes, durations, time.perf_counter() - start
+        )
+
+    async def search(
+        self,
+        query: str,
+        store_name: str = "default",
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        priority: int = 0,
+        store_names: Optional[List[str]] = None,
+        mode: str = "generate",
+    ) -> Dict[str, Any]:
+        """
+        Search and generate answer
+
+        Args:
+            query: Search query
+            store_name: Store name to search in
+            model: Model to use (defaults to config)
+            max_tokens: Max output tokens (defaults to config)
+            temperature: Model temperature (defaults to config)
+            priority: Quota queue priority; higher is served first
+            store_names: Search several stores at once (overrides
+                ``store_name``); remote stores are queried in one call
+            mode: ``"generate"`` (default) or ``"retrieve"`` for ranked
+                chunks without a generated answer
+
+        Returns:
+            Dict with answer, sources, and metadata
+        """
+        if not self._sync._use_native_client:
+            return await asyncio.to_thread(
+                self._sync.search,
+                query,
+                store_name,
+                model,
+                max_tokens,
+                temperature,
+                priority=priority,
+                store_names=store_names,
+                mode=mode,
+            )
+
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+        retrieve = mode == "retrieve"
+        if retrieve:
+            max_tokens, temperature = RETRIEVE_MAX_TOKENS, 0.0
+        model, max_tokens, temperature = self._sync._generation_params(
+            model, max_tokens, temperature
+        )
+        names = self._sync._target_stores(store_name, store_names)
+        missing = self._sync._missing_store(names)
+        if missing is not None:
+            return self._sync._store_not_found(missing)
+
+        # Local-first routing: clear-cut lookups never reach Gemini
+        routed = self.config.local_first and not retrieve
+        started = time.perf_counter()
+        if routed:
+            result = await asyncio.to_thread(
+                self._sync._local_first, names, query, max_tokens, temperature, model
+            )
+            if result is not None:
+                self._sync._router.record("local", time.perf_counter() - started)
+                return result
+
+        result = await self._remote_search(
+            names, query, model, max_tokens, temperature, priority, mode
+        )
+        if routed:
+            self._sync._router.record("gemini", time.perf_counter() - started)
+        return result
+
+    async def _remote_search(
+        self,
+        store_names: List[str],
+        query: str,
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        priority: int,
+        mode: str,
+    ) -> Dict[str, Any]:
+        """Run a search through Gemini File Search on the async client."""
+        sync = self._sync
+        label = ",".join(store_names)
+        retrieve = mode == "retrieve"
+        try:
+            slot, client = sync._stores_client(store_names)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+
+        try:
+            logger.info("Searching in store '%s' with query: %s", label, query)
+            estimate = sync._estimate_tokens(query, max_tokens)
+            sync._key_pool.check(slot)
+            await self._acquire_quota(slot, estimate, priority)
+            response = await self._guarded_call(
+                slot,
+                client.aio.models.generate_content,
+                model=model,
+                contents=query,
+                config=sync._file_search_config(
+                    store_names,
+                    max_tokens,
+                    temperature,
+                    timeout_sec=self.config.gemini_deadline_sec,
+                    system_instruction=RETRIEVE_INSTRUCTION if retrieve else None,
+                ),
+            )
+            sync._quotas[slot].reconcile(estimate, sync._used_tokens(response))
+            if retrieve:
+                grounding = response.candidates[0].grounding_metadata
+                return sync._retrieval_result(
+                    sync._grounding_chunks(grounding), query, model, label
+                )
+            return sync._search_result(response, query, model, label)
+
+        except Exception as e:
+            logger.error("Search failed: %s", e)
+            # Mirror fallback searches local segments; keep it off the loop
+            return await asyncio.to_thread(
+                sync._fallback_search,
+                e,
+                store_names,
+                query,
+                max_tokens,
+                temperature,
+                model,
+                mode=mode,
+            )
+
+    async def _acquire_quota(self, slot: int, tokens: int, priority: int) -> float:
+        """Queue for a key's Gemini quota on the loop, not in a worker thread."""
+        waited = await self._sync._quotas[slot].acquire_async(
+            tokens, priority=priority, timeout=self.config.gemini_queue_timeout_sec
+        )
+        if waited > 0.001:
+            logger.info("Waited %.3fs for Gemini quota", waited)
+        return waited
+
+    async def _guarded_call(self, slot: int, func: Any, **kwargs) -> Any:
+        """Await a Gemini call under the shared breaker and call deadline."""
+        breaker = self._sync._resilience.breaker
+        if not breaker.allow():
+            raise CircuitOpenError("Gemini circuit is open")
+        deadline = self.config.gemini_deadline_sec
+        try:
+            with self._sync._key_pool.lease(slot):
+                response = await asyncio.wait_for(func(**kwargs), timeout=deadline)
+        except asyncio.TimeoutError:
+            breaker.record_failure()
+            raise TimeoutError(f"Gemini call exceeded {deadline:g}s deadline")
+        except asyncio.CancelledError:
+            breaker.record_ignored()
+            raise
+        except Exception as e:
+            breaker.record_outcome(e)
+            raise
+        breaker.record_success()
+        return response
+
+    async def delete_store(self, store_name: str) -> Dict[str, Any]:
+        """
+        Delete a store
+
+        Args:
+            store_name: Store name to delete
+
+        Returns:
+            Deletion result
+        """
+        if not self._sync._use_native_client:
+            return await asyncio.to_thread(self._sync.delete_store, store_name)
+
+        if store_name not in self.stores:
+            return {"status": "error", "message": f"Store '{store_name}' not found"}
+
+        slot, aio = self._store_aio(store_name)
+        try:
+            with self._sync._key_pool.lease(slot):
+                await aio.file_search_stores.delete(name=self.stores[store_name])
+        except Exception as e:
+            logger.error("Failed to delete store '%s': %s", store_name, e)
+            return {"status": "error", "message": str(e)}
+
+        self._sync._forget_store(store_name, slot)
+        self._sync._content_hashes.drop_store(store_name)
+        await asyncio.to_thread(self._sync._drop_local_store, store_name)
+        logger.info("Deleted store: %s", store_name)
+        return {"status": "success", "store": store_name}
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get current metrics
+
+        Returns:
+            Dict with metrics
+        """
+        return self._sync.get_metrics()
+
+    async def close(self) -> None:
+        """Flush local stores and stop background workers"""
+        await asyncio.to_thread(self._sync.close)
+
+    async def __aenter__(self) -> "AsyncFlamehavenFileSearch":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
@@ -18,6 +18,7 @@ from .core import FlamehavenFileSearch
 from .exceptions import FileSearchException
 from .metrics import MetricsCollector
 from .middlewares import get_request_id
+from .search_executor import SearchExecutor
 from .security import get_current_api_key
 from .validators import validate_search_request
 
@@ -27,6 +28,7 @@ router = APIRouter(prefix="/api", tags=["Batch"])
 
 # Global searcher reference (from api.py)
 searcher: Optional[FlamehavenFileSearch] = None
+search_executor: Optional[SearchExecutor] = None
 
 
 def set_searcher(s: FlamehavenFileSearch):
@@ -35,6 +37,12 @@ def set_searcher(s: FlamehavenFileSearch):
     searcher = s
 
 
+def set_search_executor(executor: SearchExecutor):
+    """Set the bounded executor shared with the single-search endpoint"""
+    global search_executor
+    search_executor = executor
+
+
 class BatchSearchQuery(BaseModel):
     """Single query in batch"""
 
@@ -51,6 +59,11 @@ class BatchSearchRequest(BaseModel):
     max_results: int = Field(
         default=5, ge=1, le=10, description="Max results per query"
     )
+    search_mode: str = Field(
+        default="generate",
+        description="generate (answers) or retrieve (ranked chunks only)",
+        pattern="^(generate|retrieve)$",
+    )
 
 
 class BatchSearchResult(BaseModel):
@@ -61,6 +74,7 @@ class BatchSearchResult(BaseModel):
     status: str
     answer: Optional[str] = None
     sources: Optional[List[dict]] = None
+    chunks: Optional[List[dict]] = None
     duration_ms: float
     error: Optional[str] = None
 
@@ -130,12 +144,18 @@ async def batch_search(
         if batch_request.mode == "parallel":
             # Parallel execution
             results = await _execute_batch_parallel(
-                queries, batch_request.max_results, request_id
+                queries,
+                batch_request.max_results,
+                request_id,
+                batch_request.search_mode,
             )
         else:
             # Sequential execution (default)
             results = await _execute_batch_sequential(
-                queries, batch_request.max_results, request_id
+                queries,
+                batch_request.max_results,
+                request_id,
+                batch_request.search_mode,
             )
 
         successful = sum(1 for r in results if r.status == "success")
@@ -179,29 +199,40 @@ async def batch_search(
 
 
 async def _execute_batch_sequential(
-    queries: List[BatchSearchQuery], max_results: int, request_id: str
+    queries: List[BatchSearchQuery],
+    max_results: int,
+    request_id: str,
+    search_mode: str = "generate",
 ) -> List[BatchSearchResult]:
     """Execute queries sequentially"""
     results = []
 
     for q in queries:
-        result = await _execute_single_search(q, max_results, request_id)
+        result = await _execute_single_search(q, max_results, request_id, search_mode)
         results.append(result)
 
     return results
 
 
 async def _execute_batch_parallel(
-    queries: List[BatchSearchQuery], max_results: int, request_id: str
+    queries: List[BatchSearchQuery],
+    max_results: int,
+    request_id: str,
+    search_mode: str = "generate",
 ) -> List[BatchSearchResult]:
     """Execute queries in parallel"""
-    tasks = [_execute_single_search(q, max_results, request_id) for q in queries]
+    tasks = [
+        _execute_single_search(q, max_results, request_id, search_mode) for q in queries
+    ]
     results = await asyncio.gather(*tasks, return_exceptions=False)
     return results
 
 
 async def _execute_single_search(
-    query_obj: BatchSearchQuery, max_results: int, request_id: str
+    query_obj: BatchSearchQuery,
+    max_results: int,
+    request_id: str,
+    search_mode: str = "generate",
 ) -> BatchSearchResult:
     """Execute single search query"""
     query_start = time.time()
@@ -210,22 +241,35 @@ async def _execute_single_search(
         # Validate search request
         validate_search_request(query_obj.query)
 
-        # Perform search
-        result = await asyncio.to_thread(
+        # Perform search off the event loop, bounded by the shared executor
+        run = search_executor.run if search_executor else asyncio.to_thread
+        result = await run(
             searcher.search,
             query_obj.query,
             store_name=query_obj.store,
-            max_sources=max_results,
+            priority=query_obj.priority,
+            mode=search_mode,
         )
 
         duration = time.time() - query_start
 
+        if result["status"] == "error":
+            return BatchSearchResult(
+                query=query_obj.query,
+                store=query_obj.store,
+                status="error",
+                duration_ms=round(duration * 1000, 2),
+                error=result.get("message"),
+            )
+
+        chunks = result.get("chunks")
         return BatchSearchResult(
             query=query_obj.query,
             store=query_obj.store,
             status="success",
             answer=result.get("answer"),
-            sources=result.get("sources"),
+            sources=(result.get("sources") or [])[:max_results],
+            chunks=chunks[:max_results] if chunks is not None else None,
             duration_ms=round(duration * 1000, 2),
             error=None,
         )
@@ -264,6 +308,7 @@ async def batch_search_status(request: Request):
         "status": "available",
         "max_queries_per_batch": 100,
         "modes": ["sequential", "parallel"],
+        "search_modes": ["generate", "retrieve"],
         "min_queries": 1,
         "supported_since": "v1.2.0",
     }
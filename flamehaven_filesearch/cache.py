@@ -5,13 +5,14 @@ LRU caching for search results and file metadata with TTL support.
 Includes abstract base class for cache backends with Dependency Inversion.
 """
 
-import hashlib
 import logging
 from abc import ABC, abstractmethod
 from typing import Any, Dict, Optional
 
 from cachetools import LRUCache, TTLCache
 
+from .singleflight import search_key
+
 logger = logging.getLogger(__name__)
 
 
@@ -88,18 +89,8 @@ class SearchResultCache(AbstractSearchCache):
         Returns:
             Cache key (SHA256 hash)
         """
-        # Create deterministic key from all parameters
-        key_parts = [query, store_name]
-
-        # Add optional parameters in sorted order for consistency
-        for k in sorted(kwargs.keys()):
-            if kwargs[k] is not None:
-                key_parts.append(f"{k}={kwargs[k]}")
-
-        key_string = "|".join(str(p) for p in key_parts)
-
-        # Hash to fixed-length key
-        return hashlib.sha256(key_string.encode()).hexdigest()
+        # Same key single-flight coalescing uses for in-flight searches
+        return search_key(query, store_name, **kwargs)
 
     def get(self, query: str, store_name: str, **kwargs) -> Optional[Dict[str, Any]]:
         """
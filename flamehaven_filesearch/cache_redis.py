@@ -6,13 +6,13 @@ Replaces LRU cache when Redis is available.
 Implements AbstractSearchCache for Dependency Inversion Principle.
 """
 
-import hashlib
 import json
 import logging
 import os
 from typing import Any, Dict, Optional
 
 from .cache import AbstractSearchCache
+from .singleflight import search_key
 
 logger = logging.getLogger(__name__)
 
@@ -208,14 +208,19 @@ class SearchResultCacheRedis(AbstractSearchCache):
         )
         self.ttl_seconds = ttl_seconds
 
+    @property
+    def redis_client(self):
+        """Underlying Redis client (shared with single-flight locking)"""
+        return self.cache.client
+
     def get(self, query: str, store_name: str, **kwargs) -> Optional[Dict[str, Any]]:
         """Get cached search result (AbstractSearchCache interface)"""
-        key = self._make_cache_key(query, store_name)
+        key = self._make_cache_key(query, store_name, **kwargs)
         return self.cache.get(key)
 
     def set(self, query: str, store_name: str, result: Dict[str, Any], **kwargs):
         """Cache search result (AbstractSearchCache interface)"""
-        key = self._make_cache_key(query, store_name)
+        key = self._make_cache_key(query, store_name, **kwargs)
         self.cache.set(key, result, self.cache.ttl_seconds)
 
     def invalidate(self, query: str = None, store_name: str = None):
@@ -234,9 +239,9 @@ class SearchResultCacheRedis(AbstractSearchCache):
         """Reset cache statistics (AbstractSearchCache interface)"""
         logger.info("Redis cache stats reset (no-op)")
 
-    def delete(self, query: str, store: str) -> bool:
+    def delete(self, query: str, store: str, **kwargs) -> bool:
         """Delete cached search result"""
-        key = self._make_cache_key(query, store)
+        key = self._make_cache_key(query, store, **kwargs)
         return self.cache.delete(key)
 
     def clear(self) -> bool:
@@ -248,10 +253,11 @@ class SearchResultCacheRedis(AbstractSearchCache):
         return self.cache.stats()
 
     @staticmethod
-    def _make_cache_key(query: str, store: str) -> str:
-        """Create cache key from query and store"""
-        key_data = f"{query}:{store}".encode()
-        return f"search:{hashlib.sha256(key_data).hexdigest()[:16]}"
+    def _make_cache_key(query: str, store: str, **kwargs) -> str:
+        """Create cache key from query, store and search parameters"""
+        # Same key the in-memory cache and single-flight coalescing use, so
+        # e.g. retrieve and generate results for one query stay apart
+        return f"search:{search_key(query, store, **kwargs)}"
 
     def close(self):
         """Close cache connection"""
@@ -6,6 +6,8 @@ import os
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Any, Dict, Optional
 
+from .key_pool import parse_key_entry
+
 if TYPE_CHECKING:
     from .cache import AbstractSearchCache
 
@@ -17,8 +19,13 @@ class Config:
 
     Attributes:
         api_key: Google GenAI API key
+        api_keys: Pool of API keys (``key`` or ``key:weight``); new stores are
+            spread across them. Defaults to ``[api_key]``
+        api_key_cooldown_sec: Seconds a rate-limited pool key is left out
         max_file_size_mb: Maximum file size in MB (Lite tier: 50MB)
         upload_timeout_sec: Upload operation timeout
+        upload_poll_initial_sec: First delay when polling an upload operation
+        upload_poll_max_sec: Upper bound of the adaptive upload polling delay
         default_model: Default Gemini model to use
         max_output_tokens: Maximum tokens for response
         temperature: Model temperature (0.0-1.0)
@@ -30,11 +37,56 @@ class Config:
         redis_port: Redis port
         redis_password: Redis password (optional)
         redis_db: Redis database number
+        local_passage_size: Passage length (chars) for the local fallback index
+        local_passage_overlap: Characters shared between consecutive passages
+        local_retrieval: Local ranking backend ('bm25' or 'dense', needs NumPy)
+        local_vector_dim: Embedding dimensionality for dense local retrieval
+        local_ann_nprobe: IVF lists probed per dense query (0 = exact scan)
+        local_ann_train_size: Passages per store before the IVF index is built
+        local_store_dir: Directory for durable local store segments (optional)
+        local_flush_passages: Memtable passages per local segment flush
+            (0 = flush after every upload)
+        local_merge_factor: Local segments per tier before a background merge
+        dedup_uploads: Skip uploads whose SHA-256 is already in the store
+        upload_concurrency: Remote uploads run in parallel by ``upload_files``
+        extract_workers: Processes parsing PDF/DOCX uploads (0 = CPU count)
+        extract_timeout_sec: Per-file text extraction timeout
+        search_concurrency: API searches executed concurrently
+        search_max_queue: API searches allowed to wait (0 = unbounded)
+        job_db_path: SQLite database for background upload jobs
+        store_registry_path: SQLite registry of remote stores, rehydrated on
+            startup (None = stores are forgotten on restart)
+        upload_job_workers: Worker threads ingesting background upload jobs
+        upload_job_lease_sec: Seconds without a heartbeat after which another
+            API worker takes over a worker's upload jobs
+        gemini_deadline_sec: Deadline for one Gemini search call
+        gemini_hedge_percentile: Latency percentile after which a duplicate
+            Gemini request is sent (0 = no hedging)
+        gemini_breaker_threshold: Consecutive Gemini failures that open the
+            circuit breaker
+        gemini_breaker_reset_sec: Seconds the breaker stays open before a probe
+        local_mirror: Also index remote uploads locally so searches can fall
+            back to local retrieval while Gemini is unavailable
+        local_first: Answer confident lookups from the local mirror and only
+            call Gemini for the rest (requires local_mirror)
+        local_first_min_score: Top local score needed to answer locally
+            (None = the retrieval backend's default: 5.0 for BM25, 0.3 for
+            dense cosine scores, which never exceed 1)
+        local_first_min_margin: Relative lead of the top local hit over the
+            runner-up needed to answer locally, in [0, 1)
+        gemini_rpm: Client-side Gemini requests-per-minute budget per key (0 = off)
+        gemini_tpm: Client-side Gemini tokens-per-minute budget per key (0 = off)
+        gemini_quota_burst_sec: Seconds of quota budget usable in one burst
+        gemini_queue_timeout_sec: Longest a call waits in the quota queue
     """
 
     api_key: Optional[str] = None
+    api_keys: list = field(default_factory=list)
+    api_key_cooldown_sec: float = 60.0
     max_file_size_mb: int = 50
     upload_timeout_sec: int = 60
+    upload_poll_initial_sec: float = 0.5
+    upload_poll_max_sec: float = 10.0
     default_model: str = "gemini-2.5-flash"
     max_output_tokens: int = 1024
     temperature: float = 0.5
@@ -46,6 +98,37 @@ class Config:
     redis_port: int = 6379
     redis_password: Optional[str] = None
     redis_db: int = 1
+    local_passage_size: int = 1000
+    local_passage_overlap: int = 200
+    local_retrieval: str = "bm25"  # 'bm25' or 'dense'
+    local_vector_dim: int = 256
+    local_ann_nprobe: int = 0
+    local_ann_train_size: int = 50000
+    local_store_dir: Optional[str] = None
+    local_flush_passages: int = 0
+    local_merge_factor: int = 8
+    dedup_uploads: bool = True
+    upload_concurrency: int = 4
+    extract_workers: int = 0
+    extract_timeout_sec: int = 120
+    search_concurrency: int = 8
+    search_max_queue: int = 100
+    job_db_path: str = "./data/jobs.db"
+    store_registry_path: Optional[str] = None
+    upload_job_workers: int = 2
+    upload_job_lease_sec: float = 60.0
+    gemini_deadline_sec: float = 30.0
+    gemini_hedge_percentile: float = 95.0
+    gemini_breaker_threshold: int = 5
+    gemini_breaker_reset_sec: float = 30.0
+    local_mirror: bool = False
+    local_first: bool = False
+    local_first_min_score: Optional[float] = None
+    local_first_min_margin: float = 0.3
+    gemini_rpm: int = 0
+    gemini_tpm: int = 0
+    gemini_quota_burst_sec: float = 10.0
+    gemini_queue_timeout_sec: float = 30.0
 
     # Driftlock configuration
     min_answer_length: int = 10
@@ -53,13 +136,18 @@ class Config:
     banned_terms: list = field(default_factory=lambda: ["PII-leak"])
 
     def __post_init__(self):
-        """Load API key from environment if not provided"""
+        """Load API key(s) from environment if not provided"""
+        if self.api_key is None and not self.api_keys:
+            pooled = os.getenv("GEMINI_API_KEYS", "")
+            self.api_keys = [k.strip() for k in pooled.split(",") if k.strip()]
         if self.api_key is None:
             self.api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
         if self.api_key is not None:
             self.api_key = self.api_key.strip()
             if not self.api_key:
                 self.api_key = None
+        if self.api_key is None and self.api_keys:
+            self.api_key = parse_key_entry(self.api_keys[0])[0]
 
     def validate(self, require_api_key: bool = True) -> bool:
         """
@@ -72,12 +160,80 @@ class Config:
         if require_api_key and not self.api_key:
             raise ValueError("API key required (API key not provided)")
 
+        for entry in self.api_keys:
+            parse_key_entry(entry)
+        if self.api_key_cooldown_sec <= 0:
+            raise ValueError("api_key_cooldown_sec must be positive")
+
         if self.max_file_size_mb <= 0:
             raise ValueError("max_file_size_mb must be positive")
 
         if not 0.0 <= self.temperature <= 1.0:
             raise ValueError("temperature must be between 0.0 and 1.0")
 
+        if self.upload_poll_initial_sec <= 0:
+            raise ValueError("upload_poll_initial_sec must be positive")
+        if self.upload_poll_max_sec < self.upload_poll_initial_sec:
+            raise ValueError(
+                "upload_poll_max_sec must be at least upload_poll_initial_sec"
+            )
+
+        if self.local_passage_size <= 0:
+            raise ValueError("local_passage_size must be positive")
+
+        if self.local_retrieval not in ("bm25", "dense"):
+            raise ValueError("local_retrieval must be 'bm25' or 'dense'")
+
+        if self.local_vector_dim <= 0:
+            raise ValueError("local_vector_dim must be positive")
+
+        if self.local_ann_nprobe < 0:
+            raise ValueError("local_ann_nprobe must be zero or positive")
+        if self.local_flush_passages < 0:
+            raise ValueError("local_flush_passages must be zero or positive")
+        if self.upload_concurrency <= 0:
+            raise ValueError("upload_concurrency must be positive")
+        if self.extract_workers < 0:
+            raise ValueError("extract_workers must be zero or positive")
+        if self.extract_timeout_sec <= 0:
+            raise ValueError("extract_timeout_sec must be positive")
+        if self.search_concurrency <= 0:
+            raise ValueError("search_concurrency must be positive")
+        if self.search_max_queue < 0:
+            raise ValueError("search_max_queue must be zero or positive")
+        if self.upload_job_workers <= 0:
+            raise ValueError("upload_job_workers must be positive")
+        if self.upload_job_lease_sec <= 0:
+            raise ValueError("upload_job_lease_sec must be positive")
+        if self.gemini_deadline_sec <= 0:
+            raise ValueError("gemini_deadline_sec must be positive")
+        if not 0 <= self.gemini_hedge_percentile < 100:
+            raise ValueError("gemini_hedge_percentile must be in [0, 100)")
+        if self.gemini_breaker_threshold <= 0:
+            raise ValueError("gemini_breaker_threshold must be positive")
+        if self.gemini_breaker_reset_sec <= 0:
+            raise ValueError("gemini_breaker_reset_sec must be positive")
+        if self.local_first and not self.local_mirror:
+            raise ValueError("local_first requires local_mirror")
+        if self.local_first_min_score is not None:
+            if self.local_first_min_score < 0:
+                raise ValueError("local_first_min_score must be zero or positive")
+            if self.local_retrieval == "dense" and self.local_first_min_score > 1:
+                raise ValueError(
+                    "local_first_min_score must be at most 1 with dense "
+                    "retrieval (cosine scores)"
+                )
+        if not 0 <= self.local_first_min_margin < 1:
+            raise ValueError("local_first_min_margin must be in [0, 1)")
+        if self.gemini_rpm < 0:
+            raise ValueError("gemini_rpm must be zero or positive")
+        if self.gemini_tpm < 0:
+            raise ValueError("gemini_tpm must be zero or positive")
+        if self.gemini_quota_burst_sec <= 0:
+            raise ValueError("gemini_quota_burst_sec must be positive")
+        if self.gemini_queue_timeout_sec <= 0:
+            raise ValueError("gemini_queue_timeout_sec must be positive")
+
         return True
 
     def to_dict(self) -> Dict[str, Any]:
@@ -139,8 +295,16 @@ class Config:
         """Create config from environment variables"""
         return cls(
             api_key=os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY"),
+            api_keys=[
+                k.strip()
+                for k in os.getenv("GEMINI_API_KEYS", "").split(",")
+                if k.strip()
+            ],
+            api_key_cooldown_sec=float(os.getenv("API_KEY_COOLDOWN_SEC", "60")),
             max_file_size_mb=int(os.getenv("MAX_FILE_SIZE_MB", "50")),
             upload_timeout_sec=int(os.getenv("UPLOAD_TIMEOUT_SEC", "60")),
+            upload_poll_initial_sec=float(os.getenv("UPLOAD_POLL_INITIAL_SEC", "0.5")),
+            upload_poll_max_sec=float(os.getenv("UPLOAD_POLL_MAX_SEC", "10")),
             default_model=os.getenv("DEFAULT_MODEL", "gemini-2.5-flash"),
             max_output_tokens=int(os.getenv("MAX_OUTPUT_TOKENS", "1024")),
             temperature=float(os.getenv("TEMPERATURE", "0.5")),
@@ -150,4 +314,43 @@ class Config:
             redis_port=int(os.getenv("REDIS_PORT", "6379")),
             redis_password=os.getenv("REDIS_PASSWORD"),
             redis_db=int(os.getenv("REDIS_DB", "1")),
+            local_passage_size=int(os.getenv("LOCAL_PASSAGE_SIZE", "1000")),
+            local_passage_overlap=int(os.getenv("LOCAL_PASSAGE_OVERLAP", "200")),
+            local_retrieval=os.getenv("LOCAL_RETRIEVAL", "bm25"),
+            local_vector_dim=int(os.getenv("LOCAL_VECTOR_DIM", "256")),
+            local_ann_nprobe=int(os.getenv("LOCAL_ANN_NPROBE", "0")),
+            local_ann_train_size=int(os.getenv("LOCAL_ANN_TRAIN_SIZE", "50000")),
+            local_store_dir=os.getenv("LOCAL_STORE_DIR"),
+            local_flush_passages=int(os.getenv("LOCAL_FLUSH_PASSAGES", "0")),
+            local_merge_factor=int(os.getenv("LOCAL_MERGE_FACTOR", "8")),
+            dedup_uploads=os.getenv("DEDUP_UPLOADS", "true").lower()
+            not in ("0", "false", "no"),
+            upload_concurrency=int(os.getenv("UPLOAD_CONCURRENCY", "4")),
+            extract_workers=int(os.getenv("EXTRACT_WORKERS", "0")),
+            extract_timeout_sec=int(os.getenv("EXTRACT_TIMEOUT_SEC", "120")),
+            search_concurrency=int(os.getenv("SEARCH_CONCURRENCY", "8")),
+            search_max_queue=int(os.getenv("SEARCH_MAX_QUEUE", "100")),
+            job_db_path=os.getenv("JOB_DB_PATH", "./data/jobs.db"),
+            store_registry_path=os.getenv("STORE_REGISTRY_PATH", "./data/stores.db")
+            or None,
+            upload_job_workers=int(os.getenv("UPLOAD_JOB_WORKERS", "2")),
+            upload_job_lease_sec=float(os.getenv("UPLOAD_JOB_LEASE_SEC", "60")),
+            gemini_deadline_sec=float(os.getenv("GEMINI_DEADLINE_SEC", "30")),
+            gemini_hedge_percentile=float(os.getenv("GEMINI_HEDGE_PERCENTILE", "95")),
+            gemini_breaker_threshold=int(os.getenv("GEMINI_BREAKER_THRESHOLD", "5")),
+            gemini_breaker_reset_sec=float(os.getenv("GEMINI_BREAKER_RESET_SEC", "30")),
+            local_mirror=os.getenv("LOCAL_MIRROR", "false").lower()
+            in ("1", "true", "yes"),
+            local_first=os.getenv("LOCAL_FIRST", "false").lower()
+            in ("1", "true", "yes"),
+            local_first_min_score=(
+                float(os.environ["LOCAL_FIRST_MIN_SCORE"])
+                if os.getenv("LOCAL_FIRST_MIN_SCORE")
+                else None
+            ),
+            local_first_min_margin=float(os.getenv("LOCAL_FIRST_MIN_MARGIN", "0.3")),
+            gemini_rpm=int(os.getenv("GEMINI_RPM", "0")),
+            gemini_tpm=int(os.getenv("GEMINI_TPM", "0")),
+            gemini_quota_burst_sec=float(os.getenv("GEMINI_QUOTA_BURST_SEC", "10")),
+            gemini_queue_timeout_sec=float(os.getenv("GEMINI_QUEUE_TIMEOUT_SEC", "30")),
         )
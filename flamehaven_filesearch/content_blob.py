@@ -0,0 +1,107 @@
+"""
+Memory-mapped document content for FLAMEHAVEN FileSearch local stores
+
+All document text of a store is appended, UTF-8 encoded, to a single file
+that is read through ``mmap``. Documents and passages only keep byte
+``(offset, length)`` pairs, so resident memory grows with the pages a query
+actually touches instead of with the corpus size.
+"""
+
+import mmap
+import os
+import tempfile
+import threading
+from typing import Optional
+
+
+class ContentBlob:
+    """
+    Append-only byte store read through a memory map
+
+    Writes go through the file descriptor; the map is recreated lazily the
+    first time a read falls beyond the currently mapped length. Without a
+    ``path`` the blob is backed by an anonymous temporary file, so even
+    memory-only stores keep text off the Python heap.
+    """
+
+    def __init__(self, path: Optional[str] = None, size: Optional[int] = None):
+        """
+        Open (or create) a blob
+
+        Args:
+            path: Backing file path (None = anonymous temporary file)
+            size: Committed length; trailing bytes beyond it (left by an
+                interrupted write) are truncated
+        """
+        self.path = path
+        if path is None:
+            self._file = tempfile.TemporaryFile(buffering=0)
+        else:
+            self._file = open(path, "a+b", buffering=0)
+        self._size = os.fstat(self._file.fileno()).st_size
+        if size is not None and size < self._size:
+            self._file.truncate(size)
+            self._size = size
+        self._map: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, data: bytes) -> int:
+        """
+        Append bytes to the blob
+
+        Args:
+            data: Encoded content
+
+        Returns:
+            Offset of ``data`` within the blob
+        """
+        with self._lock:
+            offset = self._size
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(data)
+            self._size += len(data)
+            return offset
+
+    def view(self, offset: int, length: int) -> memoryview:
+        """
+        Zero-copy view of a byte range
+
+        Args:
+            offset: Start offset
+            length: Number of bytes
+
+        Returns:
+            ``memoryview`` over the mapped range
+        """
+        if length <= 0:
+            return memoryview(b"")
+        end = offset + length
+        if end > self._size:
+            raise IndexError("blob range out of bounds")
+        mapped = self._map
+        if mapped is None or len(mapped) < end:
+            with self._lock:
+                if self._map is None or len(self._map) < end:
+                    # Replaced maps close once their last view is released
+                    self._map = mmap.mmap(
+                        self._file.fileno(), self._size, access=mmap.ACCESS_READ
+                    )
+                mapped = self._map
+        return memoryview(mapped)[offset:end]
+
+    def text(self, offset: int, length: int) -> str:
+        """Decode a byte range as UTF-8"""
+        return str(self.view(offset, length), "utf-8")
+
+    def sync(self) -> None:
+        """Flush appended bytes to stable storage"""
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Release the map and the backing file"""
+        with self._lock:
+            self._map = None
+            self._file.close()
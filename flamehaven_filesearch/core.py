@@ -3,12 +3,17 @@ FLAMEHAVEN FileSearch - Open Source Semantic Document Search
 Fast, simple, and transparent file search powered by Google Gemini
 """
 
+import functools
+import heapq
 import logging
 import os
-import textwrap
+import shutil
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote
 
 try:
     from google import genai as google_genai
@@ -17,10 +22,36 @@ except ImportError:  # pragma: no cover - optional dependency
     google_genai = None
     google_genai_types = None
 
+from .cache import get_file_cache
 from .config import Config
+from .dedup import ContentHashRegistry
+from .exceptions import FileProcessingError
+from .extraction import TextExtractor
+from .extractive import ExtractiveAnswerBuilder
+from .key_pool import ApiKeyPool, KeyCooldownError
+from .local_index import LocalStore, tokenize
+from .quota import QuotaScheduler, QuotaTimeoutError
+from .resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+from .routing import DEFAULT_MIN_SCORES, LocalFirstRouter
+from .segments import MANIFEST_NAME
+from .store_registry import StoreRegistry
+from .upload_poller import UploadOperationPoller
+from .vector_index import numpy_available
 
 logger = logging.getLogger(__name__)
 
+SEARCH_MODES = ("generate", "retrieve")
+
+# Retrieval-only calls still go through generate_content (File Search is a
+# tool, not a standalone endpoint), so generation is capped to a few tokens
+RETRIEVE_MAX_TOKENS = 16
+RETRIEVE_INSTRUCTION = (
+    "Search the files for material relevant to the user's message, then "
+    "reply with the single word OK."
+)
+
+NO_LOCAL_MATCH = "No matching content found in stored files."
+
 
 class FlamehavenFileSearch:
     """
@@ -52,11 +83,67 @@ class FlamehavenFileSearch:
         # Validate config - API key required only for remote mode
         self.config.validate(require_api_key=not allow_offline)
 
-        self._local_store_docs: Dict[str, List[Dict[str, str]]] = {}
-        self.client = None
+        self._local_stores: Dict[str, LocalStore] = {}
+        self._content_hashes = ContentHashRegistry(get_file_cache())
+        self._extractor = TextExtractor(
+            workers=self.config.extract_workers,
+            timeout_sec=self.config.extract_timeout_sec,
+        )
+        self._local_retrieval = self.config.local_retrieval
+        if self._local_retrieval == "dense" and not numpy_available():
+            logger.warning(
+                "NumPy not installed; dense local retrieval disabled, using BM25."
+            )
+            self._local_retrieval = "bm25"
+        # Stores are pinned to the pool key (project) that created them
+        self._key_pool = ApiKeyPool(
+            self.config.api_keys or [self.config.api_key],
+            cooldown_sec=self.config.api_key_cooldown_sec,
+        )
+        self._clients: List[Any] = []
+        self._store_keys: Dict[str, int] = {}
+        self._upload_poller = UploadOperationPoller(
+            self._get_operation,
+            initial_interval=self.config.upload_poll_initial_sec,
+            max_interval=self.config.upload_poll_max_sec,
+        )
+        # Deadline, hedging and circuit breaker around Gemini generation
+        self._resilience = ResilientCaller(
+            deadline_sec=self.config.gemini_deadline_sec,
+            hedge_percentile=self.config.gemini_hedge_percentile,
+            breaker=CircuitBreaker(
+                failure_threshold=self.config.gemini_breaker_threshold,
+                reset_timeout=self.config.gemini_breaker_reset_sec,
+            ),
+            max_workers=2 * self.config.search_concurrency,
+        )
+        # Client-side pacing against the Gemini RPM/TPM quota; every pool
+        # key is its own project, so each slot gets a budget scaled by weight
+        self._quotas = [
+            QuotaScheduler(
+                rpm=self.config.gemini_rpm * weight,
+                tpm=self.config.gemini_tpm * weight,
+                burst_sec=self.config.gemini_quota_burst_sec,
+            )
+            for weight in self._key_pool.weights
+        ]
+        min_score = self.config.local_first_min_score
+        if min_score is None:
+            min_score = DEFAULT_MIN_SCORES[self._local_retrieval]
+        self._router = LocalFirstRouter(
+            min_score=min_score,
+            min_margin=self.config.local_first_min_margin,
+        )
+        self._answer_builder = ExtractiveAnswerBuilder()
+        self._mirror_lock = threading.Lock()
+        # Multi-store local searches fan out here (started on first use)
+        self._fan_out_pool: Optional[ThreadPoolExecutor] = None
+        self._fan_out_lock = threading.Lock()
 
         if self._use_native_client:
-            self.client = google_genai.Client(api_key=self.config.api_key)
+            self._clients = [
+                google_genai.Client(api_key=key) for key in self._key_pool.keys
+            ]
             mode_label = "google-genai"
         else:
             mode_label = "local-fallback"
@@ -67,12 +154,42 @@ class FlamehavenFileSearch:
 
         self.stores: Dict[str, str] = {}  # Track remote IDs or local handles
 
+        # Remote stores survive restarts through the registry
+        self._store_registry: Optional[StoreRegistry] = None
+        if self._use_native_client and self.config.store_registry_path:
+            self._store_registry = StoreRegistry(self.config.store_registry_path)
+            self._rehydrate_stores()
+
+        if self.config.local_store_dir and (
+            not self._use_native_client or self.config.local_mirror
+        ):
+            self._reopen_local_stores()
+
         logger.info(
             "FLAMEHAVEN FileSearch initialized with model: %s (mode=%s)",
             self.config.default_model,
             mode_label,
         )
 
+    @property
+    def client(self) -> Any:
+        """Gemini client for the primary API key (None in local mode)."""
+        return self._clients[0] if self._clients else None
+
+    @client.setter
+    def client(self, value: Any) -> None:
+        if self._clients:
+            self._clients[0] = value
+        else:
+            self._clients = [value]
+
+    def _store_client(self, store_name: str) -> Tuple[int, Any]:
+        """Return the key-pool slot and client that own ``store_name``."""
+        slot = self._store_keys.get(store_name, 0)
+        if slot >= len(self._clients):
+            slot = 0
+        return slot, self._clients[slot]
+
     def create_store(self, name: str = "default") -> str:
         """
         Create file search store
@@ -88,22 +205,134 @@ class FlamehavenFileSearch:
             return self.stores[name]
 
         if self._use_native_client:
+            registered = self._registered_store(name)
+            if registered is not None:
+                return registered
+            slot = self._key_pool.assign()
             try:
-                store = self.client.file_search_stores.create()
-                self.stores[name] = store.name
-                logger.info("Created store '%s': %s", name, store.name)
-                return store.name
+                store = self._key_pool.call(
+                    slot, self._clients[slot].file_search_stores.create
+                )
             except Exception as e:
+                self._key_pool.unassign(slot)
                 logger.error("Failed to create store '%s': %s", name, e)
                 raise
+            if not self._remember_store(name, store.name, slot):
+                self._discard_duplicate_store(name, store.name, slot)
+                return self.stores[name]
+            logger.info("Created store '%s': %s", name, store.name)
+            return store.name
 
         # Local fallback mode
         store_id = f"local://{name}"
+        self._get_local_store(name)
         self.stores[name] = store_id
-        self._local_store_docs.setdefault(name, [])
         logger.info("Created local store '%s' (fallback mode)", name)
         return store_id
 
+    def _remember_store(self, name: str, resource: str, slot: int) -> bool:
+        """
+        Track a new remote store in memory and in the registry
+
+        Returns:
+            False if another worker registered ``name`` first; its store is
+            adopted instead and the caller must discard ``resource``
+        """
+        if self._store_registry is not None:
+            winner = self._store_registry.claim(name, resource, slot)
+            if winner[0] != resource:
+                self._adopt_store(name, *winner)
+                return False
+        self.stores[name] = resource
+        self._store_keys[name] = slot
+        return True
+
+    def _registered_store(self, name: str) -> Optional[str]:
+        """Adopt ``name`` if another worker already registered it."""
+        if self._store_registry is None:
+            return None
+        entry = self._store_registry.get(name)
+        if entry is None:
+            return None
+        logger.info("Store '%s' was created by another worker: %s", name, entry[0])
+        self._adopt_store(name, *entry)
+        return entry[0]
+
+    def _adopt_store(self, name: str, resource: str, slot: int) -> None:
+        """Track a store registered elsewhere under its owning key."""
+        owner = slot if slot < len(self._clients) else 0
+        self.stores[name] = resource
+        self._store_keys[name] = owner
+        self._key_pool.claim(owner)
+
+    def _discard_duplicate_store(self, name: str, resource: str, slot: int) -> None:
+        """Delete a store that lost the registration race to another worker."""
+        self._key_pool.unassign(slot)
+        logger.warning(
+            "Store '%s' was registered concurrently; deleting duplicate %s",
+            name,
+            resource,
+        )
+        try:
+            self._key_pool.call(
+                slot, self._clients[slot].file_search_stores.delete, name=resource
+            )
+        except Exception as e:
+            logger.error("Failed to delete duplicate store %s: %s", resource, e)
+
+    def _forget_store(self, name: str, slot: int) -> None:
+        """Drop a deleted remote store from memory and the registry."""
+        del self.stores[name]
+        if self._store_keys.pop(name, None) is not None:
+            self._key_pool.unassign(slot)
+        if self._store_registry is not None:
+            self._store_registry.remove(name)
+
+    def _rehydrate_stores(self) -> None:
+        """
+        Restore remote stores from the registry, reconciled with Gemini
+
+        Each key's ``file_search_stores.list`` decides which key owns a
+        registered store; entries no key lists any more are dropped. If a
+        listing fails, the registry is trusted for that startup.
+        """
+        entries = self._store_registry.load()
+        if not entries:
+            return
+        documents = self._store_registry.load_documents()
+
+        listed: Dict[str, int] = {}
+        complete = True
+        for slot, client in enumerate(self._clients):
+            try:
+                for store in client.file_search_stores.list():
+                    listed.setdefault(store.name, slot)
+            except Exception as e:
+                complete = False
+                logger.warning("Listing stores for API key %d failed: %s", slot, e)
+
+        for name, (resource, slot) in entries.items():
+            if resource in listed:
+                owner = listed[resource]
+                if owner != slot:
+                    self._store_registry.put(name, resource, owner)
+            elif complete:
+                logger.warning(
+                    "Store '%s' (%s) no longer exists remotely; unregistering",
+                    name,
+                    resource,
+                )
+                self._store_registry.remove(name)
+                continue
+            else:
+                owner = slot if slot < len(self._clients) else 0
+            self.stores[name] = resource
+            self._store_keys[name] = owner
+            self._key_pool.claim(owner)
+            for sha256, file_name in documents.get(name, {}).items():
+                self._content_hashes.register(name, sha256, file_name)
+        logger.info("Rehydrated %d stores from the registry", len(self.stores))
+
     def list_stores(self) -> Dict[str, str]:
         """
         List all created stores
@@ -130,19 +359,120 @@ class FlamehavenFileSearch:
         Returns:
             Upload result dict with status, store, and file info
         """
+        early_result, size_mb, digest = self._prepare_upload(
+            file_path, store_name, max_size_mb
+        )
+        if early_result is not None:
+            return early_result
+
+        if self._use_native_client:
+            try:
+                # Upload file
+                logger.info("Uploading file: %s (%.2f MB)", file_path, size_mb)
+                slot, client = self._store_client(store_name)
+                upload_op = self._key_pool.call(
+                    slot,
+                    client.file_search_stores.upload_to_file_search_store,
+                    file_search_store_name=self.stores[store_name],
+                    file=file_path,
+                )
+
+                # Shared poller wakes us when the operation is done
+                self._upload_poller.wait(
+                    upload_op,
+                    self.config.upload_timeout_sec,
+                    get_operation=functools.partial(self._get_operation, slot=slot),
+                )
+                return self._remote_upload_done(file_path, store_name, size_mb, digest)
+
+            except TimeoutError:
+                return {"status": "error", "message": "Upload timeout"}
+            except Exception as e:
+                logger.error("Upload failed: %s", e)
+                return {"status": "error", "message": str(e)}
+
+        try:
+            content = self._extractor.extract(file_path)
+        except FileProcessingError as e:
+            logger.error("Text extraction failed for %s: %s", file_path, e.message)
+            return {"status": "error", "message": e.message}
+        return self._local_upload(file_path, store_name, size_mb, digest, content)
+
+    def _get_operation(self, operation: Any, slot: int = 0) -> Any:
+        """Refresh a long-running operation (called by the upload poller)."""
+        return self._clients[slot].operations.get(operation)
+
+    def _remote_upload_done(
+        self,
+        file_path: str,
+        store_name: str,
+        size_mb: float,
+        digest: Optional[str],
+    ) -> Dict[str, Any]:
+        """Record a completed remote upload and build its result."""
+        logger.info("Upload completed: %s", file_path)
+        if self.config.local_mirror:
+            self._mirror_upload(file_path, store_name, size_mb, digest)
+        if digest:
+            self._content_hashes.register(store_name, digest, Path(file_path).name)
+            if self._store_registry is not None:
+                self._store_registry.add_document(
+                    store_name, digest, Path(file_path).name
+                )
+        return {
+            "status": "success",
+            "store": store_name,
+            "file": file_path,
+            "size_mb": round(size_mb, 2),
+        }
+
+    def _mirror_upload(
+        self,
+        file_path: str,
+        store_name: str,
+        size_mb: float,
+        digest: Optional[str],
+    ) -> None:
+        """Index a remote upload locally so searches can fall back to it."""
+        try:
+            content = self._extractor.extract(file_path)
+        except FileProcessingError as e:
+            logger.warning("Local mirror skipped for %s: %s", file_path, e.message)
+            return
+        with self._mirror_lock:
+            self._local_upload(file_path, store_name, size_mb, digest, content)
+
+    def _prepare_upload(
+        self, file_path: str, store_name: str, max_size_mb: Optional[int] = None
+    ) -> Tuple[Optional[Dict[str, Any]], float, Optional[str]]:
+        """
+        Validate a file, ensure its store exists and check for duplicates
+
+        Returns:
+            ``(early_result, size_mb, sha256)``; ``early_result`` is an error
+            or duplicate response when the upload should stop here
+        """
         max_size_mb = max_size_mb or self.config.max_file_size_mb
 
         # Validate file exists
         if not os.path.exists(file_path):
-            return {"status": "error", "message": f"File not found: {file_path}"}
+            return (
+                {"status": "error", "message": f"File not found: {file_path}"},
+                0.0,
+                None,
+            )
 
         # Lite tier: Check file size only
         size_mb = os.path.getsize(file_path) / (1024 * 1024)
         if size_mb > max_size_mb:
-            return {
-                "status": "error",
-                "message": f"File too large: {size_mb:.1f}MB > {max_size_mb}MB",
-            }
+            return (
+                {
+                    "status": "error",
+                    "message": f"File too large: {size_mb:.1f}MB > {max_size_mb}MB",
+                },
+                size_mb,
+                None,
+            )
 
         # Check file extension
         ext = Path(file_path).suffix.lower()
@@ -155,81 +485,324 @@ class FlamehavenFileSearch:
             logger.info("Creating new store: %s", store_name)
             self.create_store(store_name)
 
-        if self._use_native_client:
-            try:
-                # Upload file
-                logger.info("Uploading file: %s (%.2f MB)", file_path, size_mb)
-                upload_op = self.client.file_search_stores.upload_to_file_search_store(
-                    file_search_store_name=self.stores[store_name], file=file_path
-                )
-
-                # Simple polling
-                timeout = self.config.upload_timeout_sec
-                start = time.time()
-                while not upload_op.done:
-                    if time.time() - start > timeout:
-                        return {"status": "error", "message": "Upload timeout"}
-                    time.sleep(3)
-                    upload_op = self.client.operations.get(upload_op)
-
-                logger.info("Upload completed: %s", file_path)
-                return {
-                    "status": "success",
-                    "store": store_name,
-                    "file": file_path,
-                    "size_mb": round(size_mb, 2),
-                }
-
-            except Exception as e:
-                logger.error("Upload failed: %s", e)
-                return {"status": "error", "message": str(e)}
-
-        return self._local_upload(file_path, store_name, size_mb)
+        digest = None
+        if self.config.dedup_uploads:
+            digest = self._content_hashes.hash_file(file_path)
+            duplicate = self._duplicate_result(file_path, store_name, size_mb, digest)
+            if duplicate is not None:
+                return duplicate, size_mb, digest
+        return None, size_mb, digest
+
+    def _duplicate_result(
+        self, file_path: str, store_name: str, size_mb: float, digest: str
+    ) -> Optional[Dict[str, Any]]:
+        """Return a duplicate response if ``digest`` is already in the store."""
+        existing = self._content_hashes.lookup(store_name, digest)
+        if existing is None and self._store_registry is not None:
+            # Uploaded by another API worker since this one started
+            registered = self._store_registry.get_document(store_name, digest)
+            if registered is not None:
+                self._content_hashes.register(store_name, digest, registered)
+                existing = {"file": registered}
+        if existing is None:
+            return None
+        logger.info(
+            "Skipping duplicate upload %s (same content as %s)",
+            file_path,
+            existing["file"],
+        )
+        return {
+            "status": "duplicate",
+            "store": store_name,
+            "file": file_path,
+            "size_mb": round(size_mb, 2),
+            "sha256": digest,
+            "duplicate_of": existing["file"],
+        }
 
     def upload_files(
-        self, file_paths: List[str], store_name: str = "default"
+        self,
+        file_paths: List[str],
+        store_name: str = "default",
+        max_concurrency: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
-        Upload multiple files
+        Upload multiple files concurrently
+
+        Remote uploads run on up to ``max_concurrency`` threads. In local
+        fallback mode text extraction runs in the process pool and each file
+        is indexed as soon as its text is ready. Results keep input order.
 
         Args:
             file_paths: List of file paths
             store_name: Store name to upload to
+            max_concurrency: Parallel remote uploads (defaults to config)
 
         Returns:
-            Dict with upload results for each file
+            Dict with upload results and ``duration_sec`` for each file, and
+            the batch wall-clock time as ``elapsed_sec``
         """
-        results = []
-        for file_path in file_paths:
-            result = self.upload_file(file_path, store_name)
-            results.append({"file": file_path, "result": result})
+        max_concurrency = max_concurrency or self.config.upload_concurrency
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+
+        start = time.perf_counter()
+        if self._use_native_client:
+            # Create the store once up front rather than racing in each upload
+            if file_paths and store_name not in self.stores:
+                self.create_store(store_name)
+            workers = min(max_concurrency, len(file_paths)) or 1
+            outcomes: List[Optional[Dict[str, Any]]] = [None] * len(file_paths)
+            durations = [0.0] * len(file_paths)
+            groups = self._digest_groups(file_paths)
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="upload"
+            ) as executor:
+                for batch in self._upload_rounds(groups, outcomes):
+                    timed = executor.map(
+                        lambda index: self._timed(
+                            self.upload_file, file_paths[index], store_name
+                        ),
+                        batch,
+                    )
+                    for index, (result, duration) in zip(batch, timed):
+                        outcomes[index], durations[index] = result, duration
+        else:
+            outcomes, durations = self._local_upload_many(file_paths, store_name, start)
+        return self._summarize_uploads(
+            file_paths, outcomes, durations, time.perf_counter() - start
+        )
+
+    def _digest_groups(self, file_paths: List[str]) -> List[List[int]]:
+        """
+        Group batch indexes by content digest, in input order
+
+        Files that cannot be hashed (missing, unreadable) and every file when
+        dedup is off form groups of their own; ``upload_file`` reports them.
+        """
+        groups: Dict[Any, List[int]] = {}
+        for index, file_path in enumerate(file_paths):
+            key: Any = index
+            if self.config.dedup_uploads:
+                try:
+                    key = self._content_hashes.hash_file(file_path)
+                except OSError:
+                    pass
+            groups.setdefault(key, []).append(index)
+        return list(groups.values())
+
+    @staticmethod
+    def _upload_rounds(
+        groups: List[List[int]], outcomes: List[Optional[Dict[str, Any]]]
+    ) -> Iterator[List[int]]:
+        """
+        Yield batches of indexes to upload concurrently
+
+        Only one copy of each content is in flight at a time: the duplicate
+        pre-check runs before the digest is registered, so identical files
+        uploaded together would all reach the API. Once a copy lands, the rest
+        of its group goes out in one batch and stops at the pre-check; after
+        a failure the next copy is tried. The caller fills ``outcomes``
+        between batches.
+        """
+        remaining = [list(group) for group in groups]
+        landed = [False] * len(groups)
+        while any(remaining):
+            batch: List[int] = []
+            for position, queue in enumerate(remaining):
+                take = len(queue) if landed[position] else 1
+                batch.extend(queue[:take])
+                del queue[:take]
+            yield batch
+            for position, group in enumerate(groups):
+                landed[position] = any(
+                    outcomes[index] is not None
+                    and outcomes[index]["status"] in ("success", "duplicate")
+                    for index in group
+                )
+
+    @staticmethod
+    def _timed(func, *args) -> Tuple[Any, float]:
+        """Call ``func`` and return its result with the elapsed seconds."""
+        start = time.perf_counter()
+        result = func(*args)
+        return result, time.perf_counter() - start
+
+    @staticmethod
+    def _summarize_uploads(
+        file_paths: List[str],
+        outcomes: List[Dict[str, Any]],
+        durations: List[float],
+        elapsed: float,
+    ) -> Dict[str, Any]:
+        """Aggregate per-file upload results."""
+        results = [
+            {"file": file_path, "result": result, "duration_sec": round(duration, 4)}
+            for file_path, result, duration in zip(file_paths, outcomes, durations)
+        ]
 
         success_count = sum(1 for r in results if r["result"]["status"] == "success")
+        duplicate_count = sum(
+            1 for r in results if r["result"]["status"] == "duplicate"
+        )
         return {
             "status": "completed",
             "total": len(file_paths),
             "success": success_count,
-            "failed": len(file_paths) - success_count,
+            "duplicates": duplicate_count,
+            "failed": len(file_paths) - success_count - duplicate_count,
+            "elapsed_sec": round(elapsed, 4),
             "results": results,
         }
 
+    def _local_upload_many(
+        self, file_paths: List[str], store_name: str, start: float
+    ) -> Tuple[List[Dict[str, Any]], List[float]]:
+        """
+        Validate, extract in parallel and index files as they complete.
+
+        All files enter the extraction stage together, so each duration is
+        measured from ``start`` to the moment the file's result is ready.
+        """
+        outcomes: List[Optional[Dict[str, Any]]] = [None] * len(file_paths)
+        durations = [0.0] * len(file_paths)
+        pending: List[Tuple[int, float, Optional[str]]] = []
+        for index, file_path in enumerate(file_paths):
+            early_result, size_mb, digest = self._prepare_upload(file_path, store_name)
+            if early_result is not None:
+                outcomes[index] = early_result
+                durations[index] = time.perf_counter() - start
+            else:
+                pending.append((index, size_mb, digest))
+
+        pending_paths = [file_paths[index] for index, _, _ in pending]
+        for position, content, error in self._extractor.extract_many(pending_paths):
+            index, size_mb, digest = pending[position]
+            file_path = file_paths[index]
+            if error is not None:
+                logger.error("Text extraction failed for %s: %s", file_path, error)
+                outcomes[index] = {"status": "error", "message": error}
+            else:
+                # Identical files within one batch pass the pre-check together
+                duplicate = (
+                    self._duplicate_result(file_path, store_name, size_mb, digest)
+                    if digest
+                    else None
+                )
+                outcomes[index] = duplicate or self._local_upload(
+                    file_path, store_name, size_mb, digest, content
+                )
+            durations[index] = time.perf_counter() - start
+        return outcomes, durations
+
+    def _local_store_options(self) -> Dict[str, Any]:
+        """Constructor arguments shared by every LocalStore."""
+        return {
+            "passage_size": self.config.local_passage_size,
+            "passage_overlap": self.config.local_passage_overlap,
+            "retrieval": self._local_retrieval,
+            "vector_dim": self.config.local_vector_dim,
+            "ann_nprobe": self.config.local_ann_nprobe,
+            "ann_train_size": self.config.local_ann_train_size,
+            "flush_passages": self.config.local_flush_passages,
+            "merge_factor": self.config.local_merge_factor,
+        }
+
+    def _get_local_store(self, store_name: str) -> LocalStore:
+        """Return the local store for ``store_name``, creating it if needed."""
+        local_store = self._local_stores.get(store_name)
+        if local_store is None:
+            directory = None
+            if self.config.local_store_dir:
+                directory = self._local_store_path(store_name)
+            local_store = LocalStore(
+                directory=directory, name=store_name, **self._local_store_options()
+            )
+            self._local_stores[store_name] = local_store
+        return local_store
+
+    def _local_store_path(self, store_name: str) -> str:
+        """
+        Directory of the local store for ``store_name``
+
+        The name is percent-encoded into a single path component. ``quote``
+        leaves dots alone, so all-dot names ("." and "..") get their dots
+        escaped too; they would otherwise resolve to ``local_store_dir``
+        itself or its parent.
+
+        Raises:
+            ValueError: If the name does not map to a child of
+                ``local_store_dir``
+        """
+        root = os.path.realpath(self.config.local_store_dir)
+        entry = quote(store_name, safe="")
+        if not entry.strip("."):
+            entry = entry.replace(".", "%2E")
+        directory = os.path.realpath(os.path.join(root, entry))
+        if not entry or os.path.dirname(directory) != root:
+            raise ValueError(f"Invalid store name for a local store: {store_name!r}")
+        return directory
+
+    def _inside_local_store_dir(self, directory: str) -> bool:
+        """Check that ``directory`` is a child of ``config.local_store_dir``."""
+        if not self.config.local_store_dir:
+            return False
+        root = os.path.realpath(self.config.local_store_dir)
+        return os.path.dirname(os.path.realpath(directory)) == root
+
+    def _reopen_local_stores(self) -> None:
+        """
+        Reload persisted local stores from ``config.local_store_dir``
+
+        In remote mode these are local mirrors: they back fallback searches
+        but are not registered as stores themselves.
+        """
+        root = self.config.local_store_dir
+        if not os.path.isdir(root):
+            return
+
+        for entry in sorted(os.listdir(root)):
+            directory = os.path.join(root, entry)
+            if not os.path.isfile(os.path.join(directory, MANIFEST_NAME)):
+                continue
+            try:
+                local_store = LocalStore.open(
+                    directory, name=unquote(entry), **self._local_store_options()
+                )
+            except (OSError, ValueError) as e:
+                logger.error("Failed to reopen local store at %s: %s", directory, e)
+                continue
+            self._local_stores[local_store.name] = local_store
+            if self._use_native_client:
+                continue
+            self.stores[local_store.name] = f"local://{local_store.name}"
+            for document in local_store.documents:
+                if document.get("sha256"):
+                    self._content_hashes.register(
+                        local_store.name, document["sha256"], document["title"]
+                    )
+
     def _local_upload(
-        self, file_path: str, store_name: str, size_mb: float
+        self,
+        file_path: str,
+        store_name: str,
+        size_mb: float,
+        sha256: Optional[str] = None,
+        content: str = "",
     ) -> Dict[str, Any]:
-        """Store file metadata/content locally when google-genai is unavailable."""
-        try:
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as source:
-                content = source.read()
-        except OSError:
-            content = ""
-
-        self._local_store_docs.setdefault(store_name, []).append(
-            {
-                "title": Path(file_path).name,
-                "uri": os.path.abspath(file_path),
-                "content": content,
-            }
+        """Index extracted file content locally when google-genai is unavailable."""
+        local_store = self._get_local_store(store_name)
+        local_store.add_document(
+            title=Path(file_path).name,
+            uri=os.path.abspath(file_path),
+            content=content,
+            sha256=sha256,
         )
+        if not self.config.local_flush_passages:
+            # Durable per upload; otherwise the store flushes at the threshold
+            local_store.flush()
+        if sha256:
+            self._content_hashes.register(store_name, sha256, Path(file_path).name)
         logger.info("Stored file locally for fallback mode: %s", file_path)
         return {
             "status": "success",
@@ -240,38 +813,58 @@ class FlamehavenFileSearch:
 
     def _local_search(
         self,
-        store_name: str,
+        store_names: List[str],
         query: str,
         max_tokens: int,
         temperature: float,
         model: str,
     ) -> Dict[str, Any]:
-        """Simple local search fallback used when google-genai SDK is missing."""
-        docs = self._local_store_docs.get(store_name, [])
-        if not docs:
+        """
+        Simple local search fallback used when google-genai SDK is missing.
+
+        Several stores are searched in parallel and their hits merged into
+        one top-k by score. The answer is built extractively from the
+        best-matching sentences of the top passages, citing sources as
+        ``[n]``.
+        """
+        label = ",".join(store_names)
+        local_stores = [
+            self._local_stores[name]
+            for name in store_names
+            if name in self._local_stores
+        ]
+        if not local_stores:
             return {
                 "status": "error",
-                "message": f"No files available in store '{store_name}'.",
+                "message": f"No files available in store '{label}'.",
             }
 
-        matches = []
-        for doc in docs:
-            snippet = self._build_snippet(doc["content"], query)
-            if snippet:
-                matches.append((doc, snippet))
+        # Rank passages (one per document); citations index the sources
+        hits = self._rank_local(
+            local_stores, tokenize(query), max(self.config.max_sources, 1)
+        )
+        sources = [
+            {
+                "title": local_store.documents[doc_id]["title"],
+                "uri": local_store.documents[doc_id]["uri"],
+            }
+            for local_store, doc_id, _, _ in hits
+        ]
+        answer, _ = self._answer_builder.build(
+            query,
+            [
+                local_store.passage_text(passage_id)
+                for local_store, _, passage_id, _ in hits
+            ],
+        )
 
-        if not matches:
-            answer = "No matching content found in stored files."
+        if not answer:
+            answer = NO_LOCAL_MATCH
+            docs = [doc for store in local_stores for doc in store.documents]
             sources = [
                 {"title": doc["title"], "uri": doc["uri"]}
                 for doc in docs[: self.config.max_sources]
             ]
-        else:
-            sources = [
-                {"title": doc["title"], "uri": doc["uri"]}
-                for doc, _ in matches[: self.config.max_sources]
-            ]
-            answer = " ".join(snippet for _, snippet in matches[:5])
 
         return {
             "status": "success",
@@ -279,28 +872,108 @@ class FlamehavenFileSearch:
             "sources": sources,
             "model": f"local-fallback:{model}",
             "query": query,
-            "store": store_name,
+            "store": label,
             "max_tokens": max_tokens,
             "temperature": temperature,
         }
 
-    def _build_snippet(self, content: str, query: str) -> str:
-        """Extract a short snippet around the query text."""
-        if not content:
-            return ""
+    def _rank_local(
+        self, local_stores: List[LocalStore], terms: List[str], k: int
+    ) -> List[Tuple[LocalStore, int, int, float]]:
+        """
+        Top ``k`` ``(store, doc_id, passage_id, score)`` hits across stores
+
+        Each store scores BM25 with its own IDF and length statistics, so
+        raw scores from different stores are not comparable. Before merging,
+        every store's scores are divided by its upper bound for the query
+        (``LocalStore.max_score``) and rescaled by the largest bound, which
+        keeps them on the single-store scale the local-first router expects.
+        """
+        if len(local_stores) == 1:
+            local_store = local_stores[0]
+            return [
+                (local_store, doc_id, passage_id, score)
+                for doc_id, passage_id, score in local_store.search(terms, k)
+            ]
 
-        haystack = content.lower()
-        needle = query.lower()
-        idx = haystack.find(needle)
-        if idx == -1:
-            return ""
+        ranked = list(
+            self._store_search_pool().map(
+                lambda store: (store.search(terms, k), store.max_score(terms)),
+                local_stores,
+            )
+        )
+        scale = max(bound for _, bound in ranked)
+        hits = [
+            (local_store, doc_id, passage_id, score * scale / bound)
+            for local_store, (store_hits, bound) in zip(local_stores, ranked)
+            if bound > 0
+            for doc_id, passage_id, score in store_hits
+        ]
+        return heapq.nlargest(k, hits, key=lambda hit: hit[3])
+
+    def _store_search_pool(self) -> ThreadPoolExecutor:
+        """Shared pool for multi-store local fan-out."""
+        with self._fan_out_lock:
+            if self._fan_out_pool is None:
+                self._fan_out_pool = ThreadPoolExecutor(
+                    max_workers=self.config.search_concurrency,
+                    thread_name_prefix="store-search",
+                )
+            return self._fan_out_pool
+
+    def _local_retrieve(
+        self, store_names: List[str], query: str, model: str
+    ) -> Dict[str, Any]:
+        """Return ranked local passages without assembling an answer."""
+        label = ",".join(store_names)
+        local_stores = [
+            self._local_stores[name]
+            for name in store_names
+            if name in self._local_stores
+        ]
+        if not local_stores:
+            return {
+                "status": "error",
+                "message": f"No files available in store '{label}'.",
+            }
+
+        top_k = max(self.config.max_sources, 5)
+        chunks = []
+        for local_store, doc_id, passage_id, score in self._rank_local(
+            local_stores, tokenize(query), top_k
+        ):
+            doc = local_store.documents[doc_id]
+            chunks.append(
+                {
+                    "text": local_store.passage_text(passage_id),
+                    "title": doc["title"],
+                    "uri": doc["uri"],
+                    "store": local_store.name,
+                    "score": round(score, 4),
+                }
+            )
+        return self._retrieval_result(chunks, query, f"local-index:{model}", label)
 
-        window = 160
-        start = max(idx - window, 0)
-        end = min(idx + len(needle) + window, len(content))
-        snippet = content[start:end].replace("\n", " ").strip()
-        snippet = " ".join(snippet.split())
-        return textwrap.shorten(snippet, width=300, placeholder="...")
+    def _retrieval_result(
+        self, chunks: List[Dict[str, Any]], query: str, model: str, store_name: str
+    ) -> Dict[str, Any]:
+        """Build a ``mode="retrieve"`` result from ranked chunks."""
+        sources: List[Dict[str, Any]] = []
+        seen = set()
+        for chunk in chunks:
+            if (chunk["title"], chunk["uri"]) not in seen:
+                seen.add((chunk["title"], chunk["uri"]))
+                sources.append({"title": chunk["title"], "uri": chunk["uri"]})
+        logger.info("Retrieval completed with %d chunks", len(chunks))
+        return {
+            "status": "success",
+            "mode": "retrieve",
+            "chunks": chunks,
+            "sources": sources[: self.config.max_sources],
+            "model": model,
+            "query": query,
+            "store": store_name,
+        }
 
     def search(
         self,
@@ -309,108 +982,567 @@ class FlamehavenFileSearch:
         model: Optional[str] = None,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
+        priority: int = 0,
+        store_names: Optional[List[str]] = None,
+        mode: str = "generate",
     ) -> Dict[str, Any]:
         """
         Search and generate answer
 
+        With ``mode="retrieve"`` no answer is generated: the result carries
+        ranked ``chunks`` (passage text, title, uri) and their sources.
+        Remote retrievals still run through File Search, with output capped
+        to a few tokens.
+
         Args:
             query: Search query
             store_name: Store name to search in
             model: Model to use (defaults to config)
             max_tokens: Max output tokens (defaults to config)
             temperature: Model temperature (defaults to config)
+            priority: Quota queue priority; higher is served first
+            store_names: Search several stores at once (overrides
+                ``store_name``); remote stores are queried in one call
+            mode: ``"generate"`` (default) or ``"retrieve"``
 
         Returns:
             Dict with answer, sources, and metadata
         """
-        model = model or self.config.default_model
-        max_tokens = max_tokens or self.config.max_output_tokens
-        temperature = (
-            temperature if temperature is not None else self.config.temperature
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+        retrieve = mode == "retrieve"
+        if retrieve:
+            max_tokens, temperature = RETRIEVE_MAX_TOKENS, 0.0
+        model, max_tokens, temperature = self._generation_params(
+            model, max_tokens, temperature
         )
 
-        if store_name not in self.stores:
-            return {
-                "status": "error",
-                "message": (
-                    f"Store '{store_name}' not found. Create it first or upload files."
-                ),
-            }
+        names = self._target_stores(store_name, store_names)
+        missing = self._missing_store(names)
+        if missing is not None:
+            return self._store_not_found(missing)
 
         if not self._use_native_client:
+            if retrieve:
+                return self._local_retrieve(names, query, model)
             return self._local_search(
-                store_name=store_name,
+                store_names=names,
                 query=query,
                 max_tokens=max_tokens,
                 temperature=temperature,
                 model=model,
             )
 
+        # Local-first routing: clear-cut lookups never reach Gemini
+        routed = self.config.local_first and not retrieve
+        started = time.perf_counter()
+        if routed:
+            result = self._local_first(names, query, max_tokens, temperature, model)
+            if result is not None:
+                self._router.record("local", time.perf_counter() - started)
+                return result
+
+        result = self._remote_search(
+            names, query, model, max_tokens, temperature, priority, mode
+        )
+        if routed:
+            self._router.record("gemini", time.perf_counter() - started)
+        return result
+
+    def _local_first(
+        self,
+        store_names: List[str],
+        query: str,
+        max_tokens: int,
+        temperature: float,
+        model: str,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Answer extractively from the local mirror if its top hit is clear
+
+        Returns:
+            The local result, or None to escalate to Gemini
+        """
+        if not all(name in self._local_stores for name in store_names):
+            return None
+        local_stores = [self._local_stores[name] for name in store_names]
+        hits = self._rank_local(local_stores, tokenize(query), 2)
+        if not self._router.confident([score for _, _, _, score in hits]):
+            return None
+
+        result = self._local_search(
+            store_names=store_names,
+            query=query,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            model=model,
+        )
+        if result["status"] != "success" or result["answer"] == NO_LOCAL_MATCH:
+            return None
+        logger.info("Answered locally (top score %.3f): %s", hits[0][3], query)
+        result["model"] = f"local-index:{model}"
+        result["route"] = "local"
+        return result
+
+    def _remote_search(
+        self,
+        store_names: List[str],
+        query: str,
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        priority: int,
+        mode: str,
+    ) -> Dict[str, Any]:
+        """Run a search through Gemini File Search."""
+        label = ",".join(store_names)
+        retrieve = mode == "retrieve"
         try:
-            logger.info("Searching in store '%s' with query: %s", store_name, query)
+            slot, client = self._stores_client(store_names)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
 
-            # Call Google File Search
-            response = self.client.models.generate_content(
+        try:
+            logger.info("Searching in store '%s' with query: %s", label, query)
+
+            # Wait for quota, then call Google File Search under deadline,
+            # hedging and breaker; a hedge is only sent if quota allows
+            estimate = self._estimate_tokens(query, max_tokens)
+            self._key_pool.check(slot)
+            self._acquire_quota(slot, estimate, priority)
+            response = self._resilience.call(
+                self._key_pool.call,
+                slot,
+                client.models.generate_content,
+                hedge_gate=lambda: self._quotas[slot].try_acquire(estimate),
                 model=model,
                 contents=query,
-                config=google_genai_types.GenerateContentConfig(
-                    tools=[
-                        google_genai_types.Tool(
-                            file_search=google_genai_types.FileSearch(
-                                file_search_store_names=[self.stores[store_name]]
-                            )
-                        )
-                    ],
-                    max_output_tokens=max_tokens,
+                config=self._file_search_config(
+                    store_names,
+                    max_tokens,
+                    temperature,
+                    timeout_sec=self.config.gemini_deadline_sec,
+                    system_instruction=RETRIEVE_INSTRUCTION if retrieve else None,
+                ),
+            )
+            self._quotas[slot].reconcile(estimate, self._used_tokens(response))
+            if retrieve:
+                return self._retrieval_result(
+                    self._grounding_chunks(response.candidates[0].grounding_metadata),
+                    query,
+                    model,
+                    label,
+                )
+            return self._search_result(response, query, model, label)
+
+        except Exception as e:
+            logger.error("Search failed: %s", e)
+            return self._fallback_search(
+                e, store_names, query, max_tokens, temperature, model, mode=mode
+            )
+
+    @staticmethod
+    def _target_stores(store_name: str, store_names: Optional[List[str]]) -> List[str]:
+        """Stores a search covers: ``store_names`` (deduplicated) or ``store_name``."""
+        return list(dict.fromkeys(store_names)) if store_names else [store_name]
+
+    def _missing_store(self, store_names: List[str]) -> Optional[str]:
+        """Return the first of ``store_names`` that does not exist."""
+        return next((name for name in store_names if name not in self.stores), None)
+
+    def _stores_client(self, store_names: List[str]) -> Tuple[int, Any]:
+        """
+        Return the slot and client owning every store in ``store_names``
+
+        One File Search call can only see stores of a single project, so
+        stores pinned to different API keys cannot be searched together.
+
+        Raises:
+            ValueError: The stores belong to different API keys
+        """
+        slots = {self._store_keys.get(name, 0) for name in store_names}
+        if len(slots) > 1:
+            raise ValueError(
+                f"Stores {', '.join(store_names)} belong to different API keys "
+                "and cannot be searched in one call"
+            )
+        return self._store_client(store_names[0])
+
+    @staticmethod
+    def _estimate_tokens(query: str, max_tokens: int) -> int:
+        """Rough token budget for a call: prompt (~4 chars/token) plus output."""
+        return len(query) // 4 + 1 + max_tokens
+
+    @staticmethod
+    def _used_tokens(response: Any) -> Optional[int]:
+        """Total tokens reported by a response, if available."""
+        usage = getattr(response, "usage_metadata", None)
+        total = getattr(usage, "total_token_count", None)
+        return total if isinstance(total, int) else None
+
+    def _acquire_quota(self, slot: int, tokens: int, priority: int) -> float:
+        """Queue for a key's Gemini quota; the wait is reported separately."""
+        waited = self._quotas[slot].acquire(
+            tokens, priority=priority, timeout=self.config.gemini_queue_timeout_sec
+        )
+        if waited > 0.001:
+            logger.info("Waited %.3fs for Gemini quota", waited)
+        return waited
+
+    def set_quota_wait_observer(self, callback: Optional[Any]) -> None:
+        """Register ``callback(seconds)`` called with every quota queue wait."""
+        for quota in self._quotas:
+            quota.on_wait = callback
+
+    def set_route_observer(self, callback: Optional[Any]) -> None:
+        """Register ``callback(route, seconds)`` called for every routed search."""
+        self._router.on_route = callback
+
+    def get_routing_stats(self) -> Dict[str, Any]:
+        """Local-first routing split and per-route latency."""
+        return self._router.get_stats()
+
+    def get_quota_stats(self) -> Dict[str, Any]:
+        """Quota queue statistics summed over keys, plus a per-key breakdown."""
+        keys = [quota.get_stats() for quota in self._quotas]
+        admitted = sum(stats["admitted"] for stats in keys)
+        total_wait = sum(quota.total_wait_sec for quota in self._quotas)
+        return {
+            "enabled": any(stats["enabled"] for stats in keys),
+            "queued": sum(stats["queued"] for stats in keys),
+            "admitted": admitted,
+            "delayed": sum(stats["delayed"] for stats in keys),
+            "timeouts": sum(stats["timeouts"] for stats in keys),
+            "avg_wait_sec": round(total_wait / admitted, 4) if admitted else 0.0,
+            "max_wait_sec": max(stats["max_wait_sec"] for stats in keys),
+            "keys": keys,
+        }
+
+    def _fallback_search(
+        self,
+        error: Exception,
+        store_names: List[str],
+        query: str,
+        max_tokens: int,
+        temperature: float,
+        model: str,
+        mode: str = "generate",
+    ) -> Dict[str, Any]:
+        """
+        Answer from the local mirror while Gemini is failing
+
+        Without a mirror for every store the upstream error is returned;
+        an open circuit therefore fails fast instead of queueing on Gemini.
+        """
+        if all(name in self._local_stores for name in store_names):
+            if mode == "retrieve":
+                result = self._local_retrieve(store_names, query, model)
+            else:
+                result = self._local_search(
+                    store_names=store_names,
+                    query=query,
+                    max_tokens=max_tokens,
                     temperature=temperature,
-                    response_modalities=["TEXT"],
+                    model=model,
+                )
+            if result["status"] == "success":
+                logger.warning("Gemini unavailable; answered from local mirror")
+                result["degraded"] = True
+                return result
+        return {"status": "error", "message": str(error)}
+
+    def _result_events(
+        self, result: Dict[str, Any], query: str, store_name: str
+    ) -> Iterator[Dict[str, Any]]:
+        """Replay a complete search result as stream events."""
+        if result["status"] == "error":
+            yield {"event": "error", **result}
+            return
+        yield {"event": "token", "text": result["answer"]}
+        yield {"event": "sources", "sources": result["sources"]}
+        done = {
+            "event": "done",
+            "model": result["model"],
+            "query": query,
+            "store": store_name,
+        }
+        if result.get("degraded"):
+            done["degraded"] = True
+        yield done
+
+    def search_stream(
+        self,
+        query: str,
+        store_name: str = "default",
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        priority: int = 0,
+        store_names: Optional[List[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Search and stream the generated answer as it is produced
+
+        Yields ``token`` events (``{"event": "token", "text": ...}``) while
+        the model generates, then a single ``sources`` event once grounding
+        metadata has arrived and a final ``done`` event. Failures end the
+        stream with an ``error`` event carrying ``message``.
+
+        Args:
+            query: Search query
+            store_name: Store name to search in
+            model: Model to use (defaults to config)
+            max_tokens: Max output tokens (defaults to config)
+            temperature: Model temperature (defaults to config)
+            priority: Quota queue priority; higher is served first
+            store_names: Search several stores at once (overrides
+                ``store_name``)
+
+        Yields:
+            Event dicts keyed by ``event``
+        """
+        model, max_tokens, temperature = self._generation_params(
+            model, max_tokens, temperature
+        )
+
+        names = self._target_stores(store_name, store_names)
+        missing = self._missing_store(names)
+        if missing is not None:
+            yield {"event": "error", **self._store_not_found(missing)}
+            return
+        label = ",".join(names)
+
+        if not self._use_native_client:
+            # Local answers are assembled at once; stream them as one token
+            result = self._local_search(
+                store_names=names,
+                query=query,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                model=model,
+            )
+            yield from self._result_events(result, query, label)
+            return
+
+        try:
+            slot, client = self._stores_client(names)
+            self._key_pool.check(slot)
+            self._acquire_quota(
+                slot, self._estimate_tokens(query, max_tokens), priority
+            )
+        except (ValueError, KeyCooldownError, QuotaTimeoutError) as e:
+            logger.error("Streaming search failed: %s", e)
+            yield {"event": "error", "status": "error", "message": str(e)}
+            return
+
+        breaker = self._resilience.breaker
+        if not breaker.allow():
+            result = self._fallback_search(
+                CircuitOpenError("Gemini circuit is open"),
+                names,
+                query,
+                max_tokens,
+                temperature,
+                model,
+            )
+            yield from self._result_events(result, query, label)
+            return
+
+        error: Optional[BaseException] = None
+        abandoned = False
+        stream: Optional[Iterator[Any]] = None
+        answer = ""
+        sources: List[Dict[str, Any]] = []
+        deadline_sec = self.config.gemini_deadline_sec
+        deadline = time.monotonic() + deadline_sec
+        try:
+            logger.info("Streaming search in store '%s' with query: %s", label, query)
+            stream = self._leased_stream(
+                slot,
+                client.models.generate_content_stream,
+                model=model,
+                contents=query,
+                config=self._file_search_config(
+                    names, max_tokens, temperature, timeout_sec=deadline_sec
                 ),
             )
+            for chunk in stream:
+                # The HTTP timeout bounds a stalled read; this bounds the total
+                if time.monotonic() > deadline:
+                    raise TimeoutError(
+                        f"Streaming search exceeded the {deadline_sec}s deadline"
+                    )
+                # Keep consuming past the length cap: grounding comes last
+                room = self.config.max_answer_length - len(answer)
+                text = (chunk.text or "")[: max(room, 0)]
+                if text:
+                    answer += text
+                    term = self._banned_term(answer)
+                    if term is not None:
+                        yield {
+                            "event": "error",
+                            "status": "error",
+                            "message": f"Response contains banned term: {term}",
+                        }
+                        return
+                    yield {"event": "token", "text": text}
+                if chunk.candidates:
+                    chunk_sources = self._grounding_sources(
+                        chunk.candidates[0].grounding_metadata
+                    )
+                    if chunk_sources:
+                        sources = chunk_sources
+        except GeneratorExit:
+            # The consumer went away mid-stream; the call never finished
+            abandoned = True
+            raise
+        except Exception as e:
+            error = e
+            logger.error("Streaming search failed: %s", e)
+            yield {"event": "error", "status": "error", "message": str(e)}
+            return
+        finally:
+            if stream is not None:
+                stream.close()  # ends the HTTP stream and returns the key lease
+            if abandoned:
+                breaker.record_ignored()
+            else:
+                breaker.record_outcome(error)
+
+        if len(answer) < self.config.min_answer_length:
+            logger.warning("Answer too short: %d chars", len(answer))
+        logger.info("Streaming search completed with %d sources", len(sources))
+        yield {"event": "sources", "sources": sources[: self.config.max_sources]}
+        yield {"event": "done", "model": model, "query": query, "store": label}
+
+    def _leased_stream(self, slot: int, func: Any, **kwargs) -> Iterator[Any]:
+        """Iterate a streaming call while it counts against its pool key."""
+        with self._key_pool.lease(slot):
+            yield from func(**kwargs)
+
+    def _generation_params(
+        self,
+        model: Optional[str],
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+    ) -> Tuple[str, int, float]:
+        """Fill unset generation parameters from the config."""
+        return (
+            model or self.config.default_model,
+            max_tokens or self.config.max_output_tokens,
+            temperature if temperature is not None else self.config.temperature,
+        )
 
-            answer = response.text
-
-            # Driftlock validation
-            if len(answer) < self.config.min_answer_length:
-                logger.warning("Answer too short: %d chars", len(answer))
-            if len(answer) > self.config.max_answer_length:
-                logger.warning("Answer too long: %d chars, truncating", len(answer))
-                answer = answer[: self.config.max_answer_length]
-
-            # Check banned terms
-            for term in self.config.banned_terms:
-                if term.lower() in answer.lower():
-                    logger.error("Banned term detected: %s", term)
-                    return {
-                        "status": "error",
-                        "message": f"Response contains banned term: {term}",
-                    }
-
-            # Extract grounding information
-            grounding = response.candidates[0].grounding_metadata
-            sources = []
-            if grounding:
-                sources = [
-                    {
-                        "title": c.retrieved_context.title,
-                        "uri": c.retrieved_context.uri,
-                    }
-                    for c in grounding.grounding_chunks
-                ]
-
-            logger.info("Search completed with %d sources", len(sources))
+    @staticmethod
+    def _store_not_found(store_name: str) -> Dict[str, Any]:
+        return {
+            "status": "error",
+            "message": (
+                f"Store '{store_name}' not found. Create it first or upload files."
+            ),
+        }
 
+    def _file_search_config(
+        self,
+        store_names: List[str],
+        max_tokens: int,
+        temperature: float,
+        timeout_sec: Optional[float] = None,
+        system_instruction: Optional[str] = None,
+    ):
+        """Build the File Search generation config over one or more stores."""
+        options: Dict[str, Any] = {}
+        if timeout_sec is not None:
+            # Ends abandoned (deadline-exceeded) calls on the client side too
+            options["http_options"] = {"timeout": int(timeout_sec * 1000)}
+        if system_instruction is not None:
+            options["system_instruction"] = system_instruction
+        return google_genai_types.GenerateContentConfig(
+            tools=[
+                google_genai_types.Tool(
+                    file_search=google_genai_types.FileSearch(
+                        file_search_store_names=[
+                            self.stores[name] for name in store_names
+                        ]
+                    )
+                )
+            ],
+            max_output_tokens=max_tokens,
+            temperature=temperature,
+            response_modalities=["TEXT"],
+            **options,
+        )
+
+    def _banned_term(self, answer: str) -> Optional[str]:
+        """Return the first configured banned term found in ``answer``."""
+        lowered = answer.lower()
+        for term in self.config.banned_terms:
+            if term.lower() in lowered:
+                logger.error("Banned term detected: %s", term)
+                return term
+        return None
+
+    @staticmethod
+    def _grounding_sources(grounding: Any) -> List[Dict[str, Any]]:
+        """Extract title/uri pairs from grounding metadata."""
+        if not grounding:
+            return []
+        return [
+            {
+                "title": c.retrieved_context.title,
+                "uri": c.retrieved_context.uri,
+            }
+            for c in grounding.grounding_chunks or []
+        ]
+
+    @staticmethod
+    def _grounding_chunks(grounding: Any) -> List[Dict[str, Any]]:
+        """Extract retrieved passages (text, title, uri) in ranked order."""
+        if not grounding:
+            return []
+        return [
+            {
+                "text": getattr(c.retrieved_context, "text", None) or "",
+                "title": c.retrieved_context.title,
+                "uri": c.retrieved_context.uri,
+            }
+            for c in grounding.grounding_chunks or []
+        ]
+
+    def _search_result(
+        self, response: Any, query: str, model: str, store_name: str
+    ) -> Dict[str, Any]:
+        """Apply driftlock checks and extract grounding sources."""
+        answer = response.text
+
+        # Driftlock validation
+        if len(answer) < self.config.min_answer_length:
+            logger.warning("Answer too short: %d chars", len(answer))
+        if len(answer) > self.config.max_answer_length:
+            logger.warning("Answer too long: %d chars, truncating", len(answer))
+            answer = answer[: self.config.max_answer_length]
+
+        # Check banned terms
+        term = self._banned_term(answer)
+        if term is not None:
             return {
-                "status": "success",
-                "answer": answer,
-                "sources": sources[: self.config.max_sources],  # Lite: max 5 sources
-                "model": model,
-                "query": query,
-                "store": store_name,
+                "status": "error",
+                "message": f"Response contains banned term: {term}",
             }
 
-        except Exception as e:
-            logger.error("Search failed: %s", e)
-            return {"status": "error", "message": str(e)}
+        # Extract grounding information
+        sources = self._grounding_sources(response.candidates[0].grounding_metadata)
+
+        logger.info("Search completed with %d sources", len(sources))
+
+        return {
+            "status": "success",
+            "answer": answer,
+            "sources": sources[: self.config.max_sources],  # Lite: max 5 sources
+            "model": model,
+            "query": query,
+            "store": store_name,
+        }
 
     def delete_store(self, store_name: str) -> Dict[str, Any]:
         """
@@ -426,9 +1558,16 @@ class FlamehavenFileSearch:
             return {"status": "error", "message": f"Store '{store_name}' not found"}
 
         if self._use_native_client:
+            slot, client = self._store_client(store_name)
             try:
-                self.client.file_search_stores.delete(name=self.stores[store_name])
-                del self.stores[store_name]
+                self._key_pool.call(
+                    slot,
+                    client.file_search_stores.delete,
+                    name=self.stores[store_name],
+                )
+                self._forget_store(store_name, slot)
+                self._content_hashes.drop_store(store_name)
+                self._drop_local_store(store_name)
                 logger.info("Deleted store: %s", store_name)
                 return {"status": "success", "store": store_name}
             except Exception as e:
@@ -437,10 +1576,25 @@ class FlamehavenFileSearch:
 
         # Local fallback deletion
         del self.stores[store_name]
-        self._local_store_docs.pop(store_name, None)
+        self._content_hashes.drop_store(store_name)
+        self._drop_local_store(store_name)
         logger.info("Deleted local store: %s", store_name)
         return {"status": "success", "store": store_name}
 
+    def _drop_local_store(self, store_name: str) -> None:
+        """Close a local store (or mirror) and remove its segments."""
+        local_store = self._local_stores.pop(store_name, None)
+        if local_store is not None:
+            local_store.close(flush=False)
+            if local_store.directory:
+                if not self._inside_local_store_dir(local_store.directory):
+                    logger.error(
+                        "Refusing to remove %s: outside local_store_dir",
+                        local_store.directory,
+                    )
+                    return
+                shutil.rmtree(local_store.directory, ignore_errors=True)
+
     def get_metrics(self) -> Dict[str, Any]:
         """
         Get current metrics
@@ -452,4 +1606,27 @@ class FlamehavenFileSearch:
             "stores_count": len(self.stores),
             "stores": list(self.stores.keys()),
             "config": self.config.to_dict(),
+            "resilience": self.get_resilience_stats(),
+            "quota": self.get_quota_stats(),
+            "api_keys": self._key_pool.get_stats(),
+            "routing": self.get_routing_stats(),
         }
+
+    def get_resilience_stats(self) -> Dict[str, Any]:
+        """Circuit breaker, hedging and latency statistics for Gemini calls."""
+        return self._resilience.get_stats()
+
+    def close(self) -> None:
+        """Flush pending local segments and stop background workers."""
+        self._upload_poller.shutdown()
+        self._resilience.shutdown()
+        self._extractor.shutdown()
+        with self._fan_out_lock:
+            pool, self._fan_out_pool = self._fan_out_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+        for name, local_store in list(self._local_stores.items()):
+            try:
+                local_store.close()
+            except OSError as e:
+                logger.error("Failed to close local store '%s': %s", name, e)
@@ -0,0 +1,107 @@
+"""
+Content-hash upload deduplication for FLAMEHAVEN FileSearch
+
+Keeps a per-store registry of SHA-256 digests of uploaded files so that
+uploading identical bytes again short-circuits before any network transfer
+or indexing work.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from .cache import FileMetadataCache
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def sha256_file(file_path: str) -> str:
+    """
+    Hash a file in fixed-size chunks
+
+    Args:
+        file_path: File to hash
+
+    Returns:
+        Hex-encoded SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentHashRegistry:
+    """
+    Per-store registry of uploaded content digests
+
+    ``FileMetadataCache`` is used as the hot layer: digests are cached per
+    absolute path together with the file size and mtime, so re-uploading an
+    unchanged path skips rehashing entirely.
+    """
+
+    def __init__(self, metadata_cache: Optional[FileMetadataCache] = None):
+        """
+        Initialize registry
+
+        Args:
+            metadata_cache: Cache of ``path -> {size, mtime_ns, sha256}``
+        """
+        self.metadata_cache = metadata_cache or FileMetadataCache()
+        self._stores: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def hash_file(self, file_path: str) -> str:
+        """
+        Return the SHA-256 of a file, reusing the cached digest if unchanged
+
+        Args:
+            file_path: File to hash
+
+        Returns:
+            Hex-encoded digest
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        cached = self.metadata_cache.get(path)
+        if (
+            cached
+            and cached.get("size") == stat.st_size
+            and cached.get("mtime_ns") == stat.st_mtime_ns
+            and cached.get("sha256")
+        ):
+            return cached["sha256"]
+
+        digest = sha256_file(path)
+        metadata = dict(cached or {})
+        metadata.update(
+            {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+        )
+        self.metadata_cache.set(path, metadata)
+        return digest
+
+    def lookup(self, store_name: str, digest: str) -> Optional[Dict[str, Any]]:
+        """Return the registry entry for ``digest`` in a store, if any"""
+        with self._lock:
+            return self._stores.get(store_name, {}).get(digest)
+
+    def register(self, store_name: str, digest: str, file_name: str) -> None:
+        """Record that ``digest`` is present in a store"""
+        with self._lock:
+            self._stores.setdefault(store_name, {})[digest] = {"file": file_name}
+
+    def drop_store(self, store_name: str) -> None:
+        """Forget every digest of a store"""
+        with self._lock:
+            self._stores.pop(store_name, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get registry statistics"""
+        with self._lock:
+            counts = {name: len(hashes) for name, hashes in self._stores.items()}
+        return {"stores": counts, "metadata_cache": self.metadata_cache.get_stats()}
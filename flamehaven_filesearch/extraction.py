@@ -0,0 +1,309 @@
+"""
+Text extraction for FLAMEHAVEN FileSearch local ingestion
+
+Parses PDF, DOCX, Markdown and plain text files into text for the local
+index. Binary formats are parsed in a ``ProcessPoolExecutor`` so that
+CPU-bound parsing does not hold the GIL of the serving process and batches
+use every core; results are yielded as they complete so indexing overlaps
+with parsing.
+"""
+
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    CancelledError,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pragma: no cover - optional dependency
+    PdfReader = None
+
+from .exceptions import FileProcessingError
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = (".txt", ".md")
+BINARY_EXTENSIONS = (".pdf", ".docx")
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def extract_text(file_path: str) -> str:
+    """
+    Extract plain text from a supported file
+
+    Unknown extensions are read as UTF-8 text, ignoring undecodable bytes.
+
+    Args:
+        file_path: File to parse
+
+    Returns:
+        Extracted text
+
+    Raises:
+        FileProcessingError: If the file cannot be parsed
+    """
+    ext = Path(file_path).suffix.lower()
+    try:
+        if ext == ".pdf":
+            return _extract_pdf(file_path)
+        if ext == ".docx":
+            return _extract_docx(file_path)
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as source:
+            return source.read()
+    except FileProcessingError:
+        raise
+    except Exception as e:
+        raise FileProcessingError(
+            f"Failed to extract text: {e}", filename=Path(file_path).name
+        ) from e
+
+
+def _extract_pdf(file_path: str) -> str:
+    if PdfReader is None:
+        raise FileProcessingError(
+            "PDF extraction requires pypdf (pip install flamehaven-filesearch[pdf])",
+            filename=Path(file_path).name,
+        )
+    reader = PdfReader(file_path)
+    pages = [page.extract_text() or "" for page in reader.pages]
+    return _BLANK_LINES.sub("\n\n", "\n\n".join(pages)).strip()
+
+
+def _extract_docx(file_path: str) -> str:
+    with zipfile.ZipFile(file_path) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+
+    paragraphs = []
+    for paragraph in root.iter(f"{_WORD_NS}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_WORD_NS}t" and node.text:
+                parts.append(node.text)
+            elif node.tag == f"{_WORD_NS}tab":
+                parts.append("\t")
+            elif node.tag in (f"{_WORD_NS}br", f"{_WORD_NS}cr"):
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs).strip()
+
+
+class TextExtractor:
+    """
+    Extraction stage backed by a lazily started process pool
+
+    Plain text formats are read inline (parsing them is I/O, not CPU);
+    PDF and DOCX files go to worker processes with a per-file timeout. A
+    timed-out file is reported as failed and the pool is replaced, its
+    processes terminated, so the stuck worker cannot delay later files or
+    linger. Other files caught in a replaced (or crashed) pool are retried
+    once on the new pool.
+    """
+
+    def __init__(self, workers: int = 0, timeout_sec: float = 120.0):
+        """
+        Initialize extractor
+
+        Args:
+            workers: Worker processes (0 = one per CPU)
+            timeout_sec: Per-file extraction timeout in seconds
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout_sec = timeout_sec
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Uploads on several threads share the pool
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process running merge/server threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def extract(self, file_path: str) -> str:
+        """
+        Extract one file
+
+        Args:
+            file_path: File to parse
+
+        Returns:
+            Extracted text
+
+        Raises:
+            FileProcessingError: On parse failure or timeout
+        """
+        for _index, text, error in self.extract_many([file_path]):
+            if error is not None:
+                raise FileProcessingError(error, filename=Path(file_path).name)
+            return text
+        return ""  # pragma: no cover - extract_many always yields
+
+    def extract_many(
+        self, file_paths: Sequence[str]
+    ) -> Iterator[Tuple[int, Optional[str], Optional[str]]]:
+        """
+        Extract files, yielding results as they complete
+
+        At most ``workers`` binary files are in flight at once, so the
+        per-file timeout measures parsing time rather than queueing time.
+
+        Args:
+            file_paths: Files to parse
+
+        Yields:
+            ``(index, text, error)`` with exactly one of text/error set
+        """
+        queued: List[int] = []
+        for index, file_path in enumerate(file_paths):
+            if Path(file_path).suffix.lower() in BINARY_EXTENSIONS:
+                queued.append(index)
+                continue
+            yield self._extract_inline(index, file_path)
+
+        queued.reverse()
+        retried = set()
+        in_flight: Dict[Future, Tuple[int, float, ProcessPoolExecutor]] = {}
+        while queued or in_flight:
+            while queued and len(in_flight) < self.workers:
+                index = queued.pop()
+                submitted = self._submit(file_paths[index])
+                if submitted is None:
+                    yield self._extract_inline(index, file_paths[index])
+                    continue
+                future, executor = submitted
+                in_flight[future] = (
+                    index,
+                    time.monotonic() + self.timeout_sec,
+                    executor,
+                )
+            if not in_flight:
+                continue
+
+            next_deadline = min(deadline for _, deadline, _ in in_flight.values())
+            done, _ = wait(
+                list(in_flight),
+                timeout=max(0.0, next_deadline - time.monotonic()),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                index, _deadline, executor = in_flight.pop(future)
+                if self._lost_with_pool(future) and index not in retried:
+                    # Killed along with a replaced or crashed pool: retry once
+                    retried.add(index)
+                    self._reset_pool(executor)
+                    queued.append(index)
+                    continue
+                yield self._collect(index, file_paths[index], future, executor)
+
+            now = time.monotonic()
+            for future, (index, deadline, executor) in list(in_flight.items()):
+                if deadline <= now and not future.done():
+                    in_flight.pop(future)
+                    future.cancel()
+                    # Kill the busy worker; later files get a fresh pool
+                    self._reset_pool(executor, terminate=True)
+                    logger.warning(
+                        "Extraction timed out after %.0fs: %s",
+                        self.timeout_sec,
+                        file_paths[index],
+                    )
+                    yield index, None, (
+                        f"Extraction timed out after {self.timeout_sec:.0f}s"
+                    )
+
+    def _submit(self, file_path: str) -> Optional[Tuple[Future, ProcessPoolExecutor]]:
+        executor = None
+        try:
+            executor = self._pool()
+            return executor.submit(extract_text, file_path), executor
+        except (BrokenProcessPool, RuntimeError, OSError) as e:
+            # Pool unavailable (e.g. worker crashed): fall back to inline
+            logger.warning("Extraction pool unavailable (%s); parsing inline", e)
+            self._reset_pool(executor)
+            return None
+
+    @staticmethod
+    def _lost_with_pool(future: Future) -> bool:
+        """True if ``future`` failed because its pool went away."""
+        if future.cancelled():
+            return True
+        return isinstance(future.exception(), BrokenProcessPool)
+
+    def _collect(
+        self,
+        index: int,
+        file_path: str,
+        future: Future,
+        executor: Optional[ProcessPoolExecutor] = None,
+    ) -> Tuple[int, Optional[str], Optional[str]]:
+        try:
+            return index, future.result(), None
+        except FileProcessingError as e:
+            return index, None, e.message
+        except (BrokenProcessPool, CancelledError) as e:
+            self._reset_pool(executor)
+            logger.error("Extraction worker crashed on %s: %s", file_path, e)
+            return index, None, f"Extraction worker crashed: {e}"
+
+    @staticmethod
+    def _extract_inline(
+        index: int, file_path: str
+    ) -> Tuple[int, Optional[str], Optional[str]]:
+        try:
+            return index, extract_text(file_path), None
+        except FileProcessingError as e:
+            return index, None, e.message
+
+    def _reset_pool(
+        self, executor: Optional[ProcessPoolExecutor] = None, terminate: bool = False
+    ) -> None:
+        """
+        Retire the current pool so the next submission starts a new one
+
+        Args:
+            executor: Pool the caller saw fail; if it has already been
+                replaced, the current pool is left alone (None = current)
+            terminate: Kill the retired pool's worker processes (a worker
+                stuck on a file would otherwise never exit)
+        """
+        with self._lock:
+            if executor is None:
+                executor = self._executor
+            if executor is None:
+                return
+            if executor is self._executor:
+                self._executor = None
+        if terminate:
+            # ProcessPoolExecutor has no public way to stop busy workers
+            # before Python 3.14 (terminate_workers)
+            for process in list(getattr(executor, "_processes", {}).values()):
+                if process.is_alive():
+                    process.terminate()
+        executor.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
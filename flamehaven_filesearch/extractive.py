@@ -0,0 +1,172 @@
+"""
+Extractive answer synthesis for local search
+
+Local search used to answer by joining raw snippets of the top passages,
+which read as fragments cut at arbitrary offsets. ``ExtractiveAnswerBuilder``
+splits the top-ranked passages into sentences, scores every sentence
+against the query in one vectorized pass and assembles the best
+non-redundant sentences into a bounded answer with ``[n]`` citations.
+NumPy is used when installed; a pure-Python path gives the same result.
+"""
+
+import math
+import re
+import textwrap
+from typing import Dict, List, Sequence, Tuple
+
+from .local_index import tokenize
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+# Function words carry no evidence of relevance
+STOPWORDS = frozenset(
+    "a an and are as at be by do does for from how i in is it of on or our "
+    "that the this to was we what when where which who why with you your".split()
+)
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split passage text into sentences
+
+    Args:
+        text: Passage text
+
+    Returns:
+        Non-empty sentences with whitespace collapsed
+    """
+    sentences = []
+    for part in _SENTENCE_END.split(text):
+        sentence = " ".join(part.split())
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+class ExtractiveAnswerBuilder:
+    """
+    Score candidate sentences and assemble a cited extractive answer
+
+    A sentence scores the IDF-weighted share of query terms it contains
+    (IDF over the candidate sentences, so terms found everywhere count
+    little), discounted by the rank of the passage it came from.
+    """
+
+    def __init__(
+        self,
+        max_sentences: int = 4,
+        max_chars: int = 800,
+        rank_decay: float = 0.2,
+        redundancy: float = 0.7,
+    ):
+        """
+        Initialize builder
+
+        Args:
+            max_sentences: Most sentences in an answer
+            max_chars: Answer length bound (citations included)
+            rank_decay: Score discount per passage rank
+            redundancy: Token overlap (Jaccard) above which a sentence is
+                treated as a repeat of one already chosen
+        """
+        if max_sentences <= 0 or max_chars <= 0:
+            raise ValueError("max_sentences and max_chars must be positive")
+        self.max_sentences = max_sentences
+        self.max_chars = max_chars
+        self.rank_decay = rank_decay
+        self.redundancy = redundancy
+
+    def build(self, query: str, passages: Sequence[str]) -> Tuple[str, List[int]]:
+        """
+        Build an answer from ranked passages
+
+        Args:
+            query: Search query
+            passages: Passage texts, best first; citation ``[n]`` refers to
+                ``passages[n - 1]``
+
+        Returns:
+            ``(answer, cited passage indexes)``; the answer is empty when no
+            sentence shares a term with the query
+        """
+        terms = list(dict.fromkeys(t for t in tokenize(query) if t not in STOPWORDS))
+        if not terms:
+            terms = list(dict.fromkeys(tokenize(query)))
+
+        sentences: List[str] = []
+        origins: List[int] = []
+        token_sets: List[set] = []
+        for index, passage in enumerate(passages):
+            for sentence in split_sentences(passage):
+                sentences.append(sentence)
+                origins.append(index)
+                token_sets.append(set(tokenize(sentence)))
+        if not sentences or not terms:
+            return "", []
+
+        scores = self._score(terms, token_sets, origins)
+        chosen: List[int] = []
+        parts: List[str] = []
+        for i in sorted(range(len(sentences)), key=lambda i: (-scores[i], i)):
+            if scores[i] <= 0 or len(parts) >= self.max_sentences:
+                break
+            if any(self._overlap(token_sets[i], token_sets[j]) for j in chosen):
+                continue
+            citation = f" [{origins[i] + 1}]"
+            used = sum(len(part) + 1 for part in parts)
+            sentence = sentences[i]
+            if used + len(sentence) + len(citation) > self.max_chars:
+                if parts:
+                    continue
+                # A single overlong best sentence is shortened, not dropped
+                sentence = textwrap.shorten(
+                    sentence,
+                    width=max(self.max_chars - len(citation), 20),
+                    placeholder="...",
+                )
+            chosen.append(i)
+            parts.append(sentence + citation)
+
+        return " ".join(parts), sorted({origins[i] for i in chosen})
+
+    def _overlap(self, a: set, b: set) -> bool:
+        union = len(a | b)
+        return bool(union) and len(a & b) / union > self.redundancy
+
+    def _score(
+        self, terms: List[str], token_sets: List[set], origins: List[int]
+    ) -> List[float]:
+        """Score every sentence against the query terms."""
+        n = len(token_sets)
+        if np is not None:
+            # Sentence x term incidence, then one matrix-vector product
+            hits = np.array(
+                [[term in tokens for term in terms] for tokens in token_sets],
+                dtype=np.float32,
+            )
+            df = hits.sum(axis=0)
+            weights = np.where(df > 0, np.log1p(n / np.maximum(df, 1.0)), 0.0)
+            total = float(weights.sum())
+            if total <= 0:
+                return [0.0] * n
+            decay = 1.0 / (1.0 + self.rank_decay * np.asarray(origins, np.float32))
+            return ((hits @ weights) / total * decay).tolist()
+
+        df: Dict[str, int] = {
+            term: sum(1 for tokens in token_sets if term in tokens) for term in terms
+        }
+        weights = {t: math.log1p(n / df[t]) if df[t] else 0.0 for t in terms}
+        total = sum(weights.values())
+        if total <= 0:
+            return [0.0] * n
+        return [
+            sum(weights[t] for t in terms if t in tokens)
+            / total
+            / (1.0 + self.rank_decay * origin)
+            for tokens, origin in zip(token_sets, origins)
+        ]
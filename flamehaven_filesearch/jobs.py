@@ -0,0 +1,392 @@
+"""
+Persistent background upload jobs for FLAMEHAVEN FileSearch API
+
+``/api/upload/single`` holds the HTTP request open until the file has been
+ingested, which for remote stores means polling the Gemini upload operation
+for up to ``upload_timeout_sec``. Upload jobs decouple the two: the file is
+spooled to disk, a job row is written to SQLite and the request returns
+``202`` with a job ID. A fixed number of worker threads drain the queue, so
+request latency no longer depends on ingest latency.
+
+Several API workers can share one job database, so every job row is owned
+by the queue that claimed it and carries a heartbeat. A queue only resumes
+jobs that have no owner (released on clean shutdown) or whose owner's
+heartbeat lease has expired (crashed process); claims are atomic
+``UPDATE ... WHERE`` statements, so a job is never run by two workers.
+"""
+
+import json
+import logging
+import os
+import queue
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional
+
+from .metrics import MetricsCollector
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+# Upload result statuses that complete a job successfully
+_OK_RESULTS = ("success", "duplicate")
+
+UploadHandler = Callable[[str, str], Dict[str, Any]]
+
+
+class UploadJobQueue:
+    """
+    SQLite-backed upload job queue with bounded worker concurrency
+
+    Each job owns a spool directory holding the uploaded bytes until a
+    worker has handed them to ``handler(file_path, store_name)``; the
+    handler's result dict is stored with the job.
+    """
+
+    def __init__(
+        self,
+        handler: UploadHandler,
+        db_path: str = "./data/jobs.db",
+        workers: int = 2,
+        spool_dir: Optional[str] = None,
+        lease_sec: float = 60.0,
+    ):
+        """
+        Initialize job queue
+
+        Args:
+            handler: Callable ingesting ``(file_path, store_name)``
+            db_path: SQLite database holding job state
+            workers: Worker threads draining the queue
+            spool_dir: Directory for uploaded bytes (defaults next to the DB)
+            lease_sec: Seconds without a heartbeat after which another
+                queue may take over this queue's jobs
+        """
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+        if lease_sec <= 0:
+            raise ValueError("lease_sec must be positive")
+        self.handler = handler
+        self.db_path = db_path
+        self.workers = workers
+        self.spool_dir = Path(spool_dir or Path(db_path).parent / "upload_spool")
+        self._pending: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self.lease_sec = lease_sec
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stop = threading.Event()
+
+        self._ensure_db()
+        self._recover()
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat, name="upload-job-heartbeat", daemon=True
+        )
+        self._heartbeat_thread.start()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_db(self) -> None:
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS upload_jobs (
+                    id TEXT PRIMARY KEY,
+                    store TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner TEXT,
+                    heartbeat_at REAL
+                )
+            """)
+            columns = {
+                row["name"] for row in conn.execute("PRAGMA table_info(upload_jobs)")
+            }
+            # Databases created before job ownership existed
+            for column, kind in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE upload_jobs ADD COLUMN {column} {kind}")
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_upload_jobs_status
+                ON upload_jobs(status)
+            """)
+
+    def _recover(self) -> None:
+        """
+        Claim and requeue orphaned jobs
+
+        A job is orphaned when it is queued or running and either has no
+        owner or its owner's lease has expired. Each row is claimed with a
+        conditional update, so concurrent queues never take the same job.
+        """
+        now = time.time()
+        expired = now - self.lease_sec
+        orphaned = (
+            "status IN (?, ?) AND (owner IS NULL OR heartbeat_at IS NULL "
+            "OR heartbeat_at < ?)"
+        )
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, file_path FROM upload_jobs WHERE {orphaned} "
+                "ORDER BY created_at",
+                (JOB_QUEUED, JOB_RUNNING, expired),
+            ).fetchall()
+
+        recovered = 0
+        for row in rows:
+            with self._connect() as conn:
+                claimed = conn.execute(
+                    "UPDATE upload_jobs SET status = ?, owner = ?, heartbeat_at = ? "
+                    f"WHERE id = ? AND {orphaned}",
+                    (
+                        JOB_QUEUED,
+                        self.owner,
+                        now,
+                        row["id"],
+                        JOB_QUEUED,
+                        JOB_RUNNING,
+                        expired,
+                    ),
+                ).rowcount
+            if not claimed:
+                continue
+            recovered += 1
+            if not Path(row["file_path"]).exists():
+                self._finish(row["id"], JOB_FAILED, None, "Spooled file missing")
+                continue
+            self._enqueue(row["id"])
+
+        if recovered:
+            logger.info("Recovered %d upload job(s)", recovered)
+
+    def _heartbeat(self) -> None:
+        """Renew this queue's leases and adopt jobs of dead queues"""
+        while not self._stop.wait(self.lease_sec / 4):
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "UPDATE upload_jobs SET heartbeat_at = ? "
+                        "WHERE owner = ? AND status IN (?, ?)",
+                        (time.time(), self.owner, JOB_QUEUED, JOB_RUNNING),
+                    )
+                self._recover()
+            except sqlite3.Error as e:
+                logger.warning("Upload job heartbeat failed: %s", e)
+
+    def submit(self, source: BinaryIO, filename: str, store: str) -> Dict[str, Any]:
+        """
+        Spool an upload and queue it for ingestion
+
+        Args:
+            source: Readable binary stream with the file contents
+            filename: Validated file name
+            store: Target store name
+
+        Returns:
+            The new job record
+        """
+        if self._closed:
+            raise RuntimeError("Upload job queue is shut down")
+
+        job_id = uuid.uuid4().hex
+        job_dir = self.spool_dir / job_id
+        job_dir.mkdir(parents=True)
+        file_path = job_dir / filename
+        with open(file_path, "wb") as target:
+            shutil.copyfileobj(source, target)
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO upload_jobs "
+                "(id, store, filename, file_path, status, created_at, owner, "
+                "heartbeat_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    store,
+                    filename,
+                    str(file_path),
+                    JOB_QUEUED,
+                    time.time(),
+                    self.owner,
+                    time.time(),
+                ),
+            )
+        self._enqueue(job_id)
+        logger.info("Queued upload job %s: %s -> %s", job_id, filename, store)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a job
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Job record, or None if unknown
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM upload_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "store": row["store"],
+            "filename": row["filename"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+
+    def _enqueue(self, job_id: str) -> None:
+        with self._lock:
+            if not self._threads:
+                for index in range(self.workers):
+                    thread = threading.Thread(
+                        target=self._worker,
+                        name=f"upload-job-{index}",
+                        daemon=True,
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+        self._pending.put(job_id)
+        MetricsCollector.update_upload_job_queue(self._pending.qsize())
+
+    def _worker(self) -> None:
+        while True:
+            job_id = self._pending.get()
+            MetricsCollector.update_upload_job_queue(self._pending.qsize())
+            if job_id is None:
+                return
+            try:
+                self._run(job_id)
+            except Exception as e:  # pragma: no cover - defensive guard
+                logger.error("Upload job %s crashed: %s", job_id, e)
+
+    def _run(self, job_id: str) -> None:
+        started = time.time()
+        with self._connect() as conn:
+            claimed = conn.execute(
+                "UPDATE upload_jobs SET status = ?, started_at = ?, heartbeat_at = ?, "
+                "attempts = attempts + 1 WHERE id = ? AND status = ? AND owner = ?",
+                (JOB_RUNNING, started, started, job_id, JOB_QUEUED, self.owner),
+            ).rowcount
+            if not claimed:
+                return
+            row = conn.execute(
+                "SELECT store, file_path FROM upload_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+
+        try:
+            result = self.handler(row["file_path"], row["store"])
+        except Exception as e:
+            logger.error("Upload job %s failed: %s", job_id, e)
+            status, result, error = JOB_FAILED, None, str(e)
+        else:
+            if result.get("status") in _OK_RESULTS:
+                status, error = JOB_SUCCEEDED, None
+            else:
+                status, error = JOB_FAILED, result.get("message")
+        self._finish(job_id, status, result, error)
+        MetricsCollector.record_upload_job(status, time.time() - started)
+
+    def _finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[Dict[str, Any]],
+        error: Optional[str],
+    ) -> None:
+        with self._connect() as conn:
+            finished = conn.execute(
+                "UPDATE upload_jobs SET status = ?, result = ?, error = ?, "
+                "finished_at = ? WHERE id = ? AND owner = ?",
+                (
+                    status,
+                    json.dumps(result, default=str) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id,
+                    self.owner,
+                ),
+            ).rowcount
+        if not finished:
+            # Lease lost: another queue has taken the job over
+            logger.warning("Upload job %s was taken over; result dropped", job_id)
+            return
+        shutil.rmtree(self.spool_dir / job_id, ignore_errors=True)
+        logger.info("Upload job %s %s", job_id, status)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get job counts by status"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS n FROM upload_jobs GROUP BY status"
+            ).fetchall()
+        return {
+            "workers": self.workers,
+            "pending": self._pending.qsize(),
+            "jobs": {row["status"]: row["n"] for row in rows},
+        }
+
+    def shutdown(self) -> None:
+        """
+        Stop the workers after their current job
+
+        Jobs still queued stay in the database and are released, so the
+        next queue to start (or another worker's heartbeat) resumes them.
+        """
+        self._closed = True
+        self._stop.set()
+        self._heartbeat_thread.join()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        # Drop queued IDs so workers exit promptly; the rows stay 'queued'
+        while True:
+            try:
+                self._pending.get_nowait()
+            except queue.Empty:
+                break
+        for _ in threads:
+            self._pending.put(None)
+        for thread in threads:
+            thread.join()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE upload_jobs SET owner = NULL WHERE owner = ? AND status = ?",
+                (self.owner, JOB_QUEUED),
+            )
+        MetricsCollector.update_upload_job_queue(0)
@@ -0,0 +1,245 @@
+"""
+Pool of Gemini API keys
+
+One API key caps throughput at one project's quota. ``ApiKeyPool`` holds
+several keys, spreads work across them and benches a key for a cool-down
+period when Gemini answers it with a rate-limit error.
+
+File Search stores belong to the project that created them, so work is
+balanced per store: each new store is assigned to the least-loaded key
+(weighted by the key's share) and all later calls for that store use the
+same key. Aggregate throughput therefore scales with the number of keys
+as long as traffic is spread over several stores.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class KeyCooldownError(RuntimeError):
+    """Raised when a call needs a key that is cooling down"""
+
+
+def parse_key_entry(entry: str) -> Tuple[str, float]:
+    """
+    Split a ``key`` or ``key:weight`` pool entry
+
+    Returns:
+        ``(key, weight)``; weight defaults to 1
+    """
+    key, sep, weight = entry.strip().rpartition(":")
+    if not sep:
+        return entry.strip(), 1.0
+    try:
+        value = float(weight)
+    except ValueError:
+        raise ValueError(f"Invalid API key weight: {weight!r}") from None
+    if value <= 0:
+        raise ValueError("API key weight must be positive")
+    return key, value
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Return True if ``error`` is a Gemini quota / rate-limit response"""
+    for attr in ("code", "status_code"):
+        if getattr(error, attr, None) == 429:
+            return True
+    text = str(error)
+    return "429" in text or "RESOURCE_EXHAUSTED" in text
+
+
+class _KeySlot:
+    __slots__ = (
+        "key",
+        "weight",
+        "inflight",
+        "calls",
+        "rate_limits",
+        "stores",
+        "cooldown_until",
+    )
+
+    def __init__(self, key: Optional[str], weight: float):
+        self.key = key
+        self.weight = weight
+        self.inflight = 0
+        self.calls = 0
+        self.rate_limits = 0
+        self.stores = 0
+        self.cooldown_until = 0.0
+
+
+class ApiKeyPool:
+    """
+    Weighted least-loaded routing over API keys with rate-limit cool-down
+
+    Slots are addressed by index; slot 0 is the primary key.
+    """
+
+    def __init__(
+        self,
+        entries: List[Optional[str]],
+        cooldown_sec: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize pool
+
+        Args:
+            entries: API keys, optionally ``key:weight``; ``None`` makes a
+                keyless slot (offline mode)
+            cooldown_sec: Seconds a rate-limited key is left out
+            clock: Monotonic time source (injectable for tests)
+        """
+        if not entries:
+            entries = [None]
+        self._slots = []
+        for entry in entries:
+            key, weight = parse_key_entry(entry) if entry else (None, 1.0)
+            self._slots.append(_KeySlot(key, weight))
+        self.cooldown_sec = cooldown_sec
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @property
+    def keys(self) -> List[Optional[str]]:
+        """API keys by slot"""
+        return [slot.key for slot in self._slots]
+
+    @property
+    def weights(self) -> List[float]:
+        """Key weights by slot"""
+        return [slot.weight for slot in self._slots]
+
+    def _cooling(self, slot: _KeySlot) -> bool:
+        return slot.cooldown_until > self._clock()
+
+    def assign(self) -> int:
+        """
+        Pick the slot for a new store
+
+        Chooses the available key with the fewest stores and in-flight
+        calls relative to its weight; if every key is cooling down, the one
+        that recovers first.
+
+        Returns:
+            Slot index
+        """
+        with self._lock:
+            available = [
+                i for i, slot in enumerate(self._slots) if not self._cooling(slot)
+            ]
+            if available:
+                index = min(
+                    available,
+                    key=lambda i: (
+                        (self._slots[i].stores + self._slots[i].inflight)
+                        / self._slots[i].weight,
+                        self._slots[i].calls,
+                    ),
+                )
+            else:
+                index = min(
+                    range(len(self._slots)),
+                    key=lambda i: self._slots[i].cooldown_until,
+                )
+            self._slots[index].stores += 1
+            return index
+
+    def claim(self, index: int) -> None:
+        """Count an existing store (e.g. rehydrated at startup) on a slot"""
+        with self._lock:
+            self._slots[index].stores += 1
+
+    def unassign(self, index: int) -> None:
+        """Release a store's claim on a slot"""
+        with self._lock:
+            slot = self._slots[index]
+            slot.stores = max(slot.stores - 1, 0)
+
+    def check(self, index: int) -> None:
+        """
+        Fail fast if a slot is cooling down
+
+        Raises:
+            KeyCooldownError: The key was recently rate limited
+        """
+        with self._lock:
+            slot = self._slots[index]
+            remaining = slot.cooldown_until - self._clock()
+        if remaining > 0:
+            raise KeyCooldownError(
+                f"API key {self._mask(slot.key)} is cooling down after a rate "
+                f"limit ({remaining:.0f}s left)"
+            )
+
+    @contextmanager
+    def lease(self, index: int) -> Iterator[None]:
+        """
+        Track one call on a slot and cool the key down on rate limits
+
+        Raises:
+            KeyCooldownError: The key was recently rate limited
+        """
+        self.check(index)
+        slot = self._slots[index]
+        with self._lock:
+            slot.inflight += 1
+            slot.calls += 1
+        try:
+            yield
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.cool_down(index)
+            raise
+        finally:
+            with self._lock:
+                slot.inflight -= 1
+
+    def call(self, index: int, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``func`` under ``lease(index)``"""
+        with self.lease(index):
+            return func(*args, **kwargs)
+
+    def cool_down(self, index: int) -> None:
+        """Bench a slot for ``cooldown_sec`` seconds"""
+        with self._lock:
+            slot = self._slots[index]
+            slot.rate_limits += 1
+            slot.cooldown_until = self._clock() + self.cooldown_sec
+        logger.warning(
+            "API key %s rate limited; cooling down for %.0fs",
+            self._mask(slot.key),
+            self.cooldown_sec,
+        )
+
+    @staticmethod
+    def _mask(key: Optional[str]) -> str:
+        return f"...{key[-4:]}" if key else "<none>"
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Per-key statistics (keys masked)"""
+        now = self._clock()
+        with self._lock:
+            return [
+                {
+                    "key": self._mask(slot.key),
+                    "weight": slot.weight,
+                    "stores": slot.stores,
+                    "inflight": slot.inflight,
+                    "calls": slot.calls,
+                    "rate_limits": slot.rate_limits,
+                    "cooldown_remaining_sec": round(
+                        max(slot.cooldown_until - now, 0.0), 1
+                    ),
+                }
+                for slot in self._slots
+            ]
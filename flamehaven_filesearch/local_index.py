@@ -0,0 +1,853 @@
+"""
+Local retrieval index for FLAMEHAVEN FileSearch
+
+Tokenized inverted index used by the local fallback store when the
+google-genai SDK is unavailable.
+"""
+
+import heapq
+import logging
+import math
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .content_blob import ContentBlob
+from .segments import (
+    BLOB_NAME,
+    Segment,
+    load_manifest,
+    lock_store,
+    new_manifest,
+    read_segment,
+    remove_orphan_segments,
+    remove_segment_files,
+    save_manifest,
+    segment_name,
+    unlock_store,
+    write_segment,
+)
+from .vector_index import DenseIndex, HashingEncoder, IVFIndex
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens
+
+    Args:
+        text: Raw text
+
+    Returns:
+        List of tokens in document order
+    """
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    Term -> postings index over locally stored documents
+
+    Postings map each term to ``{doc_id: term_frequency}`` so a query only
+    touches documents that actually contain its terms. Documents are ranked
+    with Okapi BM25 using the per-index term statistics.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize an empty index
+
+        Args:
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: int, text: str) -> None:
+        """
+        Index a document
+
+        Args:
+            doc_id: Document identifier (unique within the index)
+            text: Document text
+        """
+        self.add_tokens(doc_id, tokenize(text))
+
+    def add_tokens(self, doc_id: int, tokens: List[str]) -> None:
+        """
+        Index an already tokenized document
+
+        Args:
+            doc_id: Document identifier (unique within the index)
+            tokens: Document tokens
+        """
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+
+        for term, tf in frequencies.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self.doc_lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def merge(
+        self, postings: Dict[str, Dict[int, int]], doc_lengths: Dict[int, int]
+    ) -> None:
+        """
+        Merge prebuilt postings (e.g. loaded from a segment) into the index
+
+        Args:
+            postings: ``{term: {doc_id: tf}}`` for documents not yet indexed
+            doc_lengths: Token count per document
+        """
+        for term, term_postings in postings.items():
+            self.postings.setdefault(term, {}).update(term_postings)
+        self.doc_lengths.update(doc_lengths)
+        self.total_length += sum(doc_lengths.values())
+
+    def idf(self, term: str) -> float:
+        """BM25 inverse document frequency (always non-negative)"""
+        df = len(self.postings.get(term, ()))
+        n_docs = len(self.doc_lengths)
+        return math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+    def score(
+        self,
+        terms: Iterable[str],
+        idf: Optional[Callable[[str], float]] = None,
+        avg_length: Optional[float] = None,
+    ) -> Dict[int, float]:
+        """
+        Accumulate BM25 scores term-at-a-time over the query postings
+
+        Each term contributes independently, so multi-word queries do not
+        require the exact phrase to appear.
+
+        Args:
+            terms: Query terms (already tokenized)
+            idf: IDF override (e.g. statistics across several segments)
+            avg_length: Average document length override
+
+        Returns:
+            Mapping of doc_id to score for every document matching a term
+        """
+        scores: Dict[int, float] = {}
+        if not self.doc_lengths:
+            return scores
+
+        if avg_length is None:
+            avg_length = self.total_length / len(self.doc_lengths)
+        avg_length = avg_length or 1.0
+        idf = idf or self.idf
+        k1, b = self.k1, self.b
+
+        for term in set(terms):
+            term_postings = self.postings.get(term)
+            if not term_postings:
+                continue
+            term_idf = idf(term)
+            for doc_id, tf in term_postings.items():
+                norm = k1 * (1.0 - b + b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + term_idf * (
+                    tf * (k1 + 1.0) / (tf + norm)
+                )
+        return scores
+
+    def search(self, terms: Iterable[str], k: int) -> List[Tuple[int, float]]:
+        """
+        Rank documents against query terms with BM25
+
+        A bounded heap selects the top ``k`` without sorting every match.
+
+        Args:
+            terms: Query terms (already tokenized)
+            k: Number of results to return
+
+        Returns:
+            List of ``(doc_id, score)`` sorted by descending score
+        """
+        if k <= 0:
+            return []
+        return top_k(self.score(terms).items(), k)
+
+
+def top_k(scored: Iterable[Tuple[int, float]], k: int) -> List[Tuple[int, float]]:
+    """Select the ``k`` best ``(id, score)`` pairs; ties resolve to lower ids"""
+    return heapq.nlargest(k, scored, key=lambda item: (item[1], -item[0]))
+
+
+def merge_indexes(parts: Sequence[InvertedIndex]) -> InvertedIndex:
+    """Combine indexes over disjoint ids into one new index"""
+    merged = InvertedIndex(parts[0].k1, parts[0].b) if parts else InvertedIndex()
+    for part in parts:
+        merged.merge(part.postings, part.doc_lengths)
+    return merged
+
+
+def tiered_merge_window(
+    sizes: Sequence[int], merge_factor: int
+) -> Optional[Tuple[int, int]]:
+    """
+    Pick adjacent segments to merge with a tiered policy
+
+    Segments are bucketed into tiers by ``log(size, merge_factor)``; the
+    oldest run of ``merge_factor`` adjacent segments in the same tier is
+    merged, which keeps the segment count logarithmic in the store size.
+
+    Args:
+        sizes: Passage count per segment, oldest first
+        merge_factor: Segments per tier before they are merged
+
+    Returns:
+        ``(start, end)`` slice of segments to merge, or None
+    """
+    if merge_factor < 2 or len(sizes) < merge_factor:
+        return None
+    tiers = [int(math.log(max(size, 1), merge_factor)) for size in sizes]
+    run_start = 0
+    for position in range(1, len(tiers) + 1):
+        if position == len(tiers) or tiers[position] != tiers[run_start]:
+            if position - run_start >= merge_factor:
+                return run_start, run_start + merge_factor
+            run_start = position
+    return None
+
+
+class SegmentedIndex:
+    """
+    BM25 over a mutable memtable plus immutable sealed segments
+
+    New passages go to a small in-memory ``InvertedIndex`` (the memtable);
+    ``seal()`` freezes it into a segment. Queries fan out across every part
+    with store-wide IDF and length statistics, so scores do not depend on
+    how passages are split between segments. Sealed segments are replaced
+    copy-on-write, so searches read a consistent snapshot while a merge or
+    flush runs; only memtable access is serialized.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize an empty index
+
+        Args:
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.memtable = InvertedIndex(k1, b)
+        self.segments: List[InvertedIndex] = []
+        self.total_length = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add_tokens(self, doc_id: int, tokens: List[str]) -> None:
+        """Index a tokenized passage in the memtable"""
+        with self._lock:
+            self.memtable.add_tokens(doc_id, tokens)
+            self.total_length += len(tokens)
+            self._count += 1
+
+    def seal(self) -> InvertedIndex:
+        """Freeze the memtable into a new segment and return it"""
+        with self._lock:
+            sealed = self.memtable
+            self.memtable = InvertedIndex(self.k1, self.b)
+            self.segments = self.segments + [sealed]
+        return sealed
+
+    def add_segment(self, segment: InvertedIndex) -> None:
+        """Append a prebuilt (e.g. loaded from disk) segment"""
+        with self._lock:
+            self.segments = self.segments + [segment]
+            self.total_length += segment.total_length
+            self._count += len(segment)
+
+    def replace(self, start: int, end: int, merged: InvertedIndex) -> None:
+        """Swap ``segments[start:end]`` for their merged equivalent"""
+        with self._lock:
+            self.segments = self.segments[:start] + [merged] + self.segments[end:]
+
+    def idf(self, term: str) -> float:
+        """BM25 inverse document frequency across all parts"""
+        df = sum(len(part.postings.get(term, ())) for part in self.segments)
+        df += len(self.memtable.postings.get(term, ()))
+        return math.log(1.0 + (self._count - df + 0.5) / (df + 0.5))
+
+    def score(self, terms: Iterable[str]) -> Dict[int, float]:
+        """
+        Score every part with store-wide statistics
+
+        Args:
+            terms: Query terms (already tokenized)
+
+        Returns:
+            Mapping of passage id to BM25 score
+        """
+        terms = list(terms)
+        scores: Dict[int, float] = {}
+        if not self._count:
+            return scores
+        avg_length = self.total_length / self._count
+        # Parts hold disjoint ids, so their results never overlap
+        for part in self.segments:
+            scores.update(part.score(terms, self.idf, avg_length))
+        with self._lock:
+            scores.update(self.memtable.score(terms, self.idf, avg_length))
+        return scores
+
+    def max_score(self, terms: Iterable[str]) -> float:
+        """
+        Upper bound of any passage score for ``terms``
+
+        A term contributes at most ``idf * (k1 + 1)`` (as tf grows), so the
+        bound carries this index's IDF scale and makes scores from indexes
+        with different statistics comparable once divided by it.
+        """
+        return sum(self.idf(term) * (self.k1 + 1.0) for term in set(terms))
+
+
+def chunk_text(text: str, size: int, overlap: int) -> List[Tuple[int, int]]:
+    """
+    Split text into overlapping passages
+
+    Passage boundaries are moved back to the nearest whitespace so words are
+    not cut in half, unless a single token is longer than half a passage.
+
+    Args:
+        text: Document text
+        size: Maximum passage length in characters
+        overlap: Characters shared between consecutive passages
+
+    Returns:
+        List of ``(start, end)`` offsets into ``text``
+    """
+    if size <= 0:
+        raise ValueError("passage size must be positive")
+    overlap = max(0, min(overlap, size // 2))
+
+    spans: List[Tuple[int, int]] = []
+    length = len(text)
+    start = 0
+    while start < length:
+        end = min(start + size, length)
+        if end < length:
+            cut = _rfind_space(text, start + size // 2, end)
+            if cut != -1:
+                end = cut
+        spans.append((start, end))
+        if end >= length:
+            break
+
+        next_start = max(end - overlap, start + 1)
+        space = _find_space(text, next_start, end)
+        start = space + 1 if space != -1 else next_start
+    return spans
+
+
+def _rfind_space(text: str, lo: int, hi: int) -> int:
+    return max(text.rfind(" ", lo, hi), text.rfind("\n", lo, hi))
+
+
+def _find_space(text: str, lo: int, hi: int) -> int:
+    hits = [i for i in (text.find(" ", lo, hi), text.find("\n", lo, hi)) if i != -1]
+    return min(hits) if hits else -1
+
+
+def _byte_spans(text: str, spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Convert character spans over ``text`` to UTF-8 byte spans"""
+    if text.isascii():
+        return spans
+    # Spans are ordered by start; encode only the gaps between boundaries
+    boundaries = sorted({offset for span in spans for offset in span})
+    byte_offsets: Dict[int, int] = {}
+    previous_char = previous_byte = 0
+    for offset in boundaries:
+        previous_byte += len(text[previous_char:offset].encode("utf-8"))
+        previous_char = offset
+        byte_offsets[offset] = previous_byte
+    return [(byte_offsets[start], byte_offsets[end]) for start, end in spans]
+
+
+class LocalStore:
+    """
+    Documents, passages and index backing one local fallback store
+
+    Each uploaded document is split into overlapping passages that keep only
+    ``(doc_id, start, end)`` byte offsets into the document text. The inverted
+    index is built over passages, so ranking and snippet extraction are
+    bounded by passage size rather than document size.
+
+    Document text lives in a memory-mapped ``ContentBlob``; the document
+    table only holds title, URI and the ``(offset, length)`` of the text, and
+    passages are decoded straight from the map when a snippet is needed.
+
+    With ``retrieval="dense"`` passages are also embedded into a contiguous
+    float32 matrix (see ``vector_index``) and queries are scored with one
+    matrix-vector product. BM25 statistics are still maintained because the
+    dense query encoder weights terms by IDF. Passing ``ann_nprobe`` adds an
+    IVF approximate index on top of the matrix for very large stores.
+
+    Indexing is LSM-style: new passages land in an in-memory memtable that
+    ``flush()`` (or ``flush_passages``) seals into an immutable segment, and
+    a background thread merges adjacent segments with a tiered policy so
+    their number stays bounded. Queries fan out across all segments and
+    never wait for a merge. With a ``directory`` every sealed segment is
+    written to disk (see ``segments``) and ``LocalStore.open()`` reloads
+    them without re-tokenizing. A directory is locked against other
+    processes until ``close()``.
+    """
+
+    RETRIEVAL_MODES = ("bm25", "dense")
+
+    def __init__(
+        self,
+        passage_size: int = 1000,
+        passage_overlap: int = 200,
+        retrieval: str = "bm25",
+        vector_dim: int = 256,
+        ann_nprobe: int = 0,
+        ann_train_size: int = 50000,
+        directory: Optional[str] = None,
+        name: str = "default",
+        flush_passages: int = 0,
+        merge_factor: int = 8,
+    ):
+        """
+        Initialize an empty store
+
+        Args:
+            passage_size: Maximum passage length in characters
+            passage_overlap: Characters shared between consecutive passages
+            retrieval: Ranking backend, ``bm25`` or ``dense`` (requires NumPy)
+            vector_dim: Embedding dimensionality for dense retrieval
+            ann_nprobe: IVF lists probed per query (0 disables the ANN index)
+            ann_train_size: Passages required before the IVF index is trained
+            directory: Segment directory for persistence (None = memory only);
+                raises ``StoreLockedError`` if another process has it open
+            name: Store name recorded in the manifest
+            flush_passages: Memtable passages that trigger an automatic
+                flush (0 = only on explicit ``flush()``)
+            merge_factor: Segments per tier before a background merge
+                (values below 2 disable merging)
+        """
+        if retrieval not in self.RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {retrieval}")
+        self.passage_size = passage_size
+        self.passage_overlap = passage_overlap
+        self.retrieval = retrieval
+        self.flush_passages = flush_passages
+        self.merge_factor = merge_factor
+        self.documents: List[Dict[str, Any]] = []
+        self.passages: List[Tuple[int, int, int]] = []
+        self.index = SegmentedIndex()
+        self.encoder = HashingEncoder(vector_dim) if retrieval == "dense" else None
+        self.dense = DenseIndex(vector_dim) if retrieval == "dense" else None
+        self.ann = None
+        if self.dense is not None and ann_nprobe > 0:
+            self.ann = IVFIndex(
+                self.dense, nprobe=ann_nprobe, train_size=ann_train_size
+            )
+
+        self.directory = directory
+        self.name = name
+        self._manifest = None
+        self._flushed_docs = 0
+        self._flushed_passages = 0
+        # Passage range covered by each sealed segment, parallel to
+        # ``index.segments`` (and to the manifest when persisted)
+        self._segment_ranges: List[Tuple[int, int, int, int]] = []
+        self._lock = threading.Lock()
+        self._merge_lock = threading.Lock()
+        self._merge_thread: Optional[threading.Thread] = None
+        self._merge_pending = False
+        self._dir_lock: Optional[str] = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._dir_lock = lock_store(directory)
+            try:
+                self._manifest = load_manifest(directory)
+                if self._manifest is None:
+                    self._manifest = new_manifest(name)
+                    save_manifest(directory, self._manifest)
+                self.blob = ContentBlob(
+                    os.path.join(directory, BLOB_NAME),
+                    size=self._manifest.get("blob_size", 0),
+                )
+            except BaseException:
+                unlock_store(self._dir_lock)
+                raise
+        else:
+            self.blob = ContentBlob()
+
+    @classmethod
+    def open(cls, directory: str, **kwargs) -> "LocalStore":
+        """
+        Reopen a persisted store from its segment directory
+
+        Args:
+            directory: Store directory containing ``manifest.json``
+            **kwargs: Constructor arguments (passage sizes, retrieval, ...)
+
+        Returns:
+            Store with every segment loaded
+        """
+        store = cls(directory=directory, **kwargs)
+        store.name = store._manifest.get("store", store.name)
+        try:
+            for entry in store._manifest["segments"]:
+                store._load_segment(read_segment(directory, entry))
+        except BaseException:
+            store.close(flush=False)
+            raise
+        store._flushed_docs = len(store.documents)
+        store._flushed_passages = len(store.passages)
+        removed = remove_orphan_segments(directory, store._manifest)
+        logger.info(
+            "Reopened local store '%s': %d documents, %d segments "
+            "(%d orphaned files removed)",
+            store.name,
+            len(store.documents),
+            len(store._manifest["segments"]),
+            removed,
+        )
+        store._schedule_merge()
+        return store
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add_document(
+        self, title: str, uri: str, content: str, sha256: Optional[str] = None
+    ) -> int:
+        """
+        Store a document and index its passages in the memtable
+
+        Args:
+            title: Display title (usually the file name)
+            uri: Source URI
+            content: Full document text
+            sha256: Digest of the source file, kept for deduplication
+
+        Returns:
+            Document id
+        """
+        encoded = content.encode("utf-8")
+        spans = chunk_text(content, self.passage_size, self.passage_overlap)
+        passage_tokens = [tokenize(content[start:end]) for start, end in spans]
+
+        with self._lock:
+            doc_id = len(self.documents)
+            offset = self.blob.append(encoded)
+            document = {
+                "title": title,
+                "uri": uri,
+                "offset": offset,
+                "length": len(encoded),
+            }
+            if sha256:
+                document["sha256"] = sha256
+            self.documents.append(document)
+            for (byte_start, byte_end), tokens in zip(
+                _byte_spans(content, spans), passage_tokens
+            ):
+                passage_id = len(self.passages)
+                self.passages.append((doc_id, byte_start, byte_end))
+                self.index.add_tokens(passage_id, tokens)
+
+            if self.dense is not None:
+                self._add_vectors(self.encoder.encode(passage_tokens))
+
+        if self.flush_passages and len(self.index.memtable) >= self.flush_passages:
+            self.flush()
+        return doc_id
+
+    def _add_vectors(self, vectors) -> None:
+        start_row = len(self.dense)
+        self.dense.add(vectors)
+        if self.ann is not None:
+            self.ann.add(start_row, vectors)
+
+    def flush(self) -> Optional[str]:
+        """
+        Seal the memtable into an immutable segment
+
+        Persisted stores write the segment to disk; memory-only stores keep
+        it in memory. Either way a background merge is scheduled if the
+        merge policy asks for one.
+
+        Returns:
+            Segment name (None for memory-only stores or an empty memtable)
+        """
+        with self._lock:
+            if self._flushed_passages == len(self.passages):
+                return None
+
+            doc_range = (self._flushed_docs, len(self.documents))
+            passage_range = (self._flushed_passages, len(self.passages))
+            sealed = self.index.seal()
+            name = None
+            if self.directory:
+                sequence = self._manifest["next_segment"]
+                segment = self._build_segment(
+                    segment_name(sequence), doc_range, passage_range, sealed
+                )
+                # Content must be durable before a manifest references it
+                self.blob.sync()
+                entry = write_segment(self.directory, segment)
+                self._manifest["segments"].append(entry)
+                self._manifest["next_segment"] = sequence + 1
+                self._manifest["blob_size"] = len(self.blob)
+                save_manifest(self.directory, self._manifest)
+                name = segment.name
+
+            self._segment_ranges.append(doc_range + passage_range)
+            self._flushed_docs, self._flushed_passages = doc_range[1], passage_range[1]
+
+        self._schedule_merge()
+        return name
+
+    def _build_segment(
+        self,
+        name: str,
+        doc_range: Tuple[int, int],
+        passage_range: Tuple[int, int],
+        index: InvertedIndex,
+    ) -> Segment:
+        segment = Segment(
+            name=name,
+            doc_base=doc_range[0],
+            passage_base=passage_range[0],
+            documents=self.documents[doc_range[0] : doc_range[1]],
+            passages=[
+                (doc_id, start, end, index.doc_lengths[passage_id])
+                for passage_id, (doc_id, start, end) in enumerate(
+                    self.passages[passage_range[0] : passage_range[1]],
+                    start=passage_range[0],
+                )
+            ],
+            postings=index.postings,
+        )
+        if self.dense is not None:
+            segment.vectors = self.dense.vectors[passage_range[0] : passage_range[1]]
+        return segment
+
+    def _schedule_merge(self) -> None:
+        """Start the background merge thread if it is not already running"""
+        if self.merge_factor < 2:
+            return
+        with self._merge_lock:
+            self._merge_pending = True
+            if self._merge_thread is None:
+                self._merge_thread = threading.Thread(
+                    target=self._merge_loop,
+                    name=f"local-merge-{self.name}",
+                    daemon=True,
+                )
+                self._merge_thread.start()
+
+    def _merge_loop(self) -> None:
+        while True:
+            with self._merge_lock:
+                if not self._merge_pending:
+                    self._merge_thread = None
+                    return
+                self._merge_pending = False
+            try:
+                while self._merge_once():
+                    pass
+            except Exception as e:
+                logger.error("Segment merge failed for store '%s': %s", self.name, e)
+                with self._merge_lock:
+                    self._merge_thread = None
+                return
+
+    def _merge_once(self) -> bool:
+        """Merge one window chosen by the tiered policy; False if none"""
+        with self._lock:
+            segments = self.index.segments
+            ranges = self._segment_ranges[:]
+        window = tiered_merge_window(
+            [len(segment) for segment in segments], self.merge_factor
+        )
+        if window is None:
+            return False
+        start, end = window
+
+        # Sealed segments are immutable; build the merge without the lock
+        merged = merge_indexes(segments[start:end])
+        ranges = ranges[start:end]
+        doc_range = (ranges[0][0], ranges[-1][1])
+        passage_range = (ranges[0][2], ranges[-1][3])
+
+        obsolete: List[str] = []
+        if self.directory:
+            with self._lock:
+                sequence = self._manifest["next_segment"]
+                self._manifest["next_segment"] = sequence + 1
+            segment = self._build_segment(
+                segment_name(sequence), doc_range, passage_range, merged
+            )
+            entry = write_segment(self.directory, segment)
+
+        with self._lock:
+            # Flushes only append, so positions start..end are unchanged
+            self._segment_ranges[start:end] = [doc_range + passage_range]
+            if self.directory:
+                entries = self._manifest["segments"]
+                obsolete = [old["name"] for old in entries[start:end]]
+                entries[start:end] = [entry]
+                save_manifest(self.directory, self._manifest)
+            self.index.replace(start, end, merged)
+
+        for old_name in obsolete:
+            remove_segment_files(self.directory, old_name)
+        logger.debug(
+            "Merged %d segments of store '%s' (%d passages)",
+            end - start,
+            self.name,
+            len(merged),
+        )
+        return True
+
+    def wait_for_merges(self, timeout: Optional[float] = None) -> None:
+        """Block until the background merge thread is idle"""
+        thread = self._merge_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _load_segment(self, segment: Segment) -> None:
+        if segment.doc_base != len(self.documents) or (
+            segment.passage_base != len(self.passages)
+        ):
+            raise ValueError(f"Segment {segment.name} is out of order")
+
+        self.documents.extend(segment.documents)
+        lengths = {}
+        for passage_id, (doc_id, start, end, length) in enumerate(
+            segment.passages, start=segment.passage_base
+        ):
+            self.passages.append((doc_id, start, end))
+            lengths[passage_id] = length
+        loaded = InvertedIndex()
+        loaded.merge(segment.postings, lengths)
+        self.index.add_segment(loaded)
+        self._segment_ranges.append(
+            (
+                segment.doc_base,
+                len(self.documents),
+                segment.passage_base,
+                len(self.passages),
+            )
+        )
+
+        if self.dense is not None:
+            vectors = segment.vectors
+            if vectors is None or vectors.shape[1] != self.dense.dim:
+                # Persisted without (matching) vectors: re-encode passage text
+                vectors = self.encoder.encode(
+                    [tokenize(self.passage_text(pid)) for pid in lengths]
+                )
+            self._add_vectors(vectors)
+
+    def close(self, flush: bool = True) -> None:
+        """
+        Stop background merges and release the content blob
+
+        Args:
+            flush: Persist the memtable first (directory-backed stores only)
+        """
+        if flush and self.directory:
+            self.flush()
+        self.merge_factor = 0
+        self.wait_for_merges()
+        self.blob.close()
+        if self._dir_lock is not None:
+            unlock_store(self._dir_lock)
+            self._dir_lock = None
+
+    def document_text(self, doc_id: int) -> str:
+        """Return the full text of a document"""
+        document = self.documents[doc_id]
+        return self.blob.text(document["offset"], document["length"])
+
+    def passage_text(self, passage_id: int) -> str:
+        """Return the text of a passage, decoded from the content blob"""
+        doc_id, start, end = self.passages[passage_id]
+        return self.blob.text(self.documents[doc_id]["offset"] + start, end - start)
+
+    def search(self, terms: Iterable[str], k: int) -> List[Tuple[int, int, float]]:
+        """
+        Rank documents by their best-scoring passage
+
+        Args:
+            terms: Query terms (already tokenized)
+            k: Number of documents to return
+
+        Returns:
+            List of ``(doc_id, passage_id, score)`` sorted by descending score
+        """
+        if k <= 0:
+            return []
+        if self.dense is not None:
+            return self._dense_search(list(terms), k)
+
+        best: Dict[int, Tuple[int, float]] = {}
+        for passage_id, score in self.index.score(terms).items():
+            doc_id = self.passages[passage_id][0]
+            current = best.get(doc_id)
+            if current is None or score > current[1]:
+                best[doc_id] = (passage_id, score)
+
+        ranked = top_k(((d, ps[1]) for d, ps in best.items()), k)
+        return [(doc_id, best[doc_id][0], score) for doc_id, score in ranked]
+
+    def max_score(self, terms: Iterable[str]) -> float:
+        """
+        Upper bound of ``search`` scores for ``terms`` in this store
+
+        Dense scores are cosines (at most 1); BM25 scores are bounded by the
+        store's IDF of the query terms (see ``SegmentedIndex.max_score``).
+        """
+        if self.dense is not None:
+            return 1.0
+        return self.index.max_score(terms)
+
+    def _dense_search(self, terms: List[str], k: int) -> List[Tuple[int, int, float]]:
+        """Score passages by vector similarity and keep the best per document"""
+        total = len(self.dense)
+        if total == 0:
+            return []
+
+        query = self.encoder.encode_query(terms, self.index.idf)
+        backend = self.ann if self.ann is not None else self.dense
+
+        # Several top passages may share a document; widen until k documents
+        width = min(total, 4 * k)
+        while True:
+            best: Dict[int, Tuple[int, float]] = {}
+            hits = backend.search(query, width)
+            for passage_id, score in hits:
+                best.setdefault(self.passages[passage_id][0], (passage_id, score))
+            if len(best) >= k or width >= total or len(hits) < width:
+                break
+            width = min(total, 4 * width)
+
+        return [
+            (doc_id, passage_id, score)
+            for doc_id, (passage_id, score) in list(best.items())[:k]
+        ]
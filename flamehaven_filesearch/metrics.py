@@ -6,6 +6,7 @@ Comprehensive application metrics for monitoring and alerting.
 
 import logging
 import time
+from typing import Any, Dict
 
 import psutil
 from prometheus_client import (
@@ -154,6 +155,120 @@ batch_search_queries = Histogram(
     registry=registry,
 )
 
+# Search executor metrics
+search_queue_depth = Gauge(
+    "search_queue_depth",
+    "Searches waiting for a search executor thread",
+    registry=registry,
+)
+
+search_inflight = Gauge(
+    "search_inflight",
+    "Searches currently running on the search executor",
+    registry=registry,
+)
+
+search_queue_wait_seconds = Histogram(
+    "search_queue_wait_seconds",
+    "Time a search waited for an executor thread",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0),
+    registry=registry,
+)
+
+search_rejected_total = Counter(
+    "search_rejected_total",
+    "Searches rejected because the executor queue was full",
+    registry=registry,
+)
+
+search_coalesced_total = Counter(
+    "search_coalesced_total",
+    "Searches answered by joining an identical in-flight search",
+    registry=registry,
+)
+
+# Gemini resilience metrics (refreshed from the searcher on scrape)
+gemini_circuit_state = Gauge(
+    "gemini_circuit_state",
+    "Gemini circuit breaker state (0 = closed, 1 = half-open, 2 = open)",
+    registry=registry,
+)
+
+gemini_circuit_failures = Gauge(
+    "gemini_circuit_consecutive_failures",
+    "Consecutive failed Gemini calls",
+    registry=registry,
+)
+
+gemini_circuit_opens = Gauge(
+    "gemini_circuit_opens",
+    "Times the Gemini circuit breaker opened since startup",
+    registry=registry,
+)
+
+gemini_hedged_calls = Gauge(
+    "gemini_hedged_calls",
+    "Gemini calls that sent a hedged duplicate request since startup",
+    registry=registry,
+)
+
+gemini_deadline_exceeded = Gauge(
+    "gemini_deadline_exceeded",
+    "Gemini calls that exceeded their deadline since startup",
+    registry=registry,
+)
+
+# Gemini quota scheduler metrics (wait is separate from search latency)
+gemini_quota_wait_seconds = Histogram(
+    "gemini_quota_wait_seconds",
+    "Time a Gemini call waited in the client-side quota queue",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    registry=registry,
+)
+
+gemini_quota_queue_depth = Gauge(
+    "gemini_quota_queue_depth",
+    "Gemini calls waiting for client-side quota",
+    registry=registry,
+)
+
+# Local-first routing metrics
+search_route_total = Counter(
+    "search_route_total",
+    "Searches answered locally or escalated to Gemini by the local-first router",
+    ["route"],
+    registry=registry,
+)
+
+search_route_duration_seconds = Histogram(
+    "search_route_duration_seconds",
+    "Search latency per local-first route",
+    ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    registry=registry,
+)
+
+# Upload job metrics
+upload_job_queue_depth = Gauge(
+    "upload_job_queue_depth",
+    "Upload jobs waiting for a worker",
+    registry=registry,
+)
+
+upload_jobs_total = Counter(
+    "upload_jobs_total",
+    "Completed upload jobs",
+    ["status"],
+    registry=registry,
+)
+
+upload_job_duration_seconds = Histogram(
+    "upload_job_duration_seconds",
+    "Time a worker spent ingesting an upload job",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+    registry=registry,
+)
+
 # Gauge for active requests
 active_requests = Gauge(
     "active_requests",
@@ -292,6 +407,76 @@ class MetricsCollector:
         batch_search_queries.observe(query_count)
         batch_search_duration_seconds.observe(duration)
 
+    @staticmethod
+    def update_search_executor(queued: int, inflight: int):
+        """Update search executor queue depth and in-flight gauges"""
+        search_queue_depth.set(queued)
+        search_inflight.set(inflight)
+
+    @staticmethod
+    def record_search_queue_wait(seconds: float):
+        """Record time a search spent waiting for an executor thread"""
+        search_queue_wait_seconds.observe(seconds)
+
+    @staticmethod
+    def record_search_rejected():
+        """Record a search rejected by the executor queue bound"""
+        search_rejected_total.inc()
+
+    @staticmethod
+    def record_search_coalesced():
+        """Record a search that reused an identical in-flight call"""
+        search_coalesced_total.inc()
+
+    @staticmethod
+    def update_gemini_resilience(stats: Dict[str, Any]):
+        """
+        Update Gemini breaker and hedging gauges
+
+        Args:
+            stats: ``FlamehavenFileSearch.get_resilience_stats()`` output
+        """
+        states = {"closed": 0, "half_open": 1, "open": 2}
+        circuit = stats["circuit"]
+        gemini_circuit_state.set(states[circuit["state"]])
+        gemini_circuit_failures.set(circuit["consecutive_failures"])
+        gemini_circuit_opens.set(circuit["opens"])
+        gemini_hedged_calls.set(stats["hedges"])
+        gemini_deadline_exceeded.set(stats["timeouts"])
+
+    @staticmethod
+    def record_gemini_quota_wait(seconds: float):
+        """Record time a Gemini call waited for client-side quota"""
+        gemini_quota_wait_seconds.observe(seconds)
+
+    @staticmethod
+    def update_gemini_quota_queue(depth: int):
+        """Update the number of Gemini calls waiting for quota"""
+        gemini_quota_queue_depth.set(depth)
+
+    @staticmethod
+    def record_search_route(route: str, seconds: float):
+        """Record a search routed locally or to Gemini and its latency"""
+        search_route_total.labels(route=route).inc()
+        search_route_duration_seconds.labels(route=route).observe(seconds)
+
+    @staticmethod
+    def update_upload_job_queue(depth: int):
+        """Update the number of upload jobs waiting for a worker"""
+        upload_job_queue_depth.set(depth)
+
+    @staticmethod
+    def record_upload_job(status: str, duration: float):
+        """
+        Record a completed upload job
+
+        Args:
+            status: Final job status ('succeeded' or 'failed')
+            duration: Seconds the worker spent on the job
+        """
+        upload_jobs_total.labels(status=status).inc()
+        upload_job_duration_seconds.observe(duration)
+
 
 class RequestMetricsContext:
     """
@@ -0,0 +1,314 @@
+"""
+Client-side Gemini quota scheduler
+
+Nothing paced outbound Gemini requests, so a burst of searches fired at
+once and tripped the per-minute quota with 429s. ``QuotaScheduler`` keeps a
+token bucket for requests per minute and one for tokens per minute; callers
+queue for both, highest priority first, and are released as the buckets
+refill. Bucket capacity is a few seconds' worth of budget, so bursts are
+smoothed into a steady rate instead of being sent all at once.
+Event-loop callers use ``acquire_async``, which waits with ``asyncio.sleep``
+instead of parking a thread.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Backoff bounds for async waiters that are not first in line
+_ASYNC_POLL_MIN_SEC = 0.005
+_ASYNC_POLL_MAX_SEC = 0.25
+
+
+class QuotaTimeoutError(TimeoutError):
+    """Raised when a call waits in the quota queue longer than allowed"""
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at ``per_minute / 60`` per second
+
+    A request larger than the capacity is admitted once the bucket is full
+    and leaves it in debt, so the long-run rate still holds.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+        burst_sec: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize bucket
+
+        Args:
+            per_minute: Sustained budget per minute
+            burst_sec: Seconds of budget the bucket holds (burst size)
+            clock: Monotonic time source (injectable for tests)
+        """
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.rate = per_minute / 60.0
+        self.capacity = max(self.rate * burst_sec, 1.0)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken (0 if available now)"""
+        self._refill()
+        needed = min(amount, self.capacity)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Consume ``amount`` (may leave the bucket negative)"""
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        """Return unused budget"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class QuotaScheduler:
+    """
+    Priority queue in front of requests-per-minute and tokens-per-minute
+    budgets
+
+    Only the highest-priority waiter (FIFO within a priority) may take
+    budget, so a stream of small requests cannot starve a large one. A
+    budget of 0 means unlimited; with both at 0 the scheduler is a no-op.
+    """
+
+    def __init__(
+        self,
+        rpm: float = 0,
+        tpm: float = 0,
+        burst_sec: float = 10.0,
+        on_wait: Optional[Callable[[float], None]] = None,
+    ):
+        """
+        Initialize scheduler
+
+        Args:
+            rpm: Requests per minute (0 = unlimited)
+            tpm: Tokens per minute (0 = unlimited)
+            burst_sec: Seconds of budget that may be spent in one burst
+            on_wait: Called with the queue wait of every admitted call
+        """
+        if rpm < 0 or tpm < 0:
+            raise ValueError("rpm and tpm must be zero or positive")
+        if burst_sec <= 0:
+            raise ValueError("burst_sec must be positive")
+        self.requests = TokenBucket(rpm, burst_sec) if rpm else None
+        self.tokens = TokenBucket(tpm, burst_sec) if tpm else None
+        self.on_wait = on_wait
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self.admitted = 0
+        self.delayed = 0
+        self.timeouts = 0
+        self.total_wait_sec = 0.0
+        self.max_wait_sec = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        """True if any budget is configured"""
+        return self.requests is not None or self.tokens is not None
+
+    def _delay(self, tokens: int) -> float:
+        delay = 0.0
+        if self.requests is not None:
+            delay = max(delay, self.requests.delay(1))
+        if self.tokens is not None and tokens:
+            delay = max(delay, self.tokens.delay(tokens))
+        return delay
+
+    def _take(self, tokens: int) -> None:
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None and tokens:
+            self.tokens.take(tokens)
+
+    def acquire(
+        self, tokens: int = 0, priority: int = 0, timeout: Optional[float] = None
+    ) -> float:
+        """
+        Wait for budget for one request of ``tokens`` tokens
+
+        Args:
+            tokens: Estimated tokens the request will use
+            priority: Higher values are served first
+            timeout: Maximum seconds to wait (None = no limit)
+
+        Returns:
+            Seconds spent waiting in the queue
+
+        Raises:
+            QuotaTimeoutError: Budget did not free up within ``timeout``
+        """
+        if not self.enabled:
+            return 0.0
+
+        start = time.monotonic()
+        deadline = start + timeout if timeout is not None else None
+        ticket = (-priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    delay = None
+                    if self._waiters[0] == ticket:
+                        delay = self._delay(tokens)
+                        if delay <= 0:
+                            self._take(tokens)
+                            break
+                    now = time.monotonic()
+                    if deadline is not None:
+                        if now >= deadline:
+                            self.timeouts += 1
+                            raise QuotaTimeoutError(
+                                f"Gemini quota queue wait exceeded {timeout:g}s"
+                            )
+                        remaining = deadline - now
+                        delay = remaining if delay is None else min(delay, remaining)
+                    self._cond.wait(delay)
+            finally:
+                self._leave(ticket)
+        return self._admitted(start)
+
+    async def acquire_async(
+        self, tokens: int = 0, priority: int = 0, timeout: Optional[float] = None
+    ) -> float:
+        """
+        ``acquire`` for coroutines: waits on the event loop, not a thread
+
+        Shares the priority queue with threaded callers. The waiter sleeps
+        until the budget refills while it is first in line and polls with
+        exponential backoff while it is not.
+
+        Args:
+            tokens: Estimated tokens the request will use
+            priority: Higher values are served first
+            timeout: Maximum seconds to wait (None = no limit)
+
+        Returns:
+            Seconds spent waiting in the queue
+
+        Raises:
+            QuotaTimeoutError: Budget did not free up within ``timeout``
+        """
+        if not self.enabled:
+            return 0.0
+
+        start = time.monotonic()
+        deadline = start + timeout if timeout is not None else None
+        ticket = (-priority, next(self._seq))
+        backoff = _ASYNC_POLL_MIN_SEC
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+        try:
+            while True:
+                with self._cond:
+                    delay = None
+                    if self._waiters[0] == ticket:
+                        delay = self._delay(tokens)
+                        if delay <= 0:
+                            self._take(tokens)
+                            break
+                    now = time.monotonic()
+                    if deadline is not None and now >= deadline:
+                        self.timeouts += 1
+                        raise QuotaTimeoutError(
+                            f"Gemini quota queue wait exceeded {timeout:g}s"
+                        )
+                if delay is None:
+                    delay = backoff
+                    backoff = min(backoff * 2, _ASYNC_POLL_MAX_SEC)
+                if deadline is not None:
+                    delay = min(delay, deadline - now)
+                await asyncio.sleep(delay)
+        finally:
+            with self._cond:
+                self._leave(ticket)
+        return self._admitted(start)
+
+    def _leave(self, ticket: Tuple[int, int]) -> None:
+        """Drop ``ticket`` from the queue and wake the waiters (lock held)."""
+        self._waiters.remove(ticket)
+        heapq.heapify(self._waiters)
+        self._cond.notify_all()
+
+    def _admitted(self, start: float) -> float:
+        """Record an admission queued since ``start``; return the wait."""
+        waited = time.monotonic() - start
+        with self._cond:
+            self.admitted += 1
+            if waited > 0.001:
+                self.delayed += 1
+            self.total_wait_sec += waited
+            self.max_wait_sec = max(self.max_wait_sec, waited)
+        if self.on_wait is not None:
+            self.on_wait(waited)
+        return waited
+
+    def try_acquire(self, tokens: int = 0) -> bool:
+        """Take budget only if available now and nobody is queued"""
+        if not self.enabled:
+            return True
+        with self._cond:
+            if self._waiters or self._delay(tokens) > 0:
+                return False
+            self._take(tokens)
+            return True
+
+    def reconcile(self, reserved: int, actual: Optional[int]) -> None:
+        """
+        Correct the token budget once a response reports its real usage
+
+        Args:
+            reserved: Tokens taken by ``acquire``
+            actual: Tokens the response used (None if unknown)
+        """
+        if self.tokens is None or actual is None or actual == reserved:
+            return
+        with self._cond:
+            if actual > reserved:
+                self.tokens.take(actual - reserved)
+            else:
+                self.tokens.refund(reserved - actual)
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue and wait statistics"""
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "queued": len(self._waiters),
+                "admitted": self.admitted,
+                "delayed": self.delayed,
+                "timeouts": self.timeouts,
+                "avg_wait_sec": (
+                    round(self.total_wait_sec / self.admitted, 4)
+                    if self.admitted
+                    else 0.0
+                ),
+                "max_wait_sec": round(self.max_wait_sec, 4),
+            }
@@ -0,0 +1,355 @@
+"""
+Resilience layer around Gemini calls
+
+A single ``generate_content`` call has no deadline of its own, so during an
+upstream brownout every search thread ends up waiting on a slow socket and
+tail latency explodes. ``ResilientCaller`` wraps each call with:
+
+- a per-call deadline after which the caller gets ``TimeoutError``
+- one hedged duplicate request, sent when the first has been outstanding
+  longer than a recent latency percentile; whichever answers first wins
+- a circuit breaker that, after consecutive failures, rejects calls with
+  ``CircuitOpenError`` until a cool-down passes and a probe call succeeds
+
+Only upstream failures (deadline overruns, connection errors and 5xx
+responses) count towards the breaker. Client errors such as a bad model
+name or a 429 say nothing about Gemini's health; rate limits are handled
+by cooling down the key instead.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when the circuit breaker rejects a call"""
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """
+    Return True if ``error`` means Gemini itself is unhealthy
+
+    Deadline overruns, connection errors and 5xx responses qualify;
+    4xx responses (429 included) are the caller's or the key's problem.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    for attr in ("code", "status_code"):
+        status = getattr(error, attr, None)
+        if isinstance(status, int) and 500 <= status < 600:
+            return True
+    return False
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    ``closed`` lets every call through. After ``failure_threshold``
+    consecutive failures it turns ``open`` and rejects calls. Once
+    ``reset_timeout`` seconds have passed it turns ``half_open`` and lets a
+    single probe through: success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize breaker
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds to stay open before allowing a probe
+            clock: Monotonic time source (injectable for tests)
+        """
+        if failure_threshold <= 0:
+            raise ValueError("failure_threshold must be positive")
+        if reset_timeout <= 0:
+            raise ValueError("reset_timeout must be positive")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_inflight = False
+        self.opens = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Current state, moving ``open`` to ``half_open`` once cooled down"""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if (
+            self._state == self.OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = self.HALF_OPEN
+            self._probe_inflight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed (reserves the half-open probe)"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_inflight:
+                self._probe_inflight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful call"""
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Gemini circuit closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_inflight = False
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit if needed"""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probe_inflight = False
+                self.opens += 1
+                logger.warning(
+                    "Gemini circuit opened after %d consecutive failures",
+                    self._failures,
+                )
+
+    def record_ignored(self) -> None:
+        """Record a call whose error says nothing about upstream health"""
+        with self._lock:
+            self._probe_inflight = False
+
+    def record_outcome(self, error: Optional[BaseException]) -> None:
+        """Record a call that ended with ``error`` (None for success)"""
+        if error is None:
+            self.record_success()
+        elif is_upstream_failure(error):
+            self.record_failure()
+        else:
+            self.record_ignored()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker statistics"""
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "opens": self.opens,
+                "rejected": self.rejected,
+            }
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add a latency sample"""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Nearest-rank percentile of the window
+
+        Returns:
+            Latency in seconds, or None with fewer than ``min_samples``
+        """
+        with self._lock:
+            if len(self._samples) < max(min_samples, 1):
+                return None
+            ordered = sorted(self._samples)
+        rank = max(math.ceil(pct / 100.0 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class ResilientCaller:
+    """
+    Run blocking upstream calls with a deadline, hedging and a breaker
+
+    Calls execute on a dedicated thread pool so the caller can stop waiting
+    at the deadline. Python threads cannot be cancelled; pair the deadline
+    with a client-side request timeout so abandoned calls also end.
+    """
+
+    def __init__(
+        self,
+        deadline_sec: float = 30.0,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20,
+        breaker: Optional[CircuitBreaker] = None,
+        max_workers: int = 16,
+    ):
+        """
+        Initialize caller
+
+        Args:
+            deadline_sec: Seconds a caller waits before ``TimeoutError``
+            hedge_percentile: Latency percentile after which a duplicate
+                request is sent (0 disables hedging)
+            hedge_min_samples: Samples needed before hedging starts
+            breaker: Circuit breaker (default: 5 failures, 30 s cool-down)
+            max_workers: Threads available for primary and hedged calls
+        """
+        if deadline_sec <= 0:
+            raise ValueError("deadline_sec must be positive")
+        if not 0 <= hedge_percentile < 100:
+            raise ValueError("hedge_percentile must be in [0, 100)")
+        self.deadline_sec = deadline_sec
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None if hedging is off"""
+        if not self.hedge_percentile:
+            return None
+        return self.latency.percentile(self.hedge_percentile, self.hedge_min_samples)
+
+    def call(
+        self,
+        func: Callable[..., Any],
+        *args,
+        hedge_gate: Optional[Callable[[], bool]] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Call ``func`` under the deadline, hedging and breaker policies
+
+        Args:
+            func: Blocking upstream call
+            *args: Positional arguments for ``func``
+            hedge_gate: Checked before hedging; returning False skips the
+                duplicate request (e.g. when quota is exhausted)
+            **kwargs: Keyword arguments for ``func``
+
+        Returns:
+            The first successful result
+
+        Raises:
+            CircuitOpenError: The breaker is open
+            TimeoutError: No attempt finished within the deadline
+            Exception: The last attempt's error when every attempt failed
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("Gemini circuit is open")
+
+        with self._lock:
+            self.calls += 1
+        start = time.monotonic()
+        deadline = start + self.deadline_sec
+        executor = self._pool()
+        primary = executor.submit(func, *args, **kwargs)
+        pending = {primary}
+        hedge_delay = self.hedge_delay()
+        hedged = hedge_delay is None
+        error: Optional[BaseException] = None
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            timeout = remaining
+            if not hedged:
+                timeout = min(remaining, max(start + hedge_delay - time.monotonic(), 0))
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception() is None:
+                    self.latency.record(time.monotonic() - start)
+                    self.breaker.record_success()
+                    if future is not primary:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+
+            if not done and not hedged:
+                hedged = True
+                if hedge_gate is not None and not hedge_gate():
+                    continue
+                with self._lock:
+                    self.hedges += 1
+                logger.info("Hedging Gemini call after %.3fs", hedge_delay)
+                pending.add(executor.submit(func, *args, **kwargs))
+
+        if pending or error is None:
+            self.breaker.record_failure()
+            with self._lock:
+                self.timeouts += 1
+            raise TimeoutError(f"Gemini call exceeded {self.deadline_sec:g}s deadline")
+        self.breaker.record_outcome(error)
+        raise error
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="gemini"
+                )
+            return self._executor
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker, hedging and latency statistics"""
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        with self._lock:
+            return {
+                "circuit": self.breaker.get_stats(),
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "timeouts": self.timeouts,
+                "latency_p50_sec": round(p50, 4) if p50 is not None else None,
+                "latency_p95_sec": round(p95, 4) if p95 is not None else None,
+            }
+
+    def shutdown(self) -> None:
+        """Release the thread pool (a later call starts a new one)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,101 @@
+"""
+Confidence-based local-first search routing
+
+Every search paid for a Gemini generation, even lookup-style queries that
+the local mirror of the same documents answers on its own.
+``LocalFirstRouter`` decides from the top local hits whether a query can be
+answered extractively: the best document must clear an absolute score and
+lead the runner-up by a relative margin. Anything less clear-cut escalates
+to Gemini. The router also keeps the routing split and per-path latency.
+
+The score threshold is on the scale of the local backend: BM25 scores are
+unbounded and grow with query length, dense scores are cosines in [0, 1].
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence
+
+ROUTES = ("local", "gemini")
+
+# Default ``min_score`` per local retrieval backend
+DEFAULT_MIN_SCORES = {"bm25": 5.0, "dense": 0.3}
+
+
+class LocalFirstRouter:
+    """
+    Score/margin gate in front of Gemini plus per-route statistics
+
+    The margin is relative, ``(top - runner_up) / top``, so it means the
+    same for BM25 and vector scores.
+    """
+
+    def __init__(
+        self,
+        min_score: float = 5.0,
+        min_margin: float = 0.3,
+        on_route: Optional[Callable[[str, float], None]] = None,
+    ):
+        """
+        Initialize router
+
+        Args:
+            min_score: Top local score needed to answer locally
+            min_margin: Relative lead over the runner-up, in [0, 1)
+            on_route: Called with ``(route, seconds)`` for every routed search
+        """
+        if min_score < 0:
+            raise ValueError("min_score must be zero or positive")
+        if not 0 <= min_margin < 1:
+            raise ValueError("min_margin must be in [0, 1)")
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.on_route = on_route
+        self._lock = threading.Lock()
+        self._counts = {route: 0 for route in ROUTES}
+        self._seconds = {route: 0.0 for route in ROUTES}
+
+    def confident(self, scores: Sequence[float]) -> bool:
+        """
+        Decide whether ranked local scores justify a local answer
+
+        Args:
+            scores: Best local scores, highest first (one per document)
+
+        Returns:
+            True if the top hit clears both the score and margin thresholds
+        """
+        if not scores or scores[0] <= 0 or scores[0] < self.min_score:
+            return False
+        runner_up = scores[1] if len(scores) > 1 else 0.0
+        return (scores[0] - runner_up) / scores[0] >= self.min_margin
+
+    def record(self, route: str, seconds: float) -> None:
+        """Count one search answered by ``route`` and its latency"""
+        with self._lock:
+            self._counts[route] += 1
+            self._seconds[route] += seconds
+        if self.on_route is not None:
+            self.on_route(route, seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Routing split and average latency per route"""
+        with self._lock:
+            total = sum(self._counts.values())
+            return {
+                "min_score": self.min_score,
+                "min_margin": self.min_margin,
+                **{
+                    route: {
+                        "searches": self._counts[route],
+                        "share": (
+                            round(self._counts[route] / total, 4) if total else 0.0
+                        ),
+                        "avg_latency_sec": (
+                            round(self._seconds[route] / self._counts[route], 4)
+                            if self._counts[route]
+                            else 0.0
+                        ),
+                    }
+                    for route in ROUTES
+                },
+            }
@@ -0,0 +1,130 @@
+"""
+Bounded search executor for FLAMEHAVEN FileSearch API
+
+``FlamehavenFileSearch.search`` is synchronous and may block for seconds on
+the Gemini call. Running it on the event loop stalls every other request on
+the worker, so the API hands searches to a dedicated thread pool with a
+fixed concurrency limit and an optional bound on the number of waiting
+requests.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from .exceptions import ServiceUnavailableError
+from .metrics import MetricsCollector
+
+logger = logging.getLogger(__name__)
+
+
+class SearchExecutor:
+    """
+    Dedicated thread pool for blocking search calls
+
+    At most ``max_concurrency`` searches run at once; further requests wait
+    in the pool queue. When ``max_queue`` requests are already waiting, new
+    ones are rejected with 503 instead of piling up behind a slow backend.
+    Queue depth, in-flight count and queue wait time are exported as
+    Prometheus metrics.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 100):
+        """
+        Initialize executor
+
+        Args:
+            max_concurrency: Worker threads running searches
+            max_queue: Waiting requests before rejecting (0 = unbounded)
+        """
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="search"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._inflight = 0
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking callable on the search pool
+
+        Args:
+            func: Blocking callable (e.g. ``searcher.search``)
+            *args: Positional arguments
+            **kwargs: Keyword arguments
+
+        Returns:
+            The callable's return value
+
+        Raises:
+            ServiceUnavailableError: If the wait queue is full
+        """
+        with self._lock:
+            if self.max_queue and self._queued >= self.max_queue:
+                MetricsCollector.record_search_rejected()
+                raise ServiceUnavailableError("Search", "search queue is full")
+            self._queued += 1
+            self._publish()
+
+        loop = asyncio.get_running_loop()
+        state = {"enqueued_at": time.monotonic(), "started": False, "dropped": False}
+        call = functools.partial(self._call, state, func, args, kwargs)
+        try:
+            return await loop.run_in_executor(self._executor, call)
+        except asyncio.CancelledError:
+            # Client went away; release the queue slot if no worker took it
+            with self._lock:
+                if not state["started"]:
+                    state["dropped"] = True
+                    self._queued -= 1
+                    self._publish()
+            raise
+
+    def _call(
+        self,
+        state: Dict[str, Any],
+        func: Callable[..., Any],
+        args: tuple,
+        kwargs: Dict[str, Any],
+    ) -> Any:
+        with self._lock:
+            if state["dropped"]:
+                return None
+            state["started"] = True
+            self._queued -= 1
+            self._inflight += 1
+            self._publish()
+        MetricsCollector.record_search_queue_wait(
+            time.monotonic() - state["enqueued_at"]
+        )
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._inflight -= 1
+                self._publish()
+
+    def _publish(self) -> None:
+        MetricsCollector.update_search_executor(self._queued, self._inflight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get executor statistics"""
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "queued": self._queued,
+                "inflight": self._inflight,
+            }
+
+    def shutdown(self) -> None:
+        """Stop accepting work and wait for running searches"""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,322 @@
+"""
+On-disk segment format for FLAMEHAVEN FileSearch local stores
+
+Each local store directory holds immutable segment files plus a manifest:
+
+    manifest.json              ordered list of live segments
+    content.blob               UTF-8 document text, append-only (mmap'd)
+    seg-000001.docs.jsonl      document table: title, uri, blob offset/length
+    seg-000001.passages.bin    int64 quads: doc_id, start, end, token_count
+    seg-000001.postings.json   {term: [passage_id, tf, passage_id, tf, ...]}
+    seg-000001.vectors.npy     dense passage vectors (optional)
+
+Document and passage ids are global to the store; each segment covers a
+contiguous id range recorded in its manifest entry, and a merged segment
+replaces the adjacent run it was built from. Segment files and the content
+blob are fully written before the manifest is atomically replaced, so a crash
+mid-write only leaves unreferenced files (swept on reopen) or blob bytes past
+the manifest's ``blob_size`` behind.
+
+Each process keeps its own in-memory view of a store and allocates ids from
+it, so a store directory has a single writer process: ``lock_store`` takes an
+exclusive ``flock`` on ``LOCK`` for as long as the store is open, and a second
+process opening the same directory fails with ``StoreLockedError``.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+BLOB_NAME = "content.blob"
+LOCK_NAME = "LOCK"
+SEGMENT_SUFFIXES = (".docs.jsonl", ".passages.bin", ".postings.json", ".vectors.npy")
+FORMAT_VERSION = 1
+
+
+# Lock file path -> [open handle, stores in this process holding it]; flock
+# conflicts between descriptors of one process, so reopening shares the lock
+_held_locks: Dict[str, List[Any]] = {}
+_held_locks_guard = threading.Lock()
+
+
+class StoreLockedError(RuntimeError):
+    """Another process has the store directory open"""
+
+
+def lock_store(directory: str) -> str:
+    """
+    Take the exclusive writer lock on a store directory
+
+    Args:
+        directory: Store directory
+
+    Returns:
+        Lock token to pass to ``unlock_store``
+
+    Raises:
+        StoreLockedError: If another process holds the lock
+    """
+    path = os.path.realpath(os.path.join(directory, LOCK_NAME))
+    with _held_locks_guard:
+        held = _held_locks.get(path)
+        if held is not None:
+            held[1] += 1
+            return path
+        handle = open(path, "a+b")
+        if fcntl is not None:
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                raise StoreLockedError(
+                    f"Local store {directory} is open in another process; "
+                    "local stores support a single writer process"
+                ) from None
+        _held_locks[path] = [handle, 1]
+    return path
+
+
+def unlock_store(token: str) -> None:
+    """Release a lock taken with ``lock_store``"""
+    with _held_locks_guard:
+        held = _held_locks.get(token)
+        if held is None:
+            return
+        held[1] -= 1
+        if held[1] == 0:
+            del _held_locks[token]
+            held[0].close()  # closing the last descriptor drops the flock
+
+
+@dataclass
+class Segment:
+    """
+    In-memory view of one immutable segment
+
+    Attributes:
+        name: Segment file prefix (e.g. ``seg-000001``)
+        doc_base: Global id of the first document
+        passage_base: Global id of the first passage
+        documents: Document table rows
+        passages: ``(doc_id, start, end, token_count)`` per passage
+        postings: ``{term: {passage_id: tf}}`` for passages in this segment
+        vectors: Optional ``(len(passages), dim)`` float32 matrix
+    """
+
+    name: str
+    doc_base: int
+    passage_base: int
+    documents: List[Dict[str, Any]] = field(default_factory=list)
+    passages: List[Tuple[int, int, int, int]] = field(default_factory=list)
+    postings: Dict[str, Dict[int, int]] = field(default_factory=dict)
+    vectors: Any = None
+
+    def manifest_entry(self) -> Dict[str, Any]:
+        """Describe this segment for the manifest"""
+        return {
+            "name": self.name,
+            "doc_base": self.doc_base,
+            "doc_count": len(self.documents),
+            "passage_base": self.passage_base,
+            "passage_count": len(self.passages),
+        }
+
+
+def segment_name(sequence: int) -> str:
+    """Return the file prefix for a segment sequence number"""
+    return f"seg-{sequence:06d}"
+
+
+def new_manifest(store_name: str) -> Dict[str, Any]:
+    """Create an empty manifest for a store"""
+    return {
+        "version": FORMAT_VERSION,
+        "store": store_name,
+        "next_segment": 1,
+        "blob_size": 0,
+        "segments": [],
+    }
+
+
+def load_manifest(directory: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a store manifest
+
+    Args:
+        directory: Store directory
+
+    Returns:
+        Manifest dict, or None if the directory holds no manifest
+    """
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    if manifest.get("version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported segment format version {manifest.get('version')} "
+            f"in {directory}"
+        )
+    return manifest
+
+
+def save_manifest(directory: str, manifest: Dict[str, Any]) -> None:
+    """Atomically replace the store manifest"""
+    _atomic_write(
+        os.path.join(directory, MANIFEST_NAME),
+        json.dumps(manifest, indent=2).encode("utf-8"),
+    )
+
+
+def write_segment(directory: str, segment: Segment) -> Dict[str, Any]:
+    """
+    Write segment files
+
+    Args:
+        directory: Store directory
+        segment: Segment to persist
+
+    Returns:
+        Manifest entry for the segment
+    """
+    prefix = os.path.join(directory, segment.name)
+
+    docs_blob = "".join(
+        json.dumps(doc, ensure_ascii=False) + "\n" for doc in segment.documents
+    )
+    _atomic_write(prefix + ".docs.jsonl", docs_blob.encode("utf-8"))
+
+    quads = array("q")
+    for passage in segment.passages:
+        quads.extend(passage)
+    if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+        quads.byteswap()
+    _atomic_write(prefix + ".passages.bin", quads.tobytes())
+
+    flat_postings = {
+        term: [value for pair in sorted(postings.items()) for value in pair]
+        for term, postings in segment.postings.items()
+    }
+    _atomic_write(
+        prefix + ".postings.json",
+        json.dumps(flat_postings, ensure_ascii=False).encode("utf-8"),
+    )
+
+    if segment.vectors is not None and np is not None:
+        with open(prefix + ".vectors.npy.tmp", "wb") as handle:
+            np.save(handle, np.ascontiguousarray(segment.vectors, dtype=np.float32))
+        os.replace(prefix + ".vectors.npy.tmp", prefix + ".vectors.npy")
+
+    return segment.manifest_entry()
+
+
+def read_segment(directory: str, entry: Dict[str, Any]) -> Segment:
+    """
+    Read a segment described by a manifest entry
+
+    Args:
+        directory: Store directory
+        entry: Manifest entry
+
+    Returns:
+        Loaded segment (``vectors`` is None when not persisted)
+    """
+    prefix = os.path.join(directory, entry["name"])
+    segment = Segment(
+        name=entry["name"],
+        doc_base=entry["doc_base"],
+        passage_base=entry["passage_base"],
+    )
+
+    with open(prefix + ".docs.jsonl", "r", encoding="utf-8") as handle:
+        segment.documents = [json.loads(line) for line in handle if line.strip()]
+
+    quads = array("q")
+    with open(prefix + ".passages.bin", "rb") as handle:
+        quads.frombytes(handle.read())
+    if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+        quads.byteswap()
+    segment.passages = [
+        (quads[i], quads[i + 1], quads[i + 2], quads[i + 3])
+        for i in range(0, len(quads), 4)
+    ]
+
+    with open(prefix + ".postings.json", "r", encoding="utf-8") as handle:
+        flat_postings = json.load(handle)
+    segment.postings = {
+        term: dict(zip(values[::2], values[1::2]))
+        for term, values in flat_postings.items()
+    }
+
+    vectors_path = prefix + ".vectors.npy"
+    if np is not None and os.path.exists(vectors_path):
+        segment.vectors = np.load(vectors_path)
+
+    if len(segment.documents) != entry["doc_count"] or (
+        len(segment.passages) != entry["passage_count"]
+    ):
+        raise ValueError(f"Segment {entry['name']} in {directory} is corrupt")
+    return segment
+
+
+def remove_segment_files(directory: str, name: str) -> None:
+    """Delete every file belonging to a segment"""
+    for suffix in SEGMENT_SUFFIXES:
+        try:
+            os.remove(os.path.join(directory, name + suffix))
+        except FileNotFoundError:
+            pass
+
+
+def remove_orphan_segments(directory: str, manifest: Dict[str, Any]) -> int:
+    """
+    Delete segment files the manifest no longer references
+
+    Leftovers come from merges or flushes interrupted before (or right after)
+    the manifest was replaced.
+
+    Args:
+        directory: Store directory
+        manifest: Current manifest
+
+    Returns:
+        Number of files removed
+    """
+    live = {entry["name"] for entry in manifest["segments"]}
+    removed = 0
+    for filename in os.listdir(directory):
+        if not filename.startswith("seg-"):
+            continue
+        if filename.split(".", 1)[0] in live and not filename.endswith(".tmp"):
+            continue
+        os.remove(os.path.join(directory, filename))
+        removed += 1
+    return removed
+
+
+def _atomic_write(path: str, payload: bytes) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(payload)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
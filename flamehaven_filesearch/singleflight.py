@@ -0,0 +1,215 @@
+"""
+Single-flight coalescing of identical in-flight searches
+
+The search cache is filled only after the first upstream call returns, so a
+burst of identical questions would otherwise all miss it and each make
+their own Gemini call. ``SingleFlight`` lets concurrent callers with the
+same key share one call: the first becomes the leader and the rest await
+its result. With a ``RedisFlightLock`` the leader also takes a short-lived
+Redis lock, and callers in other worker processes wait for the leader's
+result to land in the shared cache instead of calling upstream themselves.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Compare-and-delete so a worker never releases a lock it no longer owns
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def search_key(query: str, store_name: str, **kwargs) -> str:
+    """
+    Build the canonical key for a search
+
+    Shared by ``SearchResultCache`` and single-flight coalescing so both
+    treat the same parameter combinations as identical.
+
+    Args:
+        query: Search query
+        store_name: Store name
+        **kwargs: Additional parameters (model, max_tokens, etc.)
+
+    Returns:
+        SHA-256 hex digest
+    """
+    key_parts = [query, store_name]
+
+    # Add optional parameters in sorted order for consistency
+    for k in sorted(kwargs.keys()):
+        if kwargs[k] is not None:
+            key_parts.append(f"{k}={kwargs[k]}")
+
+    key_string = "|".join(str(p) for p in key_parts)
+    return hashlib.sha256(key_string.encode()).hexdigest()
+
+
+class RedisFlightLock:
+    """
+    Cross-process leader election for single-flight keys
+
+    The lock expires after ``ttl_seconds`` so a crashed leader cannot block
+    a key for longer than that.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        ttl_seconds: float = 30.0,
+        poll_interval: float = 0.05,
+        prefix: str = "flamehaven:inflight:",
+    ):
+        """
+        Initialize lock
+
+        Args:
+            client: ``redis.Redis`` client (``decode_responses=True``)
+            ttl_seconds: Lock lifetime; bounds how long followers wait
+            poll_interval: Delay between cache checks while following
+            prefix: Redis key namespace
+        """
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._tokens: Dict[str, str] = {}
+
+    def acquire(self, key: str) -> bool:
+        """Try to become the leader for ``key``"""
+        token = uuid.uuid4().hex
+        acquired = self.client.set(
+            self.prefix + key, token, nx=True, px=int(self.ttl_seconds * 1000)
+        )
+        if acquired:
+            self._tokens[key] = token
+        return bool(acquired)
+
+    def release(self, key: str) -> None:
+        """Release leadership for ``key`` if still held"""
+        token = self._tokens.pop(key, None)
+        if token is not None:
+            self.client.eval(_RELEASE_SCRIPT, 1, self.prefix + key, token)
+
+    def wait(self, key: str, lookup: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """
+        Follow another worker's leader
+
+        Args:
+            key: Single-flight key
+            lookup: Returns the shared result once published (e.g. cache get)
+
+        Returns:
+            The published result, or None if the leader released or lost the
+            lock without publishing one
+        """
+        deadline = time.monotonic() + self.ttl_seconds
+        while time.monotonic() < deadline:
+            result = lookup()
+            if result is not None:
+                return result
+            if not self.client.exists(self.prefix + key):
+                return lookup()
+            time.sleep(self.poll_interval)
+        return None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key
+
+    The shared call runs as its own task, so a caller that disconnects does
+    not cancel the work other callers are waiting on.
+    """
+
+    def __init__(self, distributed_lock: Optional[RedisFlightLock] = None):
+        """
+        Initialize coalescer
+
+        Args:
+            distributed_lock: Optional cross-worker lock (Redis deployments)
+        """
+        self.distributed_lock = distributed_lock
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[Any]],
+        lookup: Optional[Callable[[], Optional[Any]]] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Run ``func`` once per key among concurrent callers
+
+        Args:
+            key: Coalescing key (see ``search_key``)
+            func: Coroutine factory performing the upstream call; with a
+                distributed lock it must publish its result where ``lookup``
+                can find it before returning
+            lookup: Reads a result published by another worker
+
+        Returns:
+            ``(result, shared)`` where ``shared`` is True if this caller
+            reused a call started by someone else. The result object is
+            shared; copy it before mutating.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.followers += 1
+            return await asyncio.shield(task), True
+
+        self.leaders += 1
+        task = asyncio.ensure_future(self._lead(key, func, lookup))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), False
+
+    async def _lead(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[Any]],
+        lookup: Optional[Callable[[], Optional[Any]]],
+    ) -> Any:
+        lock = self.distributed_lock
+        if lock is None or lookup is None:
+            return await func()
+
+        if await asyncio.to_thread(lock.acquire, key):
+            try:
+                return await func()
+            finally:
+                await asyncio.to_thread(lock.release, key)
+
+        # Another worker is already calling upstream; wait for its result
+        result = await asyncio.to_thread(lock.wait, key, lookup)
+        if result is not None:
+            return result
+        logger.info("Single-flight leader published nothing; calling upstream")
+        return await func()
+
+    def _forget(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "distributed": self.distributed_lock is not None,
+        }
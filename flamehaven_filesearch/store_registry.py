@@ -0,0 +1,168 @@
+"""
+Durable store registry for remote File Search stores
+
+``FlamehavenFileSearch.stores`` only lived in memory, so after a restart
+``upload_file`` created brand-new remote stores and the data indexed in the
+old ones was orphaned. ``StoreRegistry`` records every store name with its
+remote resource name and owning API key slot in SQLite. On startup the
+searcher rehydrates from it and reconciles the entries against
+``file_search_stores.list`` so that restarts reuse the existing stores.
+
+API workers sharing the database register new stores with ``claim``, an
+insert-if-absent: when two workers create the same store at once, the
+first registration wins and the loser deletes its duplicate.
+
+The SHA-256 digests of files uploaded to each store are recorded alongside,
+so upload deduplication survives restarts and is shared between workers.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StoreRegistry:
+    """
+    SQLite mapping of store name to ``(remote resource name, key slot)``,
+    plus the content digests uploaded to each store
+
+    Each operation opens its own connection, so several API workers can
+    share one database file.
+    """
+
+    def __init__(self, db_path: str = "./data/stores.db"):
+        """
+        Initialize registry
+
+        Args:
+            db_path: SQLite database file (created if missing)
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._ensure_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_db(self) -> None:
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS stores (
+                    name TEXT PRIMARY KEY,
+                    resource TEXT NOT NULL,
+                    key_slot INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    store TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    file TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (store, sha256)
+                )
+            """)
+
+    def load(self) -> Dict[str, Tuple[str, int]]:
+        """
+        Read all registered stores
+
+        Returns:
+            Store name mapped to ``(resource, key_slot)``
+        """
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name, resource, key_slot FROM stores ORDER BY created_at"
+            ).fetchall()
+        return {name: (resource, slot) for name, resource, slot in rows}
+
+    def get(self, name: str) -> Optional[Tuple[str, int]]:
+        """Look up one store's ``(resource, key_slot)``, or None"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT resource, key_slot FROM stores WHERE name = ?", (name,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def claim(self, name: str, resource: str, key_slot: int = 0) -> Tuple[str, int]:
+        """
+        Register a store unless another worker already did
+
+        Returns:
+            The registered ``(resource, key_slot)``: the arguments if this
+            call won, otherwise the existing registration
+        """
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO stores (name, resource, key_slot, created_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(name) DO NOTHING",
+                (name, resource, key_slot, time.time()),
+            )
+            row = conn.execute(
+                "SELECT resource, key_slot FROM stores WHERE name = ?", (name,)
+            ).fetchone()
+        return row[0], row[1]
+
+    def put(self, name: str, resource: str, key_slot: int = 0) -> None:
+        """Register (or update) a store"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO stores (name, resource, key_slot, created_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(name) DO UPDATE SET "
+                "resource = excluded.resource, key_slot = excluded.key_slot",
+                (name, resource, key_slot, time.time()),
+            )
+
+    def remove(self, name: str) -> None:
+        """Forget a store and its document digests"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM stores WHERE name = ?", (name,))
+            conn.execute("DELETE FROM documents WHERE store = ?", (name,))
+
+    def add_document(self, store: str, sha256: str, file_name: str) -> None:
+        """Record that a file with digest ``sha256`` was uploaded to a store"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO documents (store, sha256, file, created_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(store, sha256) DO NOTHING",
+                (store, sha256, file_name, time.time()),
+            )
+
+    def get_document(self, store: str, sha256: str) -> Optional[str]:
+        """File name first uploaded to a store with digest ``sha256``, or None"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT file FROM documents WHERE store = ? AND sha256 = ?",
+                (store, sha256),
+            ).fetchone()
+        return row[0] if row else None
+
+    def load_documents(self) -> Dict[str, Dict[str, str]]:
+        """
+        Read every recorded digest
+
+        Returns:
+            Store name mapped to ``{sha256: file name}``
+        """
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT store, sha256, file FROM documents ORDER BY created_at"
+            ).fetchall()
+        documents: Dict[str, Dict[str, str]] = {}
+        for store, sha256, file_name in rows:
+            documents.setdefault(store, {})[sha256] = file_name
+        return documents
@@ -0,0 +1,199 @@
+"""
+Multiplexed polling of pending Gemini upload operations
+
+Remote uploads return a long-running operation that has to be polled until
+``done``. Instead of every caller sleeping in its own fixed-interval loop,
+``UploadOperationPoller`` keeps all pending operations in one table served
+by a single background thread. Each operation is polled on an adaptive
+schedule (quickly at first, backing off towards ``max_interval``) and its
+caller is woken as soon as the operation completes.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def poll_delays(
+    initial: float, maximum: float, backoff: float = 1.5
+) -> Iterator[float]:
+    """
+    Yield an adaptive polling schedule
+
+    Args:
+        initial: First delay in seconds
+        maximum: Upper bound for any delay
+        backoff: Growth factor applied after each poll
+
+    Yields:
+        Successive delays in seconds
+    """
+    delay = min(initial, maximum)
+    while True:
+        yield delay
+        delay = min(delay * backoff, maximum)
+
+
+class _PendingOperation:
+    __slots__ = ("operation", "get_operation", "event", "error", "delays", "next_poll")
+
+    def __init__(
+        self,
+        operation: Any,
+        get_operation: Callable[[Any], Any],
+        delays: Iterator[float],
+    ):
+        self.operation = operation
+        self.get_operation = get_operation
+        self.event = threading.Event()
+        self.error: Optional[BaseException] = None
+        self.delays = delays
+        self.next_poll = time.monotonic() + next(delays)
+
+
+class UploadOperationPoller:
+    """
+    Single background poller for long-running upload operations
+
+    ``wait`` blocks the calling thread on an event; only the poller thread
+    calls ``get_operation``. The thread is started on first use and again
+    after ``shutdown``.
+    """
+
+    def __init__(
+        self,
+        get_operation: Callable[[Any], Any],
+        initial_interval: float = 0.5,
+        max_interval: float = 10.0,
+        backoff: float = 1.5,
+    ):
+        """
+        Initialize poller
+
+        Args:
+            get_operation: Refreshes an operation (e.g. ``client.operations.get``)
+            initial_interval: Delay before the first poll of an operation
+            max_interval: Upper bound on the delay between polls
+            backoff: Growth factor for the delay after each poll
+        """
+        if initial_interval < 0 or max_interval < 0:
+            raise ValueError("poll intervals must be zero or positive")
+        self.get_operation = get_operation
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self._pending: Set[_PendingOperation] = set()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._polls = 0
+
+    def delays(self) -> Iterator[float]:
+        """Return this poller's polling schedule (used by the async SDK)"""
+        return poll_delays(self.initial_interval, self.max_interval, self.backoff)
+
+    def wait(
+        self,
+        operation: Any,
+        timeout: float,
+        get_operation: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """
+        Block until an operation is done
+
+        Args:
+            operation: Operation returned by the upload call
+            timeout: Seconds to wait before giving up
+            get_operation: Refresh function for this operation (defaults to
+                the poller's; e.g. the client of the key that started it)
+
+        Returns:
+            The completed operation
+
+        Raises:
+            TimeoutError: If the operation is not done within ``timeout``
+            Exception: Whatever ``get_operation`` raised while polling
+        """
+        if operation.done:
+            return operation
+
+        entry = _PendingOperation(
+            operation, get_operation or self.get_operation, self.delays()
+        )
+        with self._cond:
+            self._pending.add(entry)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="upload-poller", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+        if not entry.event.wait(timeout):
+            with self._cond:
+                self._pending.discard(entry)
+            raise TimeoutError(f"Upload operation not done after {timeout}s")
+        if entry.error is not None:
+            raise entry.error
+        return entry.operation
+
+    def _run(self) -> None:
+        stop = self._stop
+        while True:
+            with self._cond:
+                while True:
+                    if stop.is_set():
+                        return
+                    now = time.monotonic()
+                    due = [e for e in self._pending if e.next_poll <= now]
+                    if due:
+                        break
+                    if self._pending:
+                        next_poll = min(e.next_poll for e in self._pending)
+                        self._cond.wait(next_poll - now)
+                    else:
+                        self._cond.wait()
+
+            for entry in due:
+                self._poll(entry)
+
+    def _poll(self, entry: _PendingOperation) -> None:
+        try:
+            operation = entry.get_operation(entry.operation)
+            done = bool(operation.done)
+        except Exception as e:
+            logger.error("Polling upload operation failed: %s", e)
+            entry.error = e
+            done = True
+        else:
+            entry.operation = operation
+
+        with self._cond:
+            self._polls += 1
+            if done:
+                self._pending.discard(entry)
+                entry.event.set()
+            else:
+                entry.next_poll = time.monotonic() + next(entry.delays)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get poller statistics"""
+        with self._cond:
+            return {"pending": len(self._pending), "polls": self._polls}
+
+    def shutdown(self) -> None:
+        """Stop the poller thread and fail any waiting callers"""
+        with self._cond:
+            self._stop.set()
+            self._stop = threading.Event()
+            pending, self._pending = self._pending, set()
+            thread, self._thread = self._thread, None
+            self._cond.notify_all()
+        for entry in pending:
+            entry.error = RuntimeError("Upload poller is shut down")
+            entry.event.set()
+        if thread is not None:
+            thread.join()
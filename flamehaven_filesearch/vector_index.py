@@ -0,0 +1,416 @@
+"""
+Dense vector retrieval for FLAMEHAVEN FileSearch local stores
+
+Embeds passages with a deterministic hashed term-frequency encoder and keeps
+them in one contiguous float32 matrix per store, so a query is scored with a
+single matrix-vector product instead of a Python loop. Requires NumPy.
+
+Searches run without the store lock while uploads append rows, so both
+indexes publish their state as one immutable tuple: a search reads the
+tuple once and always sees a consistent snapshot.
+"""
+
+import math
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+def numpy_available() -> bool:
+    """Return True when NumPy is installed"""
+    return np is not None
+
+
+class HashingEncoder:
+    """
+    Deterministic hashed TF-IDF encoder
+
+    Tokens are projected into ``dim`` buckets with signed feature hashing
+    (CRC32, stable across processes). Passages store L2-normalized sublinear
+    term frequencies; inverse document frequency is applied to the query side
+    so stored vectors never go stale as corpus statistics change.
+    """
+
+    def __init__(self, dim: int = 256):
+        """
+        Initialize encoder
+
+        Args:
+            dim: Embedding dimensionality
+        """
+        if np is None:
+            raise RuntimeError("NumPy is required for dense retrieval")
+        if dim <= 0:
+            raise ValueError("dim must be positive")
+        self.dim = dim
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+
+    def _bucket(self, token: str) -> Tuple[int, float]:
+        cached = self._buckets.get(token)
+        if cached is None:
+            digest = zlib.crc32(token.encode("utf-8"))
+            cached = (digest % self.dim, 1.0 if digest & 0x80000000 else -1.0)
+            self._buckets[token] = cached
+        return cached
+
+    def _project(
+        self, tokens: Iterable[str], weight: Callable[[str], float]
+    ) -> "np.ndarray":
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token, tf in counts.items():
+            bucket, sign = self._bucket(token)
+            vector[bucket] += sign * (1.0 + math.log(tf)) * weight(token)
+
+        norm = float(np.linalg.norm(vector))
+        if norm > 0.0:
+            vector /= norm
+        return vector
+
+    def encode(self, token_lists: Sequence[Sequence[str]]) -> "np.ndarray":
+        """
+        Encode tokenized passages
+
+        Args:
+            token_lists: One token list per passage
+
+        Returns:
+            ``(len(token_lists), dim)`` float32 matrix of unit vectors
+        """
+        matrix = np.zeros((len(token_lists), self.dim), dtype=np.float32)
+        for row, tokens in enumerate(token_lists):
+            matrix[row] = self._project(tokens, lambda _token: 1.0)
+        return matrix
+
+    def encode_query(
+        self, terms: Sequence[str], idf: Callable[[str], float]
+    ) -> "np.ndarray":
+        """
+        Encode query terms weighted by inverse document frequency
+
+        Args:
+            terms: Query tokens
+            idf: Callable returning the IDF of a term
+
+        Returns:
+            ``(dim,)`` float32 unit vector (all zeros if no terms)
+        """
+        return self._project(terms, idf)
+
+
+class DenseIndex:
+    """
+    Contiguous float32 matrix of passage vectors
+
+    Rows are appended in passage order; the backing array grows by doubling
+    so inserts stay amortized O(1) while search sees a single contiguous
+    block. ``(matrix, size)`` is swapped in as one tuple; rows past a
+    reader's ``size`` may be written concurrently, rows before it never are.
+    """
+
+    def __init__(self, dim: int):
+        """
+        Initialize empty index
+
+        Args:
+            dim: Vector dimensionality
+        """
+        if np is None:
+            raise RuntimeError("NumPy is required for dense retrieval")
+        self.dim = dim
+        self._state: Tuple["np.ndarray", int] = (
+            np.zeros((0, dim), dtype=np.float32),
+            0,
+        )
+
+    def __len__(self) -> int:
+        return self._state[1]
+
+    @property
+    def vectors(self) -> "np.ndarray":
+        """View of the populated rows (a consistent snapshot)"""
+        matrix, size = self._state
+        return matrix[:size]
+
+    def add(self, vectors: "np.ndarray") -> None:
+        """
+        Append vectors
+
+        Args:
+            vectors: ``(n, dim)`` matrix
+        """
+        count = len(vectors)
+        if count == 0:
+            return
+        matrix, size = self._state
+        required = size + count
+        if required > len(matrix):
+            capacity = max(required, 2 * len(matrix), 64)
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:size] = matrix[:size]
+            matrix = grown
+        matrix[size:required] = vectors
+        self._state = (matrix, required)
+
+    def search(self, query: "np.ndarray", k: int) -> List[Tuple[int, float]]:
+        """
+        Score every row with one matrix-vector product
+
+        Args:
+            query: ``(dim,)`` query vector
+            k: Number of rows to return
+
+        Returns:
+            ``(row, score)`` pairs with positive score, best first
+        """
+        vectors = self.vectors
+        if k <= 0 or len(vectors) == 0:
+            return []
+        return select_top_k(vectors @ query, k)
+
+
+def select_top_k(scores: "np.ndarray", k: int) -> List[Tuple[int, float]]:
+    """
+    Select the ``k`` highest positive scores with ``argpartition``
+
+    Args:
+        scores: 1-D score array
+        k: Number of results
+
+    Returns:
+        ``(index, score)`` pairs sorted by descending score
+    """
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    # Stable sort on (-score, index) keeps ties in insertion order
+    order = np.lexsort((candidates, -scores[candidates]))
+    return [
+        (int(candidates[i]), float(scores[candidates[i]]))
+        for i in order
+        if scores[candidates[i]] > 0.0
+    ]
+
+
+def train_kmeans(
+    data: "np.ndarray", n_clusters: int, iterations: int = 10, seed: int = 0
+) -> "np.ndarray":
+    """
+    Spherical k-means over unit vectors
+
+    Args:
+        data: ``(n, dim)`` training matrix
+        n_clusters: Number of centroids (clamped to ``n``)
+        iterations: Lloyd iterations
+        seed: Random seed for centroid initialization
+
+    Returns:
+        ``(n_clusters, dim)`` float32 matrix of unit centroids
+    """
+    n_clusters = max(1, min(n_clusters, len(data)))
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), n_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = np.argmax(data @ centroids.T, axis=1)
+        # Segmented sum over rows sorted by cluster (much faster than add.at)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=len(centroids))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        filled = counts > 0
+        sums = np.zeros_like(centroids)
+        sums[filled] = np.add.reduceat(data[order], starts[filled], axis=0)
+        norms = np.linalg.norm(sums, axis=1)
+        # Empty clusters keep their previous centroid
+        filled &= norms > 0.0
+        centroids[filled] = sums[filled] / norms[filled, None]
+    return centroids
+
+
+class _Quantizer(NamedTuple):
+    """Centroids and their inverted lists, published together"""
+
+    centroids: Any
+    lists: List[Any]
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest neighbour index over a DenseIndex
+
+    Rows are clustered with spherical k-means; a query scores the centroids,
+    probes the ``nprobe`` closest lists and scores only their members. Until
+    ``train_size`` rows exist the index answers with an exact scan. New rows
+    are assigned to the nearest centroid on insert, and the quantizer is
+    retrained once the index has grown ``retrain_factor`` times since the
+    last training so lists stay balanced.
+
+    Training and inserts build new centroids/lists and publish them as one
+    ``_Quantizer``; lists are never modified in place, so a concurrent
+    search keeps working on the snapshot it started with.
+    """
+
+    def __init__(
+        self,
+        dense: DenseIndex,
+        nprobe: int = 8,
+        train_size: int = 50000,
+        nlist: int = 0,
+        retrain_factor: float = 4.0,
+        seed: int = 0,
+    ):
+        """
+        Initialize index
+
+        Args:
+            dense: Backing vector matrix (rows are shared, not copied)
+            nprobe: Lists probed per query (recall/latency knob)
+            train_size: Rows required before clustering kicks in
+            nlist: Number of lists (0 = ``sqrt(rows)`` at training time)
+            retrain_factor: Growth ratio that triggers retraining
+            seed: Random seed for k-means
+        """
+        if nprobe <= 0:
+            raise ValueError("nprobe must be positive")
+        self.dense = dense
+        self.nprobe = nprobe
+        self.train_size = max(1, train_size)
+        self.nlist = nlist
+        self.retrain_factor = retrain_factor
+        self.seed = seed
+        self._quantizer: Any = None
+        self._trained_rows = 0
+
+    @property
+    def trained(self) -> bool:
+        """True once the coarse quantizer has been built"""
+        return self._quantizer is not None
+
+    @property
+    def centroids(self) -> Any:
+        """``(nlist, dim)`` centroid matrix, or None before training"""
+        quantizer = self._quantizer
+        return quantizer.centroids if quantizer is not None else None
+
+    @property
+    def lists(self) -> List[Any]:
+        """Row ids per centroid (int64 arrays)"""
+        quantizer = self._quantizer
+        return quantizer.lists if quantizer is not None else []
+
+    def train(self) -> None:
+        """Cluster all current rows and rebuild the inverted lists"""
+        vectors = self.dense.vectors
+        if len(vectors) == 0:
+            return
+        nlist = self.nlist or int(math.sqrt(len(vectors)))
+        nlist = max(1, min(nlist, len(vectors)))
+
+        # Bound training cost: k-means on a sample, then assign every row
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(vectors), nlist * 64)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = train_kmeans(sample, nlist, seed=self.seed)
+
+        empty = [np.zeros(0, dtype=np.int64)] * len(centroids)
+        lists = self._assign(centroids, empty, 0, vectors)
+        self._quantizer = _Quantizer(centroids, lists)
+        self._trained_rows = len(vectors)
+
+    def add(self, start_row: int, vectors: "np.ndarray") -> None:
+        """
+        Register rows appended to the backing DenseIndex
+
+        Args:
+            start_row: Row id of ``vectors[0]`` in the DenseIndex
+            vectors: Newly appended vectors
+        """
+        total = len(self.dense)
+        if not self.trained:
+            if total >= self.train_size:
+                self.train()
+            return
+        if total >= self._trained_rows * self.retrain_factor:
+            self.train()
+            return
+        quantizer = self._quantizer
+        lists = self._assign(quantizer.centroids, quantizer.lists, start_row, vectors)
+        self._quantizer = _Quantizer(quantizer.centroids, lists)
+
+    @staticmethod
+    def _assign(
+        centroids: "np.ndarray",
+        lists: List["np.ndarray"],
+        start_row: int,
+        vectors: "np.ndarray",
+    ) -> List["np.ndarray"]:
+        """Return copies of ``lists`` with ``vectors`` added to their lists."""
+        lists = list(lists)
+        if len(vectors) == 0:
+            return lists
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        rows = np.arange(start_row, start_row + len(vectors), dtype=np.int64)
+        for list_id in np.unique(assignments).tolist():
+            lists[list_id] = np.concatenate(
+                [lists[list_id], rows[assignments == list_id]]
+            )
+        return lists
+
+    def search(
+        self, query: "np.ndarray", k: int, nprobe: int = 0
+    ) -> List[Tuple[int, float]]:
+        """
+        Approximate top-k search
+
+        Args:
+            query: ``(dim,)`` query vector
+            k: Number of rows to return
+            nprobe: Override for the number of probed lists
+
+        Returns:
+            ``(row, score)`` pairs with positive score, best first
+        """
+        quantizer = self._quantizer
+        if quantizer is None:
+            return self.dense.search(query, k)
+        if k <= 0:
+            return []
+
+        nprobe = min(nprobe or self.nprobe, len(quantizer.centroids))
+        # Rank every centroid: lists behind a non-positive centroid can
+        # still hold positive matches
+        probe = np.argsort(-(quantizer.centroids @ query), kind="stable")[:nprobe]
+
+        rows = np.concatenate([quantizer.lists[int(list_id)] for list_id in probe])
+        if len(rows) == 0:
+            return []
+        # Read after the quantizer: the matrix covers every listed row
+        scores = self.dense.vectors[rows] @ query
+        return [(int(rows[i]), score) for i, score in select_top_k(scores, k)]
+
+
+def recall_at_k(
+    exact: Sequence[Tuple[int, float]], approx: Sequence[Tuple[int, float]]
+) -> float:
+    """
+    Fraction of exact top-k rows recovered by an approximate search
+
+    Args:
+        exact: Ground-truth ``(row, score)`` pairs
+        approx: Approximate ``(row, score)`` pairs
+
+    Returns:
+        Recall in ``[0, 1]`` (1.0 when ``exact`` is empty)
+    """
+    if not exact:
+        return 1.0
+    expected = {row for row, _ in exact}
+    return len(expected.intersection(row for row, _ in approx)) / len(expected)
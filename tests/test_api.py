@@ -213,6 +213,52 @@ class TestAPIIntegration:
         assert search_result["status"] == "success"
         assert "answer" in search_result
 
+    def test_multi_store_search(self, authenticated_client):
+        """Test one search across several stores"""
+        for store, text in [
+            ("fed-hr", b"Vacation requests go through the HR portal."),
+            ("fed-it", b"Vacation laptops must be locked away."),
+        ]:
+            files = {"file": (f"{store}.txt", BytesIO(text), "text/plain")}
+            response = authenticated_client.post(
+                "/upload", files=files, data={"store": store}
+            )
+            assert response.status_code == 200
+
+        response = authenticated_client.post(
+            "/api/search",
+            json={"query": "vacation", "store_names": ["fed-hr", "fed-it"]},
+        )
+        assert response.status_code == 200
+        result = response.json()
+        assert result["store"] == "fed-hr,fed-it"
+        assert len(result["sources"]) == 2
+
+        response = authenticated_client.post(
+            "/api/search", json={"query": "vacation", "store_names": ["fed-none"]}
+        )
+        assert response.status_code == 404
+
+    def test_retrieve_mode_has_own_cache_entry(self, authenticated_client):
+        """Test retrieval-only search over the API"""
+        files = {"file": ("kb.txt", BytesIO(b"Retrieval skips generation."))}
+        authenticated_client.post("/upload", files=files, data={"store": "kb"})
+
+        body = {"query": "retrieval generation", "store_name": "kb"}
+        answer = authenticated_client.post("/api/search", json=body).json()
+        chunks = authenticated_client.post(
+            "/api/search", json={**body, "mode": "retrieve"}
+        ).json()
+
+        assert answer["answer"] and answer["chunks"] is None
+        assert chunks["mode"] == "retrieve" and chunks["answer"] is None
+        assert chunks["chunks"][0]["text"] == "Retrieval skips generation."
+
+        response = authenticated_client.post(
+            "/api/search/stream", json={**body, "mode": "retrieve"}
+        )
+        assert response.status_code == 400
+
     def test_metrics_after_operations(self, authenticated_client):
         """Test metrics after performing operations"""
         # Get metrics
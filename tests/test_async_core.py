@@ -0,0 +1,247 @@
+"""
+Tests for the asyncio SDK class
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from flamehaven_filesearch import AsyncFlamehavenFileSearch
+from flamehaven_filesearch.quota import QuotaScheduler
+from flamehaven_filesearch.routing import LocalFirstRouter
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    instance = AsyncFlamehavenFileSearch(allow_offline=True)
+    instance._sync._use_native_client = False
+    return instance
+
+
+@pytest.fixture
+def remote(offline, monkeypatch):
+    aio = MagicMock()
+    aio.file_search_stores.create = AsyncMock(
+        side_effect=lambda: SimpleNamespace(name="fileSearchStores/abc")
+    )
+    aio.file_search_stores.upload_to_file_search_store = AsyncMock(
+        return_value=SimpleNamespace(done=False)
+    )
+    aio.operations.get = AsyncMock(return_value=SimpleNamespace(done=True))
+    aio.file_search_stores.delete = AsyncMock()
+    chunk = SimpleNamespace(retrieved_context=SimpleNamespace(title="t", uri="u"))
+    aio.models.generate_content = AsyncMock(
+        return_value=SimpleNamespace(
+            text="A grounded answer from the async client.",
+            candidates=[
+                SimpleNamespace(
+                    grounding_metadata=SimpleNamespace(grounding_chunks=[chunk])
+                )
+            ],
+        )
+    )
+    monkeypatch.setattr(
+        "flamehaven_filesearch.core.google_genai_types", MagicMock(), raising=False
+    )
+    offline._sync._use_native_client = True
+    offline._sync.client = SimpleNamespace(aio=aio)
+    offline._sync._upload_poller.initial_interval = 0
+    return offline
+
+
+class TestAsyncLocalMode:
+    """Local fallback runs the sync implementation off the event loop"""
+
+    @pytest.mark.asyncio
+    async def test_upload_search_delete(self, offline, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_text("Async uploads index local documents.", encoding="utf-8")
+
+        upload = await offline.upload_file(str(path), store_name="docs")
+        assert upload["status"] == "success"
+        assert "docs" in offline.list_stores()
+
+        result = await offline.search("async uploads", store_name="docs")
+        assert result["status"] == "success"
+        assert result["sources"]
+
+        deleted = await offline.delete_store("docs")
+        assert deleted == {"status": "success", "store": "docs"}
+        await offline.close()
+
+    @pytest.mark.asyncio
+    async def test_context_manager_closes(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        async with AsyncFlamehavenFileSearch(allow_offline=True) as searcher:
+            closed = MagicMock()
+            searcher._sync.close = closed
+        closed.assert_called_once()
+
+    def test_rejects_non_positive_concurrency(self):
+        with pytest.raises(ValueError):
+            AsyncFlamehavenFileSearch(allow_offline=True, max_concurrent_uploads=0)
+
+
+class TestAsyncRemoteMode:
+    """Remote calls go through the google-genai aio client"""
+
+    @pytest.mark.asyncio
+    async def test_upload_polls_operation(self, remote, tmp_path):
+        path = tmp_path / "a.txt"
+        path.write_text("remote payload", encoding="utf-8")
+
+        result = await remote.upload_file(str(path), store_name="r")
+
+        assert result["status"] == "success"
+        assert remote.stores["r"] == "fileSearchStores/abc"
+        remote._aio.operations.get.assert_awaited_once()
+        again = await remote.upload_file(str(path), store_name="r")
+        assert again["status"] == "duplicate"
+
+    @pytest.mark.asyncio
+    async def test_batch_uploads_identical_files_once(self, remote, tmp_path):
+        paths = []
+        for index in range(4):
+            path = tmp_path / f"copy{index}.txt"
+            path.write_text("same async payload", encoding="utf-8")
+            paths.append(str(path))
+
+        result = await remote.upload_files(paths, store_name="r")
+
+        assert (result["success"], result["duplicates"]) == (1, 3)
+        upload = remote._aio.file_search_stores.upload_to_file_search_store
+        assert upload.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_upload_timeout(self, remote, tmp_path):
+        remote.config.upload_timeout_sec = 0
+        remote._aio.operations.get.return_value = SimpleNamespace(done=False)
+        path = tmp_path / "slow.txt"
+        path.write_text("slow payload", encoding="utf-8")
+
+        result = await remote.upload_file(str(path), store_name="r")
+        assert result == {"status": "error", "message": "Upload timeout"}
+
+    @pytest.mark.asyncio
+    async def test_upload_files_bounded_concurrency(self, remote, tmp_path):
+        remote.max_concurrent_uploads = 2
+        active = {"now": 0, "peak": 0}
+
+        async def slow_upload(**kwargs):
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.01)
+            active["now"] -= 1
+            return SimpleNamespace(done=True)
+
+        remote._aio.file_search_stores.upload_to_file_search_store.side_effect = (
+            slow_upload
+        )
+        paths = []
+        for i in range(5):
+            path = tmp_path / f"doc{i}.txt"
+            path.write_text(f"document {i}", encoding="utf-8")
+            paths.append(str(path))
+        paths.append(str(tmp_path / "missing.txt"))
+
+        result = await remote.upload_files(paths, store_name="batch")
+
+        assert result["success"] == 5
+        assert result["failed"] == 1
+        assert [r["file"] for r in result["results"]] == paths
+        assert active["peak"] == 2
+        remote._aio.file_search_stores.create.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_search_uses_async_generate(self, remote):
+        await remote.create_store("r")
+        result = await remote.search("what?", store_name="r")
+
+        assert result["status"] == "success"
+        assert result["sources"] == [{"title": "t", "uri": "u"}]
+        remote._aio.models.generate_content.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_search_errors(self, remote):
+        missing = await remote.search("what?", store_name="nope")
+        assert missing["status"] == "error"
+
+        await remote.create_store("r")
+        remote._aio.models.generate_content.side_effect = RuntimeError("boom")
+        failed = await remote.search("what?", store_name="r")
+        assert failed == {"status": "error", "message": "boom"}
+
+    @pytest.mark.asyncio
+    async def test_delete_store(self, remote):
+        await remote.create_store("r")
+        assert (await remote.delete_store("r"))["status"] == "success"
+        assert "r" not in remote.stores
+        remote._aio.file_search_stores.delete.assert_awaited_once_with(
+            name="fileSearchStores/abc"
+        )
+        assert (await remote.delete_store("r"))["status"] == "error"
+
+    @pytest.mark.asyncio
+    async def test_search_waits_for_quota_with_priority(self, remote):
+        await remote.create_store("r")
+        remote.config.gemini_queue_timeout_sec = 0.05
+        remote._sync._quotas = [QuotaScheduler(rpm=600, burst_sec=0.1)]
+        priorities = []
+        acquire = remote._acquire_quota
+
+        async def spy(slot, tokens, priority):
+            priorities.append(priority)
+            return await acquire(slot, tokens, priority)
+
+        remote._acquire_quota = spy
+
+        assert (await remote.search("one", store_name="r"))["status"] == "success"
+        second = await remote.search("two", store_name="r", priority=3)
+
+        assert "quota queue" in second["message"]
+        assert priorities == [0, 3]
+        remote._aio.models.generate_content.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_quota_waits_do_not_occupy_threads(self, remote, monkeypatch):
+        await remote.create_store("r")
+        remote._sync._quotas = [QuotaScheduler(rpm=1200, burst_sec=0.05)]
+        blocking = MagicMock(side_effect=AssertionError("blocking acquire"))
+        monkeypatch.setattr(remote._sync._quotas[0], "acquire", blocking)
+
+        results = await asyncio.gather(
+            *(remote.search(f"q{i}", store_name="r") for i in range(4))
+        )
+
+        assert [r["status"] for r in results] == ["success"] * 4
+        assert remote._sync._quotas[0].get_stats()["delayed"] >= 3
+
+    @pytest.mark.asyncio
+    async def test_routing_fallback_and_mirror_cleanup(self, remote, tmp_path):
+        remote.config.local_mirror = True
+        remote.config.local_first = True
+        remote._sync._router = LocalFirstRouter(min_score=0.5, min_margin=0.3)
+        for name, text in [
+            ("runbook.txt", "Runbook policy: restart the ingest worker on failover."),
+            ("holidays.txt", "Holiday policy: offices close on public holidays."),
+        ]:
+            path = tmp_path / name
+            path.write_text(text, encoding="utf-8")
+            assert (await remote.upload_file(str(path), "docs"))["status"] == "success"
+
+        local = await remote.search("ingest worker", store_name="docs")
+        assert local["route"] == "local"
+        remote._aio.models.generate_content.assert_not_awaited()
+
+        remote._aio.models.generate_content.side_effect = ConnectionError("503")
+        degraded = await remote.search("policy", store_name="docs")
+        assert degraded["degraded"] is True
+        assert remote.get_metrics()["routing"]["gemini"]["searches"] == 1
+        assert remote._sync.get_resilience_stats()["circuit"]["consecutive_failures"]
+
+        assert (await remote.delete_store("docs"))["status"] == "success"
+        assert "docs" not in remote._sync._local_stores
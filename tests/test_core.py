@@ -3,10 +3,16 @@ Tests for FLAMEHAVEN FileSearch core functionality
 """
 
 import os
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
 
 import pytest
 
 from flamehaven_filesearch import Config, FlamehavenFileSearch
+from flamehaven_filesearch.local_index import LocalStore, tokenize
 
 
 class TestConfig:
@@ -206,3 +212,211 @@ class TestFlamehavenFileSearchIntegration:
         result = searcher.upload_files(files, store_name="batch-test")
         assert result["status"] == "completed"
         assert result["success"] <= result["total"]
+
+
+class TestParallelUploadFiles:
+    """Test bounded-concurrency upload_files"""
+
+    @pytest.fixture
+    def remote(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        searcher = FlamehavenFileSearch(allow_offline=True)
+        searcher._use_native_client = True
+        searcher.client = MagicMock()
+        searcher.client.file_search_stores.create.return_value = SimpleNamespace(
+            name="fileSearchStores/batch"
+        )
+        return searcher
+
+    def test_concurrency_bound_and_input_order(self, remote, tmp_path):
+        lock = threading.Lock()
+        active = {"now": 0, "peak": 0}
+
+        def upload(file_search_store_name, file):
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            # Earlier files finish later, so completion order is reversed
+            time.sleep(0.02 * (6 - int(Path(file).stem[-1])))
+            with lock:
+                active["now"] -= 1
+            return SimpleNamespace(done=True)
+
+        remote.client.file_search_stores.upload_to_file_search_store.side_effect = (
+            upload
+        )
+        paths = []
+        for i in range(6):
+            path = tmp_path / f"doc{i}"
+            path.write_text(f"document {i}")
+            paths.append(str(path))
+
+        result = remote.upload_files(paths, store_name="batch", max_concurrency=3)
+
+        assert active["peak"] == 3
+        assert [r["file"] for r in result["results"]] == paths
+        assert result["success"] == 6
+        assert all(r["duration_sec"] > 0 for r in result["results"])
+        assert result["elapsed_sec"] < sum(r["duration_sec"] for r in result["results"])
+        remote.client.file_search_stores.create.assert_called_once()
+
+    def test_rejects_non_positive_concurrency(self, remote, tmp_path):
+        remote.config.upload_concurrency = 0
+        with pytest.raises(ValueError):
+            remote.upload_files([str(tmp_path / "a.txt")])
+
+    def test_local_mode_reports_timings(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        searcher = FlamehavenFileSearch(allow_offline=True)
+        searcher._use_native_client = False
+        good = tmp_path / "good.txt"
+        good.write_text("local batch")
+
+        result = searcher.upload_files([str(good), str(tmp_path / "missing.txt")])
+
+        assert [r["result"]["status"] for r in result["results"]] == [
+            "success",
+            "error",
+        ]
+        assert result["elapsed_sec"] >= max(
+            r["duration_sec"] for r in result["results"]
+        )
+
+
+class TestFederatedSearch:
+    """Test searching several stores in one call"""
+
+    @pytest.fixture
+    def local(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        searcher = FlamehavenFileSearch(allow_offline=True)
+        for store, text in [
+            ("hr", "Vacation requests go through the HR portal."),
+            ("it", "Vacation laptops must be locked in the office."),
+            ("ops", "Deploys happen on Tuesdays."),
+        ]:
+            path = tmp_path / f"{store}.txt"
+            path.write_text(text, encoding="utf-8")
+            searcher.upload_file(str(path), store_name=store)
+        yield searcher
+        searcher.close()
+
+    def test_local_fan_out_merges_hits(self, local):
+        result = local.search("vacation", store_names=["hr", "it", "hr", "ops"])
+
+        assert result["status"] == "success"
+        assert result["store"] == "hr,it,ops"
+        assert {source["title"] for source in result["sources"]} == {
+            "hr.txt",
+            "it.txt",
+        }
+        assert "HR portal" in result["answer"]
+        assert "laptops" in result["answer"]
+
+    def test_store_scores_are_normalised_before_merging(self, local):
+        small, big = LocalStore(), LocalStore()
+        filler = "the quarterly report covers budgets headcount and travel"
+        small.add_document("mention.txt", "/m", f"{filler} and one vacation note")
+        for i in range(9):
+            small.add_document(f"s{i}.txt", f"/s{i}", f"{filler} item {i}")
+        big.add_document("policy.txt", "/p", "vacation vacation vacation policy")
+        for i in range(40):
+            big.add_document(f"b{i}.txt", f"/b{i}", f"{filler} vacation {i}")
+
+        terms = tokenize("vacation")
+        # Raw scores favour the small store, where the term is rare
+        assert small.search(terms, 1)[0][2] > big.search(terms, 1)[0][2]
+
+        hits = local._rank_local([small, big], terms, 1)
+        assert hits[0][0] is big and hits[0][1] == 0  # policy.txt
+        # Rescaled onto the largest bound, so a single-store scale is kept
+        scale = max(small.max_score(terms), big.max_score(terms))
+        expected = big.search(terms, 1)[0][2] * scale / big.max_score(terms)
+        assert hits[0][3] == pytest.approx(expected)
+
+    def test_unknown_store_in_list(self, local):
+        result = local.search("vacation", store_names=["hr", "missing"])
+        assert result["status"] == "error"
+        assert "'missing' not found" in result["message"]
+
+    def test_remote_uses_single_call(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        types = MagicMock()
+        monkeypatch.setattr(
+            "flamehaven_filesearch.core.google_genai_types", types, raising=False
+        )
+        searcher = FlamehavenFileSearch(allow_offline=True)
+        searcher._use_native_client = True
+        searcher.client = MagicMock()
+        searcher.client.models.generate_content.return_value = SimpleNamespace(
+            text="Combined answer from both stores.",
+            candidates=[SimpleNamespace(grounding_metadata=None)],
+        )
+        searcher.stores.update(a="fileSearchStores/a", b="fileSearchStores/b")
+
+        result = searcher.search("q", store_names=["a", "b"])
+
+        assert result["store"] == "a,b"
+        searcher.client.models.generate_content.assert_called_once()
+        types.FileSearch.assert_called_with(
+            file_search_store_names=["fileSearchStores/a", "fileSearchStores/b"]
+        )
+
+        # Stores pinned to different API keys cannot share a call
+        searcher._store_keys.update(a=0, b=1)
+        result = searcher.search("q", store_names=["a", "b"])
+        assert result["status"] == "error"
+        assert "different API keys" in result["message"]
+        searcher.close()
+
+
+class TestRetrieveMode:
+    """Test retrieval-only search"""
+
+    def test_local_returns_ranked_chunks(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        searcher = FlamehavenFileSearch(allow_offline=True)
+        path = tmp_path / "policy.txt"
+        path.write_text("Vacation requests go through the HR portal.", "utf-8")
+        searcher.upload_file(str(path), store_name="hr")
+
+        result = searcher.search("vacation portal", store_name="hr", mode="retrieve")
+
+        assert result["mode"] == "retrieve"
+        assert "answer" not in result
+        assert result["chunks"][0]["text"].startswith("Vacation requests")
+        assert result["chunks"][0]["score"] > 0
+        assert result["sources"] == [{"title": "policy.txt", "uri": str(path)}]
+        with pytest.raises(ValueError):
+            searcher.search("q", store_name="hr", mode="summarize")
+        searcher.close()
+
+    def test_remote_caps_generation(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        types = MagicMock()
+        monkeypatch.setattr(
+            "flamehaven_filesearch.core.google_genai_types", types, raising=False
+        )
+        searcher = FlamehavenFileSearch(allow_offline=True)
+        searcher._use_native_client = True
+        searcher.client = MagicMock()
+        context = SimpleNamespace(text="Passage text", title="doc.pdf", uri="u1")
+        grounding = SimpleNamespace(
+            grounding_chunks=[SimpleNamespace(retrieved_context=context)] * 2
+        )
+        searcher.client.models.generate_content.return_value = SimpleNamespace(
+            text="OK", candidates=[SimpleNamespace(grounding_metadata=grounding)]
+        )
+        searcher.stores["docs"] = "fileSearchStores/docs"
+
+        result = searcher.search("q", store_name="docs", mode="retrieve")
+
+        assert (
+            result["chunks"]
+            == [{"text": "Passage text", "title": "doc.pdf", "uri": "u1"}] * 2
+        )
+        assert result["sources"] == [{"title": "doc.pdf", "uri": "u1"}]
+        config_kwargs = types.GenerateContentConfig.call_args.kwargs
+        assert config_kwargs["max_output_tokens"] <= 16
+        assert "system_instruction" in config_kwargs
+        searcher.close()
@@ -0,0 +1,191 @@
+"""
+Tests for content-hash upload deduplication
+"""
+
+import hashlib
+import os
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from flamehaven_filesearch import Config, FlamehavenFileSearch, dedup
+from flamehaven_filesearch.cache import FileMetadataCache
+from flamehaven_filesearch.dedup import ContentHashRegistry, sha256_file
+
+
+@pytest.fixture
+def searcher(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    instance = FlamehavenFileSearch(allow_offline=True)
+    instance._use_native_client = False
+    return instance
+
+
+class TestContentHashRegistry:
+    """Test digest computation and the metadata hot layer"""
+
+    def test_sha256_file_matches_hashlib(self, tmp_path):
+        path = tmp_path / "blob.bin"
+        path.write_bytes(b"x" * 3_000_000)
+        assert sha256_file(str(path)) == hashlib.sha256(b"x" * 3_000_000).hexdigest()
+
+    def test_unchanged_file_is_not_rehashed(self, tmp_path, monkeypatch):
+        path = tmp_path / "doc.txt"
+        path.write_text("first", encoding="utf-8")
+        registry = ContentHashRegistry(FileMetadataCache(maxsize=10))
+
+        calls = []
+        original = dedup.sha256_file
+        monkeypatch.setattr(
+            dedup, "sha256_file", lambda p: calls.append(p) or original(p)
+        )
+
+        first = registry.hash_file(str(path))
+        assert registry.hash_file(str(path)) == first
+        assert len(calls) == 1
+
+        path.write_text("second version", encoding="utf-8")
+        assert registry.hash_file(str(path)) != first
+        assert len(calls) == 2
+
+    def test_register_lookup_and_drop(self):
+        registry = ContentHashRegistry()
+        registry.register("docs", "abc", "a.txt")
+
+        assert registry.lookup("docs", "abc") == {"file": "a.txt"}
+        assert registry.lookup("other", "abc") is None
+        assert registry.get_stats()["stores"] == {"docs": 1}
+        registry.drop_store("docs")
+        assert registry.lookup("docs", "abc") is None
+
+
+class TestUploadDeduplication:
+    """Test duplicate detection in upload_file/upload_files"""
+
+    def test_identical_bytes_return_duplicate(self, searcher, tmp_path):
+        first = tmp_path / "a.txt"
+        second = tmp_path / "copy.txt"
+        first.write_text("same payload", encoding="utf-8")
+        second.write_text("same payload", encoding="utf-8")
+
+        assert searcher.upload_file(str(first), store_name="s")["status"] == "success"
+        result = searcher.upload_file(str(second), store_name="s")
+
+        assert result["status"] == "duplicate"
+        assert result["duplicate_of"] == "a.txt"
+        assert result["sha256"] == sha256_file(str(first))
+        assert len(searcher._local_stores["s"]) == 1
+
+        # Other stores keep their own registry
+        assert searcher.upload_file(str(second), store_name="t")["status"] == "success"
+
+    def test_upload_files_counts_duplicates(self, searcher, tmp_path):
+        paths = []
+        for name, text in (("a.txt", "one"), ("b.txt", "two"), ("c.txt", "one")):
+            path = tmp_path / name
+            path.write_text(text, encoding="utf-8")
+            paths.append(str(path))
+
+        result = searcher.upload_files(paths, store_name="batch")
+        assert (result["success"], result["duplicates"], result["failed"]) == (
+            2,
+            1,
+            0,
+        )
+
+    def test_delete_store_and_disabled_dedup(self, searcher, tmp_path, monkeypatch):
+        path = tmp_path / "a.txt"
+        path.write_text("payload", encoding="utf-8")
+        searcher.upload_file(str(path), store_name="s")
+        searcher.delete_store("s")
+        assert searcher.upload_file(str(path), store_name="s")["status"] == "success"
+
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        plain = FlamehavenFileSearch(
+            config=Config(dedup_uploads=False), allow_offline=True
+        )
+        plain._use_native_client = False
+        plain.upload_file(str(path), store_name="s")
+        assert plain.upload_file(str(path), store_name="s")["status"] == "success"
+
+    def test_remote_duplicate_skips_transfer(self, searcher, tmp_path):
+        client = MagicMock()
+        client.file_search_stores.upload_to_file_search_store.return_value = MagicMock(
+            done=True
+        )
+        searcher._use_native_client = True
+        searcher.client = client
+
+        path = tmp_path / "a.txt"
+        path.write_text("remote payload", encoding="utf-8")
+        assert searcher.upload_file(str(path), store_name="r")["status"] == "success"
+        assert searcher.upload_file(str(path), store_name="r")["status"] == "duplicate"
+        assert client.file_search_stores.upload_to_file_search_store.call_count == 1
+
+    def test_remote_batch_uploads_each_content_once(self, searcher, tmp_path):
+        client = MagicMock()
+        upload = client.file_search_stores.upload_to_file_search_store
+
+        def slow_upload(**kwargs):
+            time.sleep(0.05)  # keep the copies in flight together
+            return MagicMock(done=True)
+
+        upload.side_effect = slow_upload
+        searcher._use_native_client = True
+        searcher.client = client
+
+        paths = []
+        for index in range(4):
+            path = tmp_path / f"copy{index}.txt"
+            path.write_text("same remote payload", encoding="utf-8")
+            paths.append(str(path))
+        unique = tmp_path / "unique.txt"
+        unique.write_text("other payload", encoding="utf-8")
+        paths.append(str(unique))
+
+        result = searcher.upload_files(paths, store_name="r", max_concurrency=8)
+
+        assert (result["success"], result["duplicates"], result["failed"]) == (
+            2,
+            3,
+            0,
+        )
+        assert upload.call_count == 2
+        statuses = [item["result"]["status"] for item in result["results"]]
+        assert statuses == ["success", "duplicate", "duplicate", "duplicate", "success"]
+
+    def test_remote_batch_retries_next_copy_after_failure(self, searcher, tmp_path):
+        client = MagicMock()
+        upload = client.file_search_stores.upload_to_file_search_store
+        upload.side_effect = [ConnectionError("reset"), MagicMock(done=True)]
+        searcher._use_native_client = True
+        searcher.client = client
+
+        paths = []
+        for index in range(3):
+            path = tmp_path / f"copy{index}.txt"
+            path.write_text("flaky payload", encoding="utf-8")
+            paths.append(str(path))
+
+        result = searcher.upload_files(paths, store_name="r")
+
+        statuses = [item["result"]["status"] for item in result["results"]]
+        assert statuses == ["error", "success", "duplicate"]
+        assert upload.call_count == 2
+
+    def test_registry_rebuilt_from_persisted_store(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        monkeypatch.setattr("flamehaven_filesearch.core.google_genai", None)
+        config = Config(local_store_dir=str(tmp_path / "stores"))
+        path = tmp_path / "a.txt"
+        path.write_text("persisted payload", encoding="utf-8")
+
+        FlamehavenFileSearch(config=config, allow_offline=True).upload_file(
+            str(path), store_name="p"
+        )
+        restarted = FlamehavenFileSearch(config=config, allow_offline=True)
+        result = restarted.upload_file(str(path), store_name="p")
+        assert result["status"] == "duplicate"
+        assert os.path.exists(tmp_path / "stores" / "p" / "manifest.json")
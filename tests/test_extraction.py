@@ -0,0 +1,187 @@
+"""
+Tests for PDF/DOCX text extraction and the extraction process pool
+"""
+
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from flamehaven_filesearch import Config, FlamehavenFileSearch, extraction
+from flamehaven_filesearch.exceptions import FileProcessingError
+from flamehaven_filesearch.extraction import TextExtractor, extract_text
+
+_DOCUMENT_XML = (
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/'
+    'wordprocessingml/2006/main"><w:body>'
+    "{paragraphs}</w:body></w:document>"
+)
+
+
+def stuck_extract(file_path):
+    """Stand-in for extract_text that hangs (runs in a worker process)"""
+    with open(file_path + ".pid", "w") as marker:
+        marker.write(str(os.getpid()))
+    time.sleep(60)
+
+
+def make_docx(path, *paragraphs):
+    body = "".join(
+        f"<w:p><w:r><w:t>{text}</w:t><w:tab/><w:t>end</w:t></w:r></w:p>"
+        for text in paragraphs
+    )
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", _DOCUMENT_XML.format(paragraphs=body))
+    return str(path)
+
+
+class TestExtractText:
+    """Test format-specific parsers"""
+
+    def test_docx_paragraphs(self, tmp_path):
+        path = make_docx(tmp_path / "memo.docx", "Quarterly review", "Budget")
+        assert extract_text(path) == "Quarterly review\tend\nBudget\tend"
+
+    def test_plain_text_and_unknown_extensions(self, tmp_path):
+        (tmp_path / "a.md").write_text("# Title", encoding="utf-8")
+        (tmp_path / "b.log").write_bytes(b"ok \xff line")
+        assert extract_text(str(tmp_path / "a.md")) == "# Title"
+        assert extract_text(str(tmp_path / "b.log")) == "ok  line"
+
+    def test_corrupt_docx_and_missing_pdf_backend(self, tmp_path, monkeypatch):
+        broken = tmp_path / "broken.docx"
+        broken.write_bytes(b"not a zip archive")
+        with pytest.raises(FileProcessingError, match="Failed to extract"):
+            extract_text(str(broken))
+
+        monkeypatch.setattr(extraction, "PdfReader", None)
+        pdf = tmp_path / "scan.pdf"
+        pdf.write_bytes(b"%PDF-1.4")
+        with pytest.raises(FileProcessingError, match="pypdf"):
+            extract_text(str(pdf))
+
+
+class TestTextExtractor:
+    """Test the process-pool extraction stage"""
+
+    def test_extract_many_uses_worker_processes(self, tmp_path):
+        paths = [
+            make_docx(tmp_path / "one.docx", "alpha"),
+            str(tmp_path / "two.txt"),
+            make_docx(tmp_path / "three.docx", "gamma"),
+        ]
+        (tmp_path / "two.txt").write_text("beta", encoding="utf-8")
+
+        extractor = TextExtractor(workers=2, timeout_sec=60)
+        try:
+            results = {i: (text, err) for i, text, err in extractor.extract_many(paths)}
+        finally:
+            extractor.shutdown()
+
+        assert results == {
+            0: ("alpha\tend", None),
+            1: ("beta", None),
+            2: ("gamma\tend", None),
+        }
+
+    def test_timeout_reports_error_and_replaces_pool(self, tmp_path, monkeypatch):
+        path = make_docx(tmp_path / "slow.docx", "never parsed")
+        extractor = TextExtractor(workers=1, timeout_sec=0.05)
+        resets = []
+        monkeypatch.setattr(extractor, "_submit", lambda _path: (Future(), None))
+        monkeypatch.setattr(
+            extractor, "_reset_pool", lambda *args, **kwargs: resets.append(kwargs)
+        )
+
+        [(index, text, error)] = list(extractor.extract_many([path]))
+        assert (index, text) == (0, None)
+        assert "timed out" in error
+        assert resets == [{"terminate": True}]
+        with pytest.raises(FileProcessingError, match="timed out"):
+            extractor.extract(path)
+
+    def test_timeout_terminates_stuck_worker(self, tmp_path, monkeypatch):
+        warm = make_docx(tmp_path / "warm.docx", "ready")
+        stuck = make_docx(tmp_path / "stuck.docx", "never parsed")
+        extractor = TextExtractor(workers=1, timeout_sec=60)
+        try:
+            # Start the worker first so the timeout only measures the hang
+            assert extractor.extract(warm) == "ready\tend"
+            extractor.timeout_sec = 1
+            monkeypatch.setattr(extraction, "extract_text", stuck_extract)
+            [(_, text, error)] = list(extractor.extract_many([stuck]))
+            assert text is None and "timed out" in error
+
+            with open(stuck + ".pid") as marker:
+                pid = int(marker.read())
+            deadline = time.monotonic() + 5
+            while any(p.pid == pid for p in multiprocessing.active_children()):
+                assert time.monotonic() < deadline, "stuck worker still running"
+                time.sleep(0.05)
+            assert extractor._executor is None
+        finally:
+            extractor.shutdown()
+
+    def test_files_lost_with_a_pool_are_retried(self, tmp_path, monkeypatch):
+        path = make_docx(tmp_path / "retry.docx", "second try")
+        extractor = TextExtractor(workers=1)
+        lost = Future()
+        lost.set_exception(BrokenProcessPool("pool replaced"))
+        attempts = []
+
+        def submit(file_path):
+            attempts.append(file_path)
+            if len(attempts) == 1:
+                return lost, None
+            return None  # fall back to inline parsing
+
+        monkeypatch.setattr(extractor, "_submit", submit)
+        assert list(extractor.extract_many([path])) == [(0, "second try\tend", None)]
+        assert len(attempts) == 2
+
+    def test_broken_pool_falls_back_to_inline(self, tmp_path, monkeypatch):
+        path = make_docx(tmp_path / "memo.docx", "inline")
+        extractor = TextExtractor(workers=1)
+
+        def broken_pool():
+            raise BrokenProcessPool("worker died")
+
+        monkeypatch.setattr(extractor, "_pool", broken_pool)
+        assert extractor.extract(path) == "inline\tend"
+
+
+class TestSearcherExtraction:
+    """Test that local uploads index extracted text"""
+
+    def test_docx_upload_is_searchable(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+        searcher = FlamehavenFileSearch(
+            config=Config(extract_workers=1), allow_offline=True
+        )
+        searcher._use_native_client = False
+        broken = tmp_path / "broken.docx"
+        broken.write_bytes(b"garbage")
+        paths = [make_docx(tmp_path / "plan.docx", "Turbine inspection"), str(broken)]
+
+        try:
+            result = searcher.upload_files(paths, store_name="docs")
+            single = searcher.upload_file(str(broken), store_name="docs")
+            answer = searcher.search("turbine inspection", store_name="docs")
+        finally:
+            searcher.close()
+
+        assert (result["success"], result["failed"]) == (1, 1)
+        assert result["results"][1]["result"]["status"] == "error"
+        assert single["status"] == "error"
+        assert answer["sources"][0]["title"] == "plan.docx"
+
+    def test_config_validates_extraction_settings(self):
+        with pytest.raises(ValueError, match="extract_timeout_sec"):
+            Config(api_key="k", extract_timeout_sec=0).validate()
+        with pytest.raises(ValueError, match="extract_workers"):
+            Config(api_key="k", extract_workers=-1).validate()
@@ -0,0 +1,84 @@
+"""
+Tests for extractive local answer synthesis
+"""
+
+import pytest
+
+from flamehaven_filesearch import FlamehavenFileSearch, extractive
+from flamehaven_filesearch.extractive import ExtractiveAnswerBuilder, split_sentences
+
+PASSAGES = [
+    "The reactor cooling loop failed twice in March. Engineers replaced "
+    "the primary pump. The cafeteria menu changed.",
+    "Cooling loop failures are logged in the maintenance system.\n\n"
+    "Parking permits renew each January.",
+]
+
+
+class TestExtractiveAnswerBuilder:
+    """Test sentence scoring and answer assembly"""
+
+    def test_split_sentences(self):
+        assert split_sentences("One.  Two!\n\nThree\nstill three? ") == [
+            "One.",
+            "Two!",
+            "Three still three?",
+        ]
+
+    def test_picks_relevant_sentences_with_citations(self):
+        answer, cited = ExtractiveAnswerBuilder().build(
+            "Why did the cooling loop fail?", PASSAGES
+        )
+
+        assert answer.startswith("The reactor cooling loop failed twice in March. [1]")
+        assert "maintenance system. [2]" in answer
+        assert "cafeteria" not in answer and "Parking" not in answer
+        assert cited == [0, 1]
+
+    def test_bounds_and_redundancy(self):
+        repeated = ["Cooling loop failed. Cooling loop failed again."] * 3
+        answer, _ = ExtractiveAnswerBuilder(max_sentences=5).build(
+            "cooling loop", repeated
+        )
+        assert answer == "Cooling loop failed. [1]"
+
+        long_sentence = "cooling " * 200
+        answer, _ = ExtractiveAnswerBuilder(max_chars=120).build(
+            "cooling", [long_sentence]
+        )
+        assert len(answer) <= 120
+        assert answer.endswith("... [1]")
+
+    def test_no_match_returns_empty(self):
+        assert ExtractiveAnswerBuilder().build("turbine", PASSAGES) == ("", [])
+        with pytest.raises(ValueError):
+            ExtractiveAnswerBuilder(max_sentences=0)
+
+    def test_python_fallback_matches_numpy(self, monkeypatch):
+        if extractive.np is None:
+            pytest.skip("NumPy not installed")
+        builder = ExtractiveAnswerBuilder()
+        expected = builder.build("primary pump cooling", PASSAGES)
+        monkeypatch.setattr(extractive, "np", None)
+        assert builder.build("primary pump cooling", PASSAGES) == expected
+
+
+class TestLocalSearchAnswers:
+    """Test extractive answers in offline search"""
+
+    def test_offline_answer_cites_sources(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        searcher = FlamehavenFileSearch(allow_offline=True)
+        for name, text in [("incident.txt", PASSAGES[0]), ("log.txt", PASSAGES[1])]:
+            path = tmp_path / name
+            path.write_text(text, encoding="utf-8")
+            searcher.upload_file(str(path), store_name="ops")
+
+        result = searcher.search("cooling loop failures", store_name="ops")
+
+        titles = [source["title"] for source in result["sources"]]
+        for index, title in enumerate(titles, start=1):
+            assert f"[{index}]" in result["answer"]
+        assert set(titles) == {"incident.txt", "log.txt"}
+        assert "cafeteria" not in result["answer"]
+        searcher.close()
@@ -0,0 +1,237 @@
+"""
+Tests for the background upload job queue
+"""
+
+import io
+import sqlite3
+import threading
+import time
+from io import BytesIO
+
+import pytest
+
+from flamehaven_filesearch import api
+from flamehaven_filesearch.jobs import (
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_SUCCEEDED,
+    UploadJobQueue,
+)
+
+
+def wait_for(queue, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in (JOB_SUCCEEDED, JOB_FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+class TestUploadJobQueue:
+    """Test job persistence, worker bounds and recovery"""
+
+    def test_job_succeeds_and_spool_is_removed(self, tmp_path):
+        seen = []
+
+        def handler(file_path, store):
+            with open(file_path, "rb") as handle:
+                seen.append((handle.read(), store))
+            return {"status": "success", "file": file_path}
+
+        jobs = UploadJobQueue(handler, db_path=str(tmp_path / "jobs.db"))
+        try:
+            job = jobs.submit(io.BytesIO(b"payload"), "a.txt", "docs")
+            assert job["status"] in (JOB_QUEUED, "running", JOB_SUCCEEDED)
+            done = wait_for(jobs, job["job_id"])
+        finally:
+            jobs.shutdown()
+
+        assert done["status"] == JOB_SUCCEEDED
+        assert done["result"]["status"] == "success"
+        assert done["attempts"] == 1
+        assert seen == [(b"payload", "docs")]
+        assert not (jobs.spool_dir / job["job_id"]).exists()
+        assert jobs.get_stats()["jobs"] == {JOB_SUCCEEDED: 1}
+
+    def test_failed_result_and_exception(self, tmp_path):
+        def handler(file_path, store):
+            if store == "boom":
+                raise RuntimeError("handler crashed")
+            return {"status": "error", "message": "Upload timeout"}
+
+        jobs = UploadJobQueue(handler, db_path=str(tmp_path / "jobs.db"))
+        try:
+            error = jobs.submit(io.BytesIO(b"x"), "a.txt", "docs")
+            crash = jobs.submit(io.BytesIO(b"y"), "b.txt", "boom")
+            error_job = wait_for(jobs, error["job_id"])
+            crash_job = wait_for(jobs, crash["job_id"])
+        finally:
+            jobs.shutdown()
+
+        assert error_job["status"] == JOB_FAILED
+        assert error_job["error"] == "Upload timeout"
+        assert crash_job["status"] == JOB_FAILED
+        assert crash_job["error"] == "handler crashed"
+        assert jobs.get("missing") is None
+
+    def test_worker_concurrency_is_bounded(self, tmp_path):
+        lock = threading.Lock()
+        active = {"now": 0, "peak": 0}
+
+        def handler(file_path, store):
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.05)
+            with lock:
+                active["now"] -= 1
+            return {"status": "success"}
+
+        jobs = UploadJobQueue(handler, db_path=str(tmp_path / "jobs.db"), workers=2)
+        try:
+            ids = [
+                jobs.submit(io.BytesIO(b"x"), f"{i}.txt", "s")["job_id"]
+                for i in range(6)
+            ]
+            for job_id in ids:
+                assert wait_for(jobs, job_id)["status"] == JOB_SUCCEEDED
+        finally:
+            jobs.shutdown()
+        assert active["peak"] == 2
+
+    def test_interrupted_jobs_resume_on_restart(self, tmp_path):
+        db_path = str(tmp_path / "jobs.db")
+        release = threading.Event()
+
+        def blocked(file_path, store):
+            release.wait(5)
+            return {"status": "success"}
+
+        first = UploadJobQueue(blocked, db_path=db_path, workers=1)
+        running = first.submit(io.BytesIO(b"1"), "a.txt", "s")["job_id"]
+        queued = first.submit(io.BytesIO(b"2"), "b.txt", "s")["job_id"]
+        lost = first.submit(io.BytesIO(b"3"), "c.txt", "s")["job_id"]
+        while first.get(running)["status"] == JOB_QUEUED:
+            time.sleep(0.01)
+
+        # A live queue's jobs are left alone
+        other = UploadJobQueue(lambda path, store: {}, db_path=db_path)
+        assert other.get(queued)["status"] == JOB_QUEUED
+        other.shutdown()
+
+        # Simulate a crash: heartbeats stop and the lease runs out
+        first._closed = True
+        first._stop.set()
+        first._heartbeat_thread.join()
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("UPDATE upload_jobs SET heartbeat_at = 0")
+        (first.spool_dir / lost / "c.txt").unlink()
+
+        restarted = UploadJobQueue(
+            lambda path, store: {"status": "success"}, db_path=db_path
+        )
+        try:
+            assert wait_for(restarted, queued)["status"] == JOB_SUCCEEDED
+            assert wait_for(restarted, running)["attempts"] == 2
+            assert restarted.get(lost)["error"] == "Spooled file missing"
+        finally:
+            release.set()
+            restarted.shutdown()
+        # The crashed queue's late result does not overwrite the takeover
+        time.sleep(0.05)
+        assert restarted.get(running)["attempts"] == 2
+
+    def test_shutdown_releases_queued_jobs(self, tmp_path):
+        db_path = str(tmp_path / "jobs.db")
+        release = threading.Event()
+
+        def blocked(file_path, store):
+            release.wait(5)
+            return {"status": "success"}
+
+        first = UploadJobQueue(blocked, db_path=db_path, workers=1)
+        running = first.submit(io.BytesIO(b"1"), "a.txt", "s")["job_id"]
+        queued = first.submit(io.BytesIO(b"2"), "b.txt", "s")["job_id"]
+        while first.get(running)["status"] == JOB_QUEUED:
+            time.sleep(0.01)
+        release.set()
+        first.shutdown()
+        assert first.get(running)["status"] == JOB_SUCCEEDED
+
+        restarted = UploadJobQueue(
+            lambda path, store: {"status": "success"}, db_path=db_path
+        )
+        try:
+            assert wait_for(restarted, queued)["status"] == JOB_SUCCEEDED
+        finally:
+            restarted.shutdown()
+
+    def test_heartbeat_adopts_expired_jobs(self, tmp_path):
+        db_path = str(tmp_path / "jobs.db")
+        dead = UploadJobQueue(lambda p, s: {}, db_path=db_path)
+        dead._closed = True
+        dead._stop.set()
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                "INSERT INTO upload_jobs (id, store, filename, file_path, status, "
+                "created_at, owner, heartbeat_at) "
+                "VALUES ('j1', 's', 'a.txt', ?, 'running', 0, 'gone', ?)",
+                (str(tmp_path / "jobs.db"), time.time()),
+            )
+
+        adopter = UploadJobQueue(
+            lambda path, store: {"status": "success"}, db_path=db_path, lease_sec=0.2
+        )
+        try:
+            assert adopter.get("j1")["status"] == "running"
+            assert wait_for(adopter, "j1")["status"] == JOB_SUCCEEDED
+        finally:
+            adopter.shutdown()
+
+    def test_submit_after_shutdown_rejected(self, tmp_path):
+        jobs = UploadJobQueue(lambda p, s: {}, db_path=str(tmp_path / "jobs.db"))
+        jobs.shutdown()
+        with pytest.raises(RuntimeError):
+            jobs.submit(io.BytesIO(b"x"), "a.txt", "s")
+
+    def test_rejects_non_positive_workers(self, tmp_path):
+        with pytest.raises(ValueError):
+            UploadJobQueue(lambda p, s: {}, db_path=str(tmp_path / "j.db"), workers=0)
+        with pytest.raises(ValueError):
+            UploadJobQueue(lambda p, s: {}, db_path=str(tmp_path / "j.db"), lease_sec=0)
+
+
+class TestUploadJobEndpoints:
+    """Test the 202 upload endpoint and job status API"""
+
+    @pytest.fixture
+    def job_client(self, client, tmp_path, monkeypatch):
+        monkeypatch.setenv("JOB_DB_PATH", str(tmp_path / "jobs.db"))
+        monkeypatch.setattr(api, "upload_jobs", None)
+        yield client
+        if api.upload_jobs is not None:
+            api.upload_jobs.shutdown()
+            api.upload_jobs = None
+
+    def test_upload_returns_202_and_job_completes(self, job_client):
+        files = {"file": ("jobs.txt", BytesIO(b"Queued upload body"), "text/plain")}
+        response = job_client.post(
+            "/api/upload/jobs", files=files, data={"store": "jobs"}
+        )
+
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        assert response.json()["filename"] == "jobs.txt"
+
+        job = wait_for(api.upload_jobs, job_id)
+        assert job["status"] == JOB_SUCCEEDED
+
+        status = job_client.get(f"/api/jobs/{job_id}")
+        assert status.status_code == 200
+        assert status.json()["result"]["status"] == "success"
+
+    def test_unknown_job_returns_404(self, job_client):
+        response = job_client.get("/api/jobs/does-not-exist")
+        assert response.status_code == 404
@@ -0,0 +1,149 @@
+"""
+Tests for pooled Gemini API keys
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from flamehaven_filesearch import FlamehavenFileSearch
+from flamehaven_filesearch.config import Config
+from flamehaven_filesearch.key_pool import (
+    ApiKeyPool,
+    KeyCooldownError,
+    is_rate_limit_error,
+    parse_key_entry,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class QuotaError(Exception):
+    """Stand-in for google.genai.errors.ClientError"""
+
+    code = 429
+
+
+class TestApiKeyPool:
+    """Test routing, weights and cool-down"""
+
+    def test_parse_entries(self):
+        assert parse_key_entry("AIzaKey") == ("AIzaKey", 1.0)
+        assert parse_key_entry(" AIzaKey:3 ") == ("AIzaKey", 3.0)
+        with pytest.raises(ValueError):
+            parse_key_entry("AIzaKey:zero")
+
+    def test_weighted_least_loaded_assignment(self):
+        pool = ApiKeyPool(["k1:1", "k2:2"])
+        assignments = [pool.assign() for _ in range(6)]
+        assert assignments.count(1) == 4
+        assert assignments.count(0) == 2
+
+        pool.unassign(1)
+        assert pool.get_stats()[1]["stores"] == 3
+
+    def test_rate_limit_cools_key_down(self):
+        clock = FakeClock()
+        pool = ApiKeyPool(["key-aaaa", "key-bbbb"], cooldown_sec=30, clock=clock)
+
+        with pytest.raises(QuotaError):
+            pool.call(0, MagicMock(side_effect=QuotaError("quota")))
+        with pytest.raises(KeyCooldownError, match="aaaa"):
+            pool.check(0)
+        assert [pool.assign() for _ in range(2)] == [1, 1]
+
+        clock.now = 31
+        pool.check(0)
+        stats = pool.get_stats()[0]
+        assert stats["rate_limits"] == 1
+        assert stats["inflight"] == 0
+        assert stats["key"] == "...aaaa"
+
+    def test_other_errors_do_not_cool_down(self):
+        pool = ApiKeyPool(["k1"])
+        with pytest.raises(ValueError):
+            pool.call(0, MagicMock(side_effect=ValueError("bad request")))
+        pool.check(0)
+        assert not is_rate_limit_error(ValueError("bad request"))
+        assert is_rate_limit_error(RuntimeError("429 RESOURCE_EXHAUSTED"))
+
+    def test_config_pool_from_env(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+        monkeypatch.setenv("GEMINI_API_KEYS", "first:2, second")
+        config = Config.from_env()
+        assert config.api_keys == ["first:2", "second"]
+        assert config.api_key == "first"
+        assert config.validate()
+
+
+class TestCoreKeyRouting:
+    """Test store affinity in FlamehavenFileSearch"""
+
+    @pytest.fixture
+    def pooled(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        monkeypatch.setattr(
+            "flamehaven_filesearch.core.google_genai_types", MagicMock(), raising=False
+        )
+        searcher = FlamehavenFileSearch(
+            config=Config(api_keys=["key-one", "key-two"]), allow_offline=True
+        )
+        searcher._use_native_client = True
+        searcher._clients = []
+        for index in range(2):
+            client = MagicMock()
+            client.file_search_stores.create.return_value = SimpleNamespace(
+                name=f"fileSearchStores/{index}"
+            )
+            client.models.generate_content.return_value = SimpleNamespace(
+                text=f"answer from key {index}",
+                candidates=[SimpleNamespace(grounding_metadata=None)],
+            )
+            client.file_search_stores.upload_to_file_search_store.return_value = (
+                SimpleNamespace(done=False)
+            )
+            client.operations.get.return_value = SimpleNamespace(done=True)
+            searcher._clients.append(client)
+        searcher._upload_poller.initial_interval = 0.01
+        yield searcher
+        searcher.close()
+
+    def test_stores_spread_and_calls_follow_owner(self, pooled, tmp_path):
+        assert pooled.create_store("a") == "fileSearchStores/0"
+        assert pooled.create_store("b") == "fileSearchStores/1"
+
+        assert pooled.search("q", store_name="b")["answer"] == "answer from key 1"
+        pooled._clients[0].models.generate_content.assert_not_called()
+
+        path = tmp_path / "doc.txt"
+        path.write_text("payload", encoding="utf-8")
+        assert pooled.upload_file(str(path), store_name="b")["status"] == "success"
+        pooled._clients[1].operations.get.assert_called_once()
+        pooled._clients[0].operations.get.assert_not_called()
+
+        assert pooled.delete_store("b")["status"] == "success"
+        pooled._clients[1].file_search_stores.delete.assert_called_once()
+        assert pooled.get_metrics()["api_keys"][1]["stores"] == 0
+
+    def test_rate_limited_owner_fails_fast(self, pooled):
+        pooled.create_store("a")
+        models = pooled._clients[0].models
+        models.generate_content.side_effect = QuotaError("429 quota")
+
+        assert pooled.search("q", store_name="a")["status"] == "error"
+        result = pooled.search("q2", store_name="a")
+
+        assert "cooling down" in result["message"]
+        assert models.generate_content.call_count == 1
+        # New stores go to the healthy key
+        assert pooled.create_store("c") == "fileSearchStores/1"
@@ -0,0 +1,201 @@
+"""
+Tests for the local fallback retrieval index
+"""
+
+import pytest
+
+from flamehaven_filesearch import FlamehavenFileSearch
+from flamehaven_filesearch.content_blob import ContentBlob
+from flamehaven_filesearch.local_index import (
+    InvertedIndex,
+    LocalStore,
+    chunk_text,
+    tokenize,
+)
+
+
+class TestTokenize:
+    """Test tokenizer"""
+
+    def test_lowercases_and_splits_on_punctuation(self):
+        assert tokenize("Hello, World! v1.2") == ["hello", "world", "v1", "2"]
+
+    def test_empty_text(self):
+        assert tokenize("") == []
+
+
+class TestInvertedIndex:
+    """Test postings maintenance and candidate lookup"""
+
+    def test_add_records_term_frequencies(self):
+        index = InvertedIndex()
+        index.add(0, "alpha beta alpha")
+
+        assert index.postings["alpha"] == {0: 2}
+        assert index.postings["beta"] == {0: 1}
+        assert index.doc_lengths[0] == 3
+        assert len(index) == 1
+
+    def test_bm25_prefers_rare_terms_and_higher_frequency(self):
+        index = InvertedIndex()
+        index.add(0, "common common words here")
+        index.add(1, "common rare rare words")
+        index.add(2, "common words only")
+
+        ranked = index.search(["common", "rare"], k=3)
+        assert [doc_id for doc_id, _ in ranked] == [1, 0, 2]
+        assert ranked[0][1] > ranked[1][1] > ranked[2][1] > 0
+
+    def test_search_bounds_results_to_k(self):
+        index = InvertedIndex()
+        for doc_id in range(20):
+            index.add(doc_id, f"shared term number {doc_id}")
+
+        ranked = index.search(["shared"], k=3)
+        assert len(ranked) == 3
+        # Equal scores resolve to insertion order
+        assert [doc_id for doc_id, _ in ranked] == [0, 1, 2]
+
+    def test_search_unknown_terms_and_empty_index(self):
+        index = InvertedIndex()
+        assert index.search(["alpha"], k=5) == []
+
+        index.add(0, "alpha")
+        assert index.search(["missing"], k=5) == []
+        assert index.search(["alpha"], k=0) == []
+
+
+class TestPassages:
+    """Test passage chunking and passage-level retrieval"""
+
+    def test_chunk_text_overlaps_and_respects_word_boundaries(self):
+        text = " ".join(f"word{i}" for i in range(200))
+        spans = chunk_text(text, size=100, overlap=30)
+
+        assert spans[0][0] == 0
+        assert spans[-1][1] == len(text)
+        for (start, end), (next_start, _) in zip(spans, spans[1:]):
+            assert end - start <= 100
+            assert next_start < end  # consecutive passages overlap
+            assert text[end] == " "
+            assert text[next_start - 1] == " "
+
+    def test_chunk_text_edge_cases(self):
+        assert chunk_text("", size=10, overlap=2) == []
+        assert chunk_text("short", size=10, overlap=2) == [(0, 5)]
+        # A single long token is hard-split
+        assert chunk_text("x" * 25, size=10, overlap=0) == [(0, 10), (10, 20), (20, 25)]
+        with pytest.raises(ValueError):
+            chunk_text("text", size=0, overlap=0)
+
+    def test_local_store_returns_best_passage_per_document(self):
+        store = LocalStore(passage_size=60, passage_overlap=10)
+        filler = "lorem ipsum dolor sit amet " * 10
+        store.add_document("a.txt", "/a.txt", filler + "turbine vibration alarm")
+        store.add_document("b.txt", "/b.txt", "turbine overview " + filler)
+
+        assert len(store) == 2
+        assert len(store.passages) > 2
+
+        results = store.search(tokenize("turbine vibration"), k=5)
+        assert [doc_id for doc_id, _, _ in results] == [0, 1]
+        doc_id, passage_id, _ = results[0]
+        assert "vibration" in store.passage_text(passage_id)
+        assert store.passages[passage_id][0] == doc_id
+        assert store.search(["turbine"], k=0) == []
+
+    def test_passages_decode_from_blob_with_multibyte_text(self):
+        store = LocalStore(passage_size=12, passage_overlap=0)
+        text = "café naïve über straße ok"
+        store.add_document("u.txt", "/u.txt", text)
+
+        assert "content" not in store.documents[0]
+        assert store.document_text(0) == text
+        decoded = [store.passage_text(pid) for pid in range(len(store.passages))]
+        assert " ".join(p.strip() for p in decoded).split() == text.split()
+        store.close()
+
+
+class TestContentBlob:
+    """Test the memory-mapped content blob"""
+
+    def test_append_and_zero_copy_view(self):
+        blob = ContentBlob()
+        first = blob.append("héllo".encode("utf-8"))
+        assert blob.text(first, 6) == "héllo"
+
+        # Reads beyond the current map trigger a remap
+        second = blob.append(b" world")
+        view = blob.view(second, 6)
+        assert isinstance(view, memoryview)
+        assert bytes(view) == b" world"
+        assert blob.text(0, 0) == ""
+        with pytest.raises(IndexError):
+            blob.view(second, 100)
+        view.release()
+        blob.close()
+
+    def test_reopen_truncates_uncommitted_tail(self, tmp_path):
+        path = str(tmp_path / "content.blob")
+        blob = ContentBlob(path)
+        blob.append(b"committed")
+        blob.sync()
+        blob.append(b"partial")
+        blob.close()
+
+        reopened = ContentBlob(path, size=9)
+        assert len(reopened) == 9
+        assert reopened.text(0, 9) == "committed"
+        reopened.close()
+
+
+class TestLocalSearch:
+    """Test local fallback search through the index"""
+
+    @pytest.fixture
+    def searcher(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+        searcher = FlamehavenFileSearch(allow_offline=True)
+        searcher._use_native_client = False
+        return searcher
+
+    def test_search_only_returns_indexed_matches(self, searcher, tmp_path):
+        for name, text in [
+            ("a.txt", "The reactor cooling loop failed twice."),
+            ("b.txt", "Quarterly revenue grew in every region."),
+        ]:
+            path = tmp_path / name
+            path.write_text(text, encoding="utf-8")
+            assert searcher.upload_file(str(path), store_name="idx")["status"] == (
+                "success"
+            )
+
+        result = searcher.search("cooling loop", store_name="idx")
+        assert result["status"] == "success"
+        assert [s["title"] for s in result["sources"]] == ["a.txt"]
+        assert "cooling loop" in result["answer"]
+
+    def test_multi_word_query_scores_per_term(self, searcher, tmp_path):
+        for name, text in [
+            ("pump.txt", "The pump failed. Later the valve was replaced."),
+            ("valve.txt", "Valve maintenance schedule."),
+            ("other.txt", "Unrelated notes."),
+        ]:
+            path = tmp_path / name
+            path.write_text(text, encoding="utf-8")
+            searcher.upload_file(str(path), store_name="multi")
+
+        result = searcher.search("pump valve", store_name="multi")
+        titles = [s["title"] for s in result["sources"]]
+        assert titles[0] == "pump.txt"
+        assert "valve.txt" in titles
+        assert "other.txt" not in titles
+
+    def test_delete_store_drops_index(self, searcher, tmp_path):
+        path = tmp_path / "doc.txt"
+        path.write_text("indexed content", encoding="utf-8")
+        searcher.upload_file(str(path), store_name="tmp")
+
+        searcher.delete_store("tmp")
+        assert "tmp" not in searcher._local_stores
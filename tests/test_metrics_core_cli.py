@@ -143,6 +143,17 @@ def test_cli_requires_api_key(monkeypatch, capsys):
     assert "Error: GEMINI_API_KEY or GOOGLE_API_KEY must be set" in output
 
 
+def test_cli_rejects_workers_with_local_store_dir(monkeypatch, capsys, tmp_path):
+    monkeypatch.setenv("GEMINI_API_KEY", "dummy-key")
+    monkeypatch.setenv("WORKERS", "4")
+    monkeypatch.setenv("LOCAL_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(sys, "argv", ["flamehaven-api"])
+    with pytest.raises(SystemExit) as excinfo:
+        api_main()
+    assert excinfo.value.code == 1
+    assert "LOCAL_STORE_DIR requires WORKERS=1" in capsys.readouterr().out
+
+
 def test_cli_invokes_uvicorn(monkeypatch):
     monkeypatch.setenv("GEMINI_API_KEY", "dummy-key")
     monkeypatch.setattr(sys, "argv", ["flamehaven-api"])
@@ -8,6 +8,8 @@ import time
 
 import pytest
 
+from flamehaven_filesearch.extractive import ExtractiveAnswerBuilder
+
 
 class TestResponseTimes:
     """Test API endpoint response times"""
@@ -358,5 +360,25 @@ class TestErrorRateUnderLoad:
         assert error_rate < 0.01, f"High error rate: {error_rate * 100:.1f}%"
 
 
+class TestExtractiveLatency:
+    """Test extractive answer synthesis stays cheap"""
+
+    @pytest.mark.slow
+    def test_extractive_answer_latency(self):
+        """Test a 100-sentence answer builds in under 10ms"""
+        passages = [
+            " ".join(f"Sentence {i} mentions cooling loop item {j}." for j in range(20))
+            for i in range(5)
+        ]
+        builder = ExtractiveAnswerBuilder()
+
+        start = time.perf_counter()
+        for _ in range(20):
+            builder.build("cooling loop item 7", passages)
+        elapsed = (time.perf_counter() - start) / 20
+
+        assert elapsed < 0.01, f"Answer took {elapsed * 1000:.1f}ms (expected <10ms)"
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "-m", "not slow"])
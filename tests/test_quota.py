@@ -0,0 +1,223 @@
+"""
+Tests for the client-side Gemini quota scheduler
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from flamehaven_filesearch import FlamehavenFileSearch
+from flamehaven_filesearch.config import Config
+from flamehaven_filesearch.quota import QuotaScheduler, QuotaTimeoutError, TokenBucket
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+    """Test refill, debt and refunds"""
+
+    def test_refills_at_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, burst_sec=2, clock=clock)  # 1/s, capacity 2
+        bucket.take(2)
+        assert bucket.delay(1) == pytest.approx(1.0)
+        clock.now = 1.5
+        assert bucket.delay(1) == 0.0
+
+    def test_oversized_request_waits_for_full_bucket_then_borrows(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, burst_sec=2, clock=clock)
+        assert bucket.delay(10) == 0.0  # capped at capacity
+        bucket.take(10)
+        assert bucket.tokens == -8
+        assert bucket.delay(1) == pytest.approx(9.0)
+        bucket.refund(100)
+        assert bucket.tokens == 2
+
+
+class TestQuotaScheduler:
+    """Test pacing, priority order and timeouts"""
+
+    def test_disabled_scheduler_never_waits(self):
+        scheduler = QuotaScheduler()
+        assert not scheduler.enabled
+        assert scheduler.acquire(10_000) == 0.0
+        assert scheduler.try_acquire(10_000)
+
+    def test_burst_is_smoothed_to_rate(self):
+        waits = []
+        scheduler = QuotaScheduler(rpm=1200, burst_sec=0.05, on_wait=waits.append)
+        start = time.monotonic()
+        for _ in range(5):
+            scheduler.acquire()
+        elapsed = time.monotonic() - start
+
+        # 20 requests/s with a one-request bucket: four paced gaps of 50 ms
+        assert elapsed >= 0.18
+        assert len(waits) == 5
+        stats = scheduler.get_stats()
+        assert stats["admitted"] == 5
+        assert stats["delayed"] >= 4
+        assert stats["queued"] == 0
+
+    def test_higher_priority_served_first(self):
+        scheduler = QuotaScheduler(rpm=600, burst_sec=0.1)  # one request / 100 ms
+        scheduler.acquire()  # drain the bucket
+        order = []
+
+        def worker(priority):
+            scheduler.acquire(priority=priority)
+            order.append(priority)
+
+        low = threading.Thread(target=worker, args=(0,))
+        low.start()
+        while scheduler.get_stats()["queued"] < 1:
+            time.sleep(0.001)
+        high = threading.Thread(target=worker, args=(10,))
+        high.start()
+        while scheduler.get_stats()["queued"] < 2:
+            time.sleep(0.001)
+        low.join()
+        high.join()
+
+        assert order == [10, 0]
+
+    def test_timeout_leaves_queue(self):
+        scheduler = QuotaScheduler(tpm=60, burst_sec=1)  # 1 token / s
+        scheduler.acquire(1)
+        with pytest.raises(QuotaTimeoutError):
+            scheduler.acquire(1, timeout=0.05)
+        stats = scheduler.get_stats()
+        assert stats["timeouts"] == 1
+        assert stats["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_async_waiters_share_the_priority_queue(self):
+        scheduler = QuotaScheduler(rpm=600, burst_sec=0.1)  # one request / 100 ms
+        await scheduler.acquire_async()  # drain the bucket
+        order = []
+
+        async def waiter(priority):
+            await scheduler.acquire_async(priority=priority)
+            order.append(priority)
+
+        low = asyncio.ensure_future(waiter(0))
+        await asyncio.sleep(0.01)
+        high = asyncio.ensure_future(waiter(10))
+        await asyncio.gather(low, high)
+        assert order == [10, 0]
+
+        with pytest.raises(QuotaTimeoutError):
+            await scheduler.acquire_async(timeout=0.02)
+        stats = scheduler.get_stats()
+        assert (stats["admitted"], stats["timeouts"], stats["queued"]) == (3, 1, 0)
+
+    def test_try_acquire_and_reconcile(self):
+        scheduler = QuotaScheduler(tpm=600, burst_sec=1)  # capacity 10 tokens
+        assert scheduler.try_acquire(8)
+        assert not scheduler.try_acquire(8)
+        scheduler.reconcile(reserved=8, actual=2)  # refund 6
+        assert scheduler.try_acquire(8)
+
+    def test_rejects_negative_budget(self):
+        with pytest.raises(ValueError):
+            QuotaScheduler(rpm=-1)
+        with pytest.raises(ValueError):
+            Config(gemini_tpm=-5).validate(require_api_key=False)
+
+
+class TestCoreQuota:
+    """Test core search pacing"""
+
+    @pytest.fixture
+    def remote(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        monkeypatch.setattr(
+            "flamehaven_filesearch.core.google_genai_types", MagicMock(), raising=False
+        )
+        config = Config(
+            gemini_rpm=600, gemini_quota_burst_sec=0.1, gemini_queue_timeout_sec=0.05
+        )
+        searcher = FlamehavenFileSearch(config=config, allow_offline=True)
+        searcher._use_native_client = True
+        searcher.client = MagicMock()
+        searcher.client.models.generate_content.return_value = SimpleNamespace(
+            text="A grounded answer.",
+            candidates=[SimpleNamespace(grounding_metadata=None)],
+            usage_metadata=SimpleNamespace(total_token_count=42),
+        )
+        searcher.stores["docs"] = "fileSearchStores/docs"
+        yield searcher
+        searcher.close()
+
+    def test_queue_timeout_returns_error_without_calling_gemini(self, remote):
+        waits = []
+        remote.set_quota_wait_observer(waits.append)
+
+        assert remote.search("first", store_name="docs")["status"] == "success"
+        result = remote.search("second", store_name="docs")
+
+        assert result["status"] == "error"
+        assert "quota queue" in result["message"]
+        assert remote.client.models.generate_content.call_count == 1
+        assert len(waits) == 1
+        assert remote.get_metrics()["quota"]["timeouts"] == 1
+
+    def test_stream_waits_for_quota(self, remote):
+        remote.search("first", store_name="docs")
+        events = list(remote.search_stream("second", store_name="docs"))
+        assert events == [
+            {
+                "event": "error",
+                "status": "error",
+                "message": "Gemini quota queue wait exceeded 0.05s",
+            }
+        ]
+        remote.client.models.generate_content_stream.assert_not_called()
+
+    def test_each_key_has_its_own_weighted_budget(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        monkeypatch.setattr(
+            "flamehaven_filesearch.core.google_genai_types", MagicMock(), raising=False
+        )
+        config = Config(
+            api_keys=["key-one", "key-two:2"],
+            gemini_rpm=600,
+            gemini_quota_burst_sec=0.1,
+            gemini_queue_timeout_sec=0.05,
+        )
+        searcher = FlamehavenFileSearch(config=config, allow_offline=True)
+        searcher._use_native_client = True
+        client = MagicMock()
+        client.models.generate_content.return_value = SimpleNamespace(
+            text="A grounded answer.",
+            candidates=[SimpleNamespace(grounding_metadata=None)],
+        )
+        searcher._clients = [client, client]
+        searcher.stores.update(one="fileSearchStores/one", two="fileSearchStores/two")
+        searcher._store_keys.update(one=0, two=1)
+        try:
+            # Key one holds a single request of burst, key two (weight 2) two
+            assert searcher.search("a", store_name="one")["status"] == "success"
+            assert searcher.search("b", store_name="one")["status"] == "error"
+            assert searcher.search("c", store_name="two")["status"] == "success"
+            assert searcher.search("d", store_name="two")["status"] == "success"
+
+            stats = searcher.get_quota_stats()
+            assert [key["admitted"] for key in stats["keys"]] == [1, 2]
+            assert stats["admitted"] == 3
+            assert stats["timeouts"] == 1
+        finally:
+            searcher.close()
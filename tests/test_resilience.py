@@ -0,0 +1,282 @@
+"""
+Tests for the Gemini resilience layer (deadline, hedging, circuit breaker)
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from flamehaven_filesearch import FlamehavenFileSearch
+from flamehaven_filesearch.config import Config
+from flamehaven_filesearch.metrics import MetricsCollector, gemini_circuit_state
+from flamehaven_filesearch.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    ResilientCaller,
+    is_upstream_failure,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def response(text="Grounded answer from Gemini."):
+    return SimpleNamespace(
+        text=text, candidates=[SimpleNamespace(grounding_metadata=None)]
+    )
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions"""
+
+    def test_opens_after_threshold_and_probes_after_timeout(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+        breaker.record_failure()
+        assert breaker.state == "closed"
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+        clock.now = 10
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+        assert not breaker.allow()  # only one probe at a time
+
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        clock.now = 20
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.get_stats() == {
+            "state": "closed",
+            "consecutive_failures": 0,
+            "opens": 2,
+            "rejected": 2,
+        }
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == "closed"
+
+    def test_latency_percentile(self):
+        tracker = LatencyTracker()
+        assert tracker.percentile(95) is None
+        for ms in range(1, 101):
+            tracker.record(ms / 1000)
+        assert tracker.percentile(95) == 0.095
+        assert tracker.percentile(50, min_samples=200) is None
+
+
+class TestResilientCaller:
+    """Test deadlines, hedging and breaker integration"""
+
+    def test_deadline_raises_timeout_and_counts_failure(self):
+        release = threading.Event()
+        caller = ResilientCaller(deadline_sec=0.05, hedge_percentile=0)
+        try:
+            with pytest.raises(TimeoutError):
+                caller.call(release.wait)
+            assert caller.get_stats()["timeouts"] == 1
+            assert caller.breaker.get_stats()["consecutive_failures"] == 1
+        finally:
+            release.set()
+            caller.shutdown()
+
+    def test_slow_primary_is_hedged(self):
+        caller = ResilientCaller(deadline_sec=5, hedge_min_samples=5)
+        for _ in range(5):
+            caller.latency.record(0.01)
+        attempts = []
+        release = threading.Event()
+
+        def upstream():
+            attempts.append(threading.current_thread().name)
+            if len(attempts) == 1:
+                release.wait(5)  # the primary hangs
+                return "primary"
+            return "hedge"
+
+        try:
+            started = time.monotonic()
+            assert caller.call(upstream) == "hedge"
+            assert time.monotonic() - started < 1
+            stats = caller.get_stats()
+            assert stats["hedges"] == 1
+            assert stats["hedge_wins"] == 1
+        finally:
+            release.set()
+            caller.shutdown()
+
+    def test_hedge_gate_can_veto_duplicate(self):
+        caller = ResilientCaller(deadline_sec=1, hedge_min_samples=1)
+        caller.latency.record(0.001)
+        upstream = MagicMock(side_effect=lambda: time.sleep(0.05) or "primary")
+        try:
+            assert caller.call(upstream, hedge_gate=lambda: False) == "primary"
+            assert upstream.call_count == 1
+            assert caller.get_stats()["hedges"] == 0
+        finally:
+            caller.shutdown()
+
+    def test_no_hedge_before_enough_samples(self):
+        caller = ResilientCaller(deadline_sec=1)
+        try:
+            assert caller.hedge_delay() is None
+            assert caller.call(lambda: "ok") == "ok"
+            assert caller.get_stats()["hedges"] == 0
+        finally:
+            caller.shutdown()
+
+    def test_errors_open_circuit_then_fail_fast(self):
+        caller = ResilientCaller(
+            deadline_sec=1, breaker=CircuitBreaker(failure_threshold=2)
+        )
+        upstream = MagicMock(side_effect=ConnectionError("503"))
+        try:
+            for _ in range(2):
+                with pytest.raises(ConnectionError):
+                    caller.call(upstream)
+            with pytest.raises(CircuitOpenError):
+                caller.call(upstream)
+            assert upstream.call_count == 2
+        finally:
+            caller.shutdown()
+
+    def test_client_errors_do_not_open_circuit(self):
+        class ApiError(Exception):
+            def __init__(self, code):
+                super().__init__(f"{code} error")
+                self.code = code
+
+        assert is_upstream_failure(ApiError(503))
+        assert is_upstream_failure(TimeoutError())
+        assert not is_upstream_failure(ApiError(400))
+        assert not is_upstream_failure(ApiError(429))
+        assert not is_upstream_failure(ValueError("bad model"))
+
+        caller = ResilientCaller(
+            deadline_sec=1, breaker=CircuitBreaker(failure_threshold=2)
+        )
+        try:
+            for code in (404, 429, 400):
+                with pytest.raises(ApiError):
+                    caller.call(MagicMock(side_effect=ApiError(code)))
+            stats = caller.get_stats()["circuit"]
+            assert stats["state"] == "closed"
+            assert stats["consecutive_failures"] == 0
+        finally:
+            caller.shutdown()
+
+    def test_client_error_releases_half_open_probe(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+        assert breaker.allow()
+        breaker.record_outcome(ValueError("bad request"))
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+
+    def test_rejects_invalid_settings(self):
+        with pytest.raises(ValueError):
+            ResilientCaller(deadline_sec=0)
+        with pytest.raises(ValueError):
+            ResilientCaller(hedge_percentile=100)
+        with pytest.raises(ValueError):
+            Config(gemini_breaker_threshold=0).validate(require_api_key=False)
+
+
+class TestCoreResilience:
+    """Test core search behaviour while Gemini is unhealthy"""
+
+    @pytest.fixture
+    def remote(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        monkeypatch.setattr(
+            "flamehaven_filesearch.core.google_genai_types", MagicMock(), raising=False
+        )
+        config = Config(gemini_breaker_threshold=1, local_mirror=True)
+        searcher = FlamehavenFileSearch(config=config, allow_offline=True)
+        searcher._use_native_client = True
+        searcher.client = MagicMock()
+        searcher.client.file_search_stores.create.return_value = SimpleNamespace(
+            name="fileSearchStores/docs"
+        )
+        searcher.client.file_search_stores.upload_to_file_search_store.return_value = (
+            SimpleNamespace(done=True)
+        )
+        yield searcher
+        searcher.close()
+
+    def test_open_circuit_falls_back_to_local_mirror(self, remote, tmp_path):
+        path = tmp_path / "runbook.txt"
+        path.write_text("Failover procedure: restart the ingest worker.", "utf-8")
+        assert remote.upload_file(str(path), store_name="docs")["status"] == "success"
+
+        remote.client.models.generate_content.side_effect = ConnectionError("503")
+        first = remote.search("failover procedure", store_name="docs")
+        assert first["degraded"] is True
+        assert "restart the ingest worker" in first["answer"]
+
+        # Circuit is now open: Gemini is no longer called
+        second = remote.search("failover procedure", store_name="docs")
+        assert second["degraded"] is True
+        assert remote.client.models.generate_content.call_count == 1
+        assert remote.get_resilience_stats()["circuit"]["state"] == "open"
+
+        events = list(remote.search_stream("failover procedure", store_name="docs"))
+        assert [e["event"] for e in events] == ["token", "sources", "done"]
+        remote.client.models.generate_content_stream.assert_not_called()
+
+    def test_open_circuit_without_mirror_fails_fast(self, remote):
+        remote.stores["other"] = "fileSearchStores/other"
+        remote.client.models.generate_content.side_effect = ConnectionError("503")
+        assert remote.search("q", store_name="other") == {
+            "status": "error",
+            "message": "503",
+        }
+        result = remote.search("q", store_name="other")
+        assert result == {"status": "error", "message": "Gemini circuit is open"}
+
+    def test_healthy_search_uses_gemini(self, remote):
+        remote.stores["docs"] = "fileSearchStores/docs"
+        remote.client.models.generate_content.return_value = response()
+        result = remote.search("q", store_name="docs")
+        assert result["status"] == "success"
+        assert "degraded" not in result
+        assert remote.get_resilience_stats()["calls"] == 1
+
+    def test_delete_store_drops_mirror(self, remote, tmp_path):
+        path = tmp_path / "a.txt"
+        path.write_text("mirrored text", encoding="utf-8")
+        remote.upload_file(str(path), store_name="docs")
+        assert "docs" in remote._local_stores
+
+        assert remote.delete_store("docs")["status"] == "success"
+        assert "docs" not in remote._local_stores
+
+    def test_breaker_state_exported(self, remote):
+        remote.stores["docs"] = "fileSearchStores/docs"
+        remote.client.models.generate_content.side_effect = ConnectionError("503")
+        remote.search("q", store_name="docs")
+
+        MetricsCollector.update_gemini_resilience(remote.get_resilience_stats())
+        assert gemini_circuit_state._value.get() == 2
@@ -0,0 +1,157 @@
+"""
+Tests for confidence-based local-first routing
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from flamehaven_filesearch import FlamehavenFileSearch
+from flamehaven_filesearch.config import Config
+from flamehaven_filesearch.metrics import MetricsCollector, search_route_total
+from flamehaven_filesearch.routing import DEFAULT_MIN_SCORES, LocalFirstRouter
+
+
+def _remote_searcher(monkeypatch, tmp_path, **overrides):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setattr(
+        "flamehaven_filesearch.core.google_genai_types", MagicMock(), raising=False
+    )
+    config = Config(local_mirror=True, local_first=True, **overrides)
+    searcher = FlamehavenFileSearch(config=config, allow_offline=True)
+    searcher._use_native_client = True
+    searcher.client = MagicMock()
+    searcher.client.file_search_stores.create.return_value = SimpleNamespace(
+        name="fileSearchStores/docs"
+    )
+    searcher.client.file_search_stores.upload_to_file_search_store.return_value = (
+        SimpleNamespace(done=True)
+    )
+    searcher.client.models.generate_content.return_value = SimpleNamespace(
+        text="Generated answer from Gemini.",
+        candidates=[SimpleNamespace(grounding_metadata=None)],
+    )
+    for name, text in [
+        ("runbook.txt", "Runbook policy: restart the ingest worker on failover."),
+        ("holidays.txt", "Holiday policy: offices close on public holidays."),
+    ]:
+        path = tmp_path / name
+        path.write_text(text, encoding="utf-8")
+        searcher.upload_file(str(path), store_name="docs")
+    return searcher
+
+
+class TestLocalFirstRouter:
+    """Test the score/margin gate and statistics"""
+
+    def test_confidence_requires_score_and_margin(self):
+        router = LocalFirstRouter(min_score=2.0, min_margin=0.5)
+        assert router.confident([4.0])
+        assert router.confident([4.0, 2.0])
+        assert not router.confident([4.0, 2.5])  # lead too small
+        assert not router.confident([1.5])  # score too low
+        assert not router.confident([])
+
+    def test_stats_and_observer(self):
+        observed = []
+        router = LocalFirstRouter(on_route=lambda *args: observed.append(args))
+        router.record("local", 0.002)
+        router.record("local", 0.004)
+        router.record("gemini", 1.5)
+
+        stats = router.get_stats()
+        assert stats["local"] == {
+            "searches": 2,
+            "share": 0.6667,
+            "avg_latency_sec": 0.003,
+        }
+        assert stats["gemini"]["avg_latency_sec"] == 1.5
+        assert observed[-1] == ("gemini", 1.5)
+
+    def test_rejects_invalid_settings(self):
+        with pytest.raises(ValueError):
+            LocalFirstRouter(min_margin=1.0)
+        with pytest.raises(ValueError):
+            Config(local_first=True).validate(require_api_key=False)
+        with pytest.raises(ValueError):
+            Config(local_first_min_score=-1).validate(require_api_key=False)
+        with pytest.raises(ValueError):
+            Config(local_retrieval="dense", local_first_min_score=5.0).validate(
+                require_api_key=False
+            )
+
+    def test_default_threshold_follows_backend(self, monkeypatch):
+        monkeypatch.delenv("LOCAL_FIRST_MIN_SCORE", raising=False)
+        assert Config.from_env().local_first_min_score is None
+        monkeypatch.setenv("LOCAL_FIRST_MIN_SCORE", "2.5")
+        assert Config.from_env().local_first_min_score == 2.5
+
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        for retrieval in ("bm25", "dense"):
+            searcher = FlamehavenFileSearch(
+                config=Config(local_retrieval=retrieval), allow_offline=True
+            )
+            expected = DEFAULT_MIN_SCORES[searcher._local_retrieval]
+            assert searcher._router.min_score == expected
+            searcher.close()
+
+
+class TestCoreLocalFirst:
+    """Test routing inside FlamehavenFileSearch.search"""
+
+    @pytest.fixture
+    def remote(self, monkeypatch, tmp_path):
+        searcher = _remote_searcher(
+            monkeypatch,
+            tmp_path,
+            local_first_min_score=0.5,
+            local_first_min_margin=0.3,
+        )
+        yield searcher
+        searcher.close()
+
+    def test_clear_lookup_stays_local(self, remote):
+        result = remote.search("ingest worker", store_name="docs")
+
+        assert result["route"] == "local"
+        assert "restart the ingest worker" in result["answer"]
+        assert result["sources"][0]["title"] == "runbook.txt"
+        remote.client.models.generate_content.assert_not_called()
+
+    def test_ambiguous_query_escalates(self, remote):
+        result = remote.search("policy", store_name="docs")
+
+        assert result["answer"] == "Generated answer from Gemini."
+        assert "route" not in result
+        remote.client.models.generate_content.assert_called_once()
+
+    def test_dense_mirror_answers_locally_with_default_threshold(
+        self, monkeypatch, tmp_path
+    ):
+        pytest.importorskip("numpy")
+        searcher = _remote_searcher(monkeypatch, tmp_path, local_retrieval="dense")
+        try:
+            local = searcher.search("restart ingest worker", store_name="docs")
+            assert local["route"] == "local"
+            assert local["sources"][0]["title"] == "runbook.txt"
+            searcher.client.models.generate_content.assert_not_called()
+
+            escalated = searcher.search("policy", store_name="docs")
+            assert "route" not in escalated
+            searcher.client.models.generate_content.assert_called_once()
+        finally:
+            searcher.close()
+
+    def test_routing_split_is_reported(self, remote):
+        remote.search("ingest worker", store_name="docs")
+        remote.search("policy", store_name="docs")
+        remote.search("policy", store_name="docs", mode="retrieve")
+
+        routing = remote.get_metrics()["routing"]
+        assert routing["local"]["searches"] == 1
+        assert routing["gemini"]["searches"] == 1
+
+        before = search_route_total.labels(route="local")._value.get()
+        MetricsCollector.record_search_route("local", 0.01)
+        assert search_route_total.labels(route="local")._value.get() == before + 1
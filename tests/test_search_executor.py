@@ -0,0 +1,91 @@
+"""
+Tests for the bounded API search executor
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from flamehaven_filesearch import Config
+from flamehaven_filesearch.exceptions import ServiceUnavailableError
+from flamehaven_filesearch.search_executor import SearchExecutor
+
+
+class TestSearchExecutor:
+    """Test concurrency limits, queue bounds and loop responsiveness"""
+
+    @pytest.mark.asyncio
+    async def test_run_returns_result_and_resets_counters(self):
+        executor = SearchExecutor(max_concurrency=2)
+        try:
+            result = await executor.run(lambda a, b=0: a + b, 2, b=3)
+        finally:
+            executor.shutdown()
+
+        assert result == 5
+        stats = executor.get_stats()
+        assert (stats["queued"], stats["inflight"]) == (0, 0)
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit_is_respected(self):
+        executor = SearchExecutor(max_concurrency=2, max_queue=0)
+        lock = threading.Lock()
+        active = {"now": 0, "peak": 0}
+
+        def blocking_search():
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.05)
+            with lock:
+                active["now"] -= 1
+
+        try:
+            await asyncio.gather(*(executor.run(blocking_search) for _ in range(6)))
+        finally:
+            executor.shutdown()
+        assert active["peak"] == 2
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_with_503(self):
+        executor = SearchExecutor(max_concurrency=1, max_queue=1)
+        release = threading.Event()
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        while executor.get_stats()["inflight"] == 0:
+            await asyncio.sleep(0.01)
+        waiting = asyncio.ensure_future(executor.run(lambda: "queued"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ServiceUnavailableError) as exc_info:
+            await executor.run(lambda: "rejected")
+        assert exc_info.value.status_code == 503
+
+        release.set()
+        assert await waiting == "queued"
+        await running
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive(self):
+        executor = SearchExecutor(max_concurrency=1)
+        ticks = []
+
+        async def heartbeat():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        start = time.monotonic()
+        await asyncio.gather(executor.run(time.sleep, 0.3), heartbeat())
+        executor.shutdown()
+
+        # Heartbeats kept firing while the blocking call ran
+        assert ticks[-1] - start < 0.3
+
+    def test_invalid_settings(self):
+        with pytest.raises(ValueError):
+            SearchExecutor(max_concurrency=0)
+        with pytest.raises(ValueError, match="search_concurrency"):
+            Config(api_key="k", search_concurrency=0).validate()
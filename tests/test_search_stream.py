@@ -0,0 +1,235 @@
+"""
+Tests for streaming search (SDK generator and SSE endpoint)
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from flamehaven_filesearch import FlamehavenFileSearch, api, core
+
+
+def chunk(text, sources=None):
+    grounding = None
+    if sources is not None:
+        grounding = SimpleNamespace(
+            grounding_chunks=[
+                SimpleNamespace(retrieved_context=SimpleNamespace(title=t, uri=u))
+                for t, u in sources
+            ]
+        )
+    return SimpleNamespace(
+        text=text, candidates=[SimpleNamespace(grounding_metadata=grounding)]
+    )
+
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def remote(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setattr(
+        "flamehaven_filesearch.core.google_genai_types", MagicMock(), raising=False
+    )
+    searcher = FlamehavenFileSearch(allow_offline=True)
+    searcher._use_native_client = True
+    searcher.client = MagicMock()
+    searcher.stores["docs"] = "fileSearchStores/docs"
+    return searcher
+
+
+class TestSearchStream:
+    """Test the search_stream event generator"""
+
+    def test_tokens_then_sources_then_done(self, remote):
+        remote.client.models.generate_content_stream.return_value = iter(
+            [chunk("Streaming "), chunk("answers "), chunk("work.", [("a", "u")])]
+        )
+
+        events = list(remote.search_stream("how?", store_name="docs"))
+
+        assert [e["event"] for e in events] == [
+            "token",
+            "token",
+            "token",
+            "sources",
+            "done",
+        ]
+        assert "".join(e["text"] for e in events[:3]) == "Streaming answers work."
+        assert events[3]["sources"] == [{"title": "a", "uri": "u"}]
+        assert events[4]["store"] == "docs"
+
+    def test_answer_capped_but_grounding_still_read(self, remote):
+        remote.config.max_answer_length = 8
+        remote.client.models.generate_content_stream.return_value = iter(
+            [chunk("12345"), chunk("67890"), chunk(None, [("a", "u")])]
+        )
+
+        events = list(remote.search_stream("q", store_name="docs"))
+
+        tokens = [e["text"] for e in events if e["event"] == "token"]
+        assert tokens == ["12345", "678"]
+        assert events[-2]["sources"] == [{"title": "a", "uri": "u"}]
+
+    def test_banned_term_stops_stream(self, remote):
+        remote.client.models.generate_content_stream.return_value = iter(
+            [chunk("safe text PII-"), chunk("leak here")]
+        )
+
+        events = list(remote.search_stream("q", store_name="docs"))
+
+        assert [e["event"] for e in events] == ["token", "error"]
+        assert "banned term" in events[-1]["message"]
+
+    def test_upstream_error_and_missing_store(self, remote):
+        remote.client.models.generate_content_stream.side_effect = RuntimeError("quota")
+        assert list(remote.search_stream("q", store_name="docs"))[-1] == {
+            "event": "error",
+            "status": "error",
+            "message": "quota",
+        }
+        missing = list(remote.search_stream("q", store_name="nope"))
+        assert [e["event"] for e in missing] == ["error"]
+
+    def test_disconnect_records_no_outcome_and_closes_stream(self, remote):
+        closed = []
+
+        def upstream(**kwargs):
+            try:
+                yield chunk("first ")
+                yield chunk("second")
+            finally:
+                closed.append(True)
+
+        remote.client.models.generate_content_stream.side_effect = upstream
+        breaker = remote._resilience.breaker
+        breaker.record_outcome = MagicMock()
+        breaker.record_ignored = MagicMock()
+
+        events = remote.search_stream("q", store_name="docs")
+        assert next(events)["event"] == "token"
+        events.close()  # client disconnected
+
+        assert closed == [True]
+        breaker.record_outcome.assert_not_called()
+        breaker.record_ignored.assert_called_once()
+        assert remote._key_pool.get_stats()[0]["inflight"] == 0
+
+    def test_stream_is_bounded_by_deadline(self, remote, monkeypatch):
+        remote.config.gemini_deadline_sec = 5
+        now = [0.0]
+        monkeypatch.setattr("flamehaven_filesearch.core.time.monotonic", lambda: now[0])
+
+        def upstream(**kwargs):
+            yield chunk("fast ")
+            now[0] = 9.0  # the second chunk arrives after the deadline
+            yield chunk("late")
+
+        remote.client.models.generate_content_stream.side_effect = upstream
+
+        events = list(remote.search_stream("q", store_name="docs"))
+
+        assert [e["event"] for e in events] == ["token", "error"]
+        assert "deadline" in events[-1]["message"]
+        assert remote._resilience.breaker.get_stats()["consecutive_failures"] == 1
+        config_type = core.google_genai_types.GenerateContentConfig
+        assert config_type.call_args.kwargs["http_options"] == {"timeout": 5000}
+
+    def test_local_mode_streams_single_token(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        searcher = FlamehavenFileSearch(allow_offline=True)
+        searcher._use_native_client = False
+        path = tmp_path / "notes.txt"
+        path.write_text("Local streaming returns snippets.", encoding="utf-8")
+        searcher.upload_file(str(path), store_name="local")
+
+        events = list(searcher.search_stream("streaming", store_name="local"))
+
+        assert [e["event"] for e in events] == ["token", "sources", "done"]
+        assert "streaming" in events[0]["text"].lower()
+
+
+class TestSearchStreamEndpoint:
+    """Test POST /api/search/stream"""
+
+    @pytest.fixture
+    def stream_client(self, client, remote, monkeypatch):
+        monkeypatch.setattr(api, "searcher", remote)
+        api.search_cache.invalidate()
+        yield client
+        api.search_cache.invalidate()
+
+    def test_streams_sse_and_fills_cache(self, stream_client, remote):
+        remote.client.models.generate_content_stream.return_value = iter(
+            [chunk("Hello "), chunk("world.", [("doc", "uri")])]
+        )
+
+        response = stream_client.post(
+            "/api/search/stream", json={"query": "greeting", "store_name": "docs"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.text)
+        assert [name for name, _ in events] == ["token", "token", "sources", "done"]
+        assert events[2][1]["sources"] == [{"title": "doc", "uri": "uri"}]
+
+        # Second request replays the cached answer without calling Gemini
+        replay = stream_client.post(
+            "/api/search/stream", json={"query": "greeting", "store_name": "docs"}
+        )
+        replayed = parse_sse(replay.text)
+        assert replayed[0] == ("token", {"text": "Hello world."})
+        assert remote.client.models.generate_content_stream.call_count == 1
+
+    def test_error_event(self, stream_client, remote):
+        remote.client.models.generate_content_stream.side_effect = RuntimeError("quota")
+        response = stream_client.post(
+            "/api/search/stream", json={"query": "anything", "store_name": "docs"}
+        )
+        events = parse_sse(response.text)
+        assert events[-1][0] == "error"
+        assert events[-1][1]["message"] == "quota"
+
+    def test_unknown_store_returns_404(self, stream_client):
+        response = stream_client.post(
+            "/api/search/stream", json={"query": "q", "store_name": "nope"}
+        )
+        assert response.status_code == 404
+
+    def test_degraded_results_are_not_cached(self, stream_client, remote):
+        degraded = {
+            "status": "success",
+            "answer": "From the mirror.",
+            "sources": [],
+            "model": "gemini-2.5-flash",
+            "query": "q",
+            "store": "docs",
+            "degraded": True,
+        }
+        remote.search = MagicMock(return_value=degraded)
+        remote.search_stream = MagicMock(
+            side_effect=lambda **kwargs: remote._result_events(degraded, "q", "docs")
+        )
+
+        for _ in range(2):
+            response = stream_client.post(
+                "/api/search", json={"query": "q", "store_name": "docs"}
+            )
+            assert response.json()["degraded"] is True
+            events = parse_sse(
+                stream_client.post(
+                    "/api/search/stream", json={"query": "q", "store_name": "docs"}
+                ).text
+            )
+            assert events[-1][1]["degraded"] is True
+        assert remote.search.call_count == 2
+        assert remote.search_stream.call_count == 2
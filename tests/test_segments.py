@@ -0,0 +1,298 @@
+"""
+Tests for the persistent on-disk segment format of local stores
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from flamehaven_filesearch import Config, FlamehavenFileSearch
+from flamehaven_filesearch.local_index import (
+    InvertedIndex,
+    LocalStore,
+    SegmentedIndex,
+    tiered_merge_window,
+    tokenize,
+)
+from flamehaven_filesearch.segments import (
+    MANIFEST_NAME,
+    Segment,
+    load_manifest,
+    read_segment,
+    write_segment,
+)
+
+
+def _offline_searcher(store_dir, monkeypatch, **overrides):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setattr("flamehaven_filesearch.core.google_genai", None)
+    config = Config(local_store_dir=str(store_dir), **overrides)
+    return FlamehavenFileSearch(config=config, allow_offline=True)
+
+
+class TestSegmentFiles:
+    """Test segment read/write round trip"""
+
+    def test_round_trip(self, tmp_path):
+        segment = Segment(
+            name="seg-000001",
+            doc_base=0,
+            passage_base=0,
+            documents=[{"title": "a.txt", "uri": "/a", "offset": 0, "length": 12}],
+            passages=[(0, 0, 11, 2)],
+            postings={"héllo": {0: 1}, "world": {0: 1}},
+        )
+        entry = write_segment(str(tmp_path), segment)
+        assert entry == {
+            "name": "seg-000001",
+            "doc_base": 0,
+            "doc_count": 1,
+            "passage_base": 0,
+            "passage_count": 1,
+        }
+
+        loaded = read_segment(str(tmp_path), entry)
+        assert loaded.documents == segment.documents
+        assert loaded.passages == segment.passages
+        assert loaded.postings == segment.postings
+        assert loaded.vectors is None
+
+    def test_corrupt_segment_detected(self, tmp_path):
+        segment = Segment(name="seg-000001", doc_base=0, passage_base=0)
+        entry = write_segment(str(tmp_path), segment)
+        entry["doc_count"] = 3
+        with pytest.raises(ValueError, match="corrupt"):
+            read_segment(str(tmp_path), entry)
+
+    def test_unsupported_manifest_version(self, tmp_path):
+        (tmp_path / MANIFEST_NAME).write_text(json.dumps({"version": 99}))
+        with pytest.raises(ValueError, match="Unsupported"):
+            load_manifest(str(tmp_path))
+        assert load_manifest(str(tmp_path / "missing")) is None
+
+
+class TestPersistentLocalStore:
+    """Test flush/open of LocalStore"""
+
+    def test_flush_writes_one_segment_per_batch(self, tmp_path):
+        store = LocalStore(
+            directory=str(tmp_path), name="docs", passage_size=40, merge_factor=0
+        )
+        assert store.flush() is None
+
+        store.add_document("a.txt", "/a", "alpha beta gamma " * 5)
+        store.add_document("b.txt", "/b", "delta epsilon")
+        assert store.flush() == "seg-000001"
+        store.add_document("c.txt", "/c", "alpha omega")
+        assert store.flush() == "seg-000002"
+
+        manifest = load_manifest(str(tmp_path))
+        assert manifest["store"] == "docs"
+        assert [s["name"] for s in manifest["segments"]] == [
+            "seg-000001",
+            "seg-000002",
+        ]
+
+        reopened = LocalStore.open(str(tmp_path), passage_size=40)
+        assert reopened.name == "docs"
+        assert reopened.documents == store.documents
+        assert reopened.document_text(2) == "alpha omega"
+        assert manifest["blob_size"] == len(store.blob)
+        assert reopened.passages == store.passages
+        assert reopened.index.total_length == store.index.total_length
+        assert len(reopened.index.segments) == 2
+        assert reopened.search(["alpha"], k=5) == store.search(["alpha"], k=5)
+
+    def test_dense_vectors_persisted_or_reencoded(self, tmp_path):
+        pytest.importorskip("numpy")
+        dense_dir = tmp_path / "dense"
+        store = LocalStore(directory=str(dense_dir), retrieval="dense")
+        store.add_document("a.txt", "/a", "vector payload")
+        store.flush()
+        assert os.path.exists(dense_dir / "seg-000001.vectors.npy")
+
+        reopened = LocalStore.open(str(dense_dir), retrieval="dense")
+        assert reopened.search(tokenize("payload"), k=1)[0][0] == 0
+
+        # A BM25 store reopened in dense mode re-encodes passage text
+        bm25_dir = tmp_path / "bm25"
+        store = LocalStore(directory=str(bm25_dir))
+        store.add_document("b.txt", "/b", "plain payload")
+        store.flush()
+        reopened = LocalStore.open(str(bm25_dir), retrieval="dense")
+        assert len(reopened.dense) == len(reopened.passages)
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="flock is POSIX only")
+    def test_directory_has_a_single_writer_process(self, tmp_path):
+        directory = str(tmp_path / "locked")
+        probe = (
+            "import sys\n"
+            "from flamehaven_filesearch.local_index import LocalStore\n"
+            "from flamehaven_filesearch.segments import StoreLockedError\n"
+            "try:\n"
+            "    LocalStore.open(sys.argv[1]).close()\n"
+            "except StoreLockedError:\n"
+            "    sys.exit(3)\n"
+        )
+
+        def open_elsewhere():
+            return subprocess.run([sys.executable, "-c", probe, directory]).returncode
+
+        store = LocalStore(directory=directory)
+        # The same process may reopen it (the lock is shared, not re-taken)
+        LocalStore.open(directory).close()
+        assert open_elsewhere() == 3
+        store.close()
+        assert open_elsewhere() == 0
+
+
+class TestSegmentMerging:
+    """Test the memtable, fan-out scoring and background merges"""
+
+    def test_tiered_merge_window(self):
+        assert tiered_merge_window([1, 1, 1], 4) is None
+        assert tiered_merge_window([1, 1, 1, 1], 4) == (0, 4)
+        # A large segment splits the run; the later small ones still merge
+        assert tiered_merge_window([1, 1, 50, 1, 1, 1, 1], 4) == (3, 7)
+        assert tiered_merge_window([1, 1, 1, 1], 0) is None
+
+    def test_fan_out_uses_store_wide_statistics(self):
+        docs = [["alpha", "beta"], ["alpha"], ["gamma", "alpha"], ["beta"]]
+        single = InvertedIndex()
+        segmented = SegmentedIndex()
+        for doc_id, tokens in enumerate(docs):
+            single.add_tokens(doc_id, tokens)
+            segmented.add_tokens(doc_id, tokens)
+            if doc_id % 2:
+                segmented.seal()
+
+        assert len(segmented.segments) == 2
+        assert len(segmented) == len(single)
+        for term in ("alpha", "beta", "gamma"):
+            assert segmented.idf(term) == pytest.approx(single.idf(term))
+        expected = single.score(["alpha", "beta"])
+        actual = segmented.score(["alpha", "beta"])
+        assert actual.keys() == expected.keys()
+        for doc_id, score in expected.items():
+            assert actual[doc_id] == pytest.approx(score)
+
+    def test_memtable_flushes_and_merges_in_background(self):
+        store = LocalStore(passage_size=50, flush_passages=1, merge_factor=3)
+        baseline = LocalStore(passage_size=50, merge_factor=0)
+        for i in range(20):
+            text = f"report {i} mentions pump{i % 4} pressure"
+            store.add_document(f"{i}.txt", f"/{i}", text)
+            baseline.add_document(f"{i}.txt", f"/{i}", text)
+        store.wait_for_merges()
+
+        assert len(store.index.memtable) == 0
+        assert len(store.index.segments) < 20
+        assert sum(len(s) for s in store.index.segments) == len(store.passages)
+        query = tokenize("pump2 pressure")
+        assert [r[0] for r in store.search(query, 5)] == [
+            r[0] for r in baseline.search(query, 5)
+        ]
+
+    def test_persisted_merge_replaces_segment_files(self, tmp_path):
+        store = LocalStore(directory=str(tmp_path), merge_factor=2)
+        for i in range(4):
+            store.add_document(f"{i}.txt", f"/{i}", f"entry number {i}")
+            store.flush()
+        store.wait_for_merges()
+
+        manifest = load_manifest(str(tmp_path))
+        assert len(manifest["segments"]) == 1
+        assert manifest["segments"][0]["doc_count"] == 4
+        live = manifest["segments"][0]["name"]
+        assert all(
+            name.startswith(live)
+            for name in os.listdir(tmp_path)
+            if name.startswith("seg-")
+        )
+
+        # Leftovers from an interrupted merge are swept on reopen
+        (tmp_path / "seg-999999.docs.jsonl").write_text("")
+        store.close()
+        reopened = LocalStore.open(str(tmp_path))
+        assert not (tmp_path / "seg-999999.docs.jsonl").exists()
+        assert reopened.document_text(3) == "entry number 3"
+        assert reopened.search(["number"], k=4)
+        reopened.close()
+
+    def test_config_rejects_negative_flush_threshold(self):
+        with pytest.raises(ValueError, match="local_flush_passages"):
+            Config(api_key="k", local_flush_passages=-1).validate()
+
+
+class TestSearcherPersistence:
+    """Test that FlamehavenFileSearch reopens local stores on init"""
+
+    def test_restart_reopens_stores_without_reupload(self, tmp_path, monkeypatch):
+        store_dir = tmp_path / "stores"
+        doc = tmp_path / "manual.txt"
+        doc.write_text("Reset the router by holding the button.", encoding="utf-8")
+
+        searcher = _offline_searcher(store_dir, monkeypatch)
+        searcher.upload_file(str(doc), store_name="team/a")
+        searcher.create_store("empty")
+
+        restarted = _offline_searcher(store_dir, monkeypatch)
+        assert restarted.list_stores() == {
+            "empty": "local://empty",
+            "team/a": "local://team/a",
+        }
+        result = restarted.search("reset router", store_name="team/a")
+        assert result["sources"][0]["title"] == "manual.txt"
+
+        restarted.delete_store("team/a")
+        assert "team/a" not in _offline_searcher(store_dir, monkeypatch).stores
+
+    def test_dot_names_stay_inside_store_dir(self, tmp_path, monkeypatch):
+        store_dir = tmp_path / "stores"
+        sibling = tmp_path / "jobs.db"
+        sibling.write_text("keep")
+
+        searcher = _offline_searcher(store_dir, monkeypatch)
+        for name in ("..", ".", "docs"):
+            searcher.create_store(name)
+        assert sorted(os.listdir(store_dir)) == ["%2E", "%2E%2E", "docs"]
+        searcher.close()
+
+        restarted = _offline_searcher(store_dir, monkeypatch)
+        assert set(restarted.stores) == {"..", ".", "docs"}
+        restarted.delete_store("..")
+        restarted.delete_store(".")
+        assert sibling.read_text() == "keep"
+        assert sorted(os.listdir(store_dir)) == ["docs"]
+
+        with pytest.raises(ValueError):
+            restarted.create_store("")
+        assert "" not in restarted.stores
+
+    def test_close_flushes_memtable(self, tmp_path, monkeypatch):
+        store_dir = tmp_path / "stores"
+        doc = tmp_path / "note.txt"
+        doc.write_text("buffered upload", encoding="utf-8")
+
+        searcher = _offline_searcher(store_dir, monkeypatch, local_flush_passages=100)
+        searcher.upload_file(str(doc), store_name="buffered")
+        assert load_manifest(str(store_dir / "buffered"))["segments"] == []
+        searcher.close()
+
+        restarted = _offline_searcher(store_dir, monkeypatch)
+        result = restarted.search("buffered", store_name="buffered")
+        assert result["sources"][0]["title"] == "note.txt"
+
+    def test_unreadable_store_is_skipped(self, tmp_path, monkeypatch, caplog):
+        broken = tmp_path / "stores" / "broken"
+        broken.mkdir(parents=True)
+        (broken / MANIFEST_NAME).write_text("{not json")
+
+        with caplog.at_level("ERROR"):
+            searcher = _offline_searcher(tmp_path / "stores", monkeypatch)
+        assert searcher.stores == {}
+        assert "Failed to reopen local store" in caplog.text
@@ -0,0 +1,163 @@
+"""
+Tests for single-flight search coalescing
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from flamehaven_filesearch.cache import SearchResultCache
+from flamehaven_filesearch.singleflight import RedisFlightLock, SingleFlight, search_key
+
+
+class FakeRedis:
+    """Minimal thread-safe stand-in for the redis client calls used"""
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def set(self, name, value, nx=False, px=None):
+        with self.lock:
+            if nx and name in self.data:
+                return None
+            self.data[name] = value
+            return True
+
+    def exists(self, name):
+        with self.lock:
+            return int(name in self.data)
+
+    def eval(self, script, numkeys, name, token):
+        with self.lock:
+            if self.data.get(name) == token:
+                del self.data[name]
+                return 1
+            return 0
+
+
+class TestSearchKey:
+    """Test key compatibility with the search cache"""
+
+    def test_matches_cache_key(self):
+        cache = SearchResultCache()
+        params = {"model": "m", "max_tokens": None, "temperature": 0.2}
+        assert search_key("q", "s", **params) == cache._generate_key("q", "s", **params)
+        assert search_key("q", "s", model="m") != search_key("q", "s", model="n")
+
+
+class TestSingleFlight:
+    """Test in-process coalescing"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_call(self):
+        flights = SingleFlight()
+        calls = 0
+
+        async def upstream():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"answer": "shared"}
+
+        outcomes = await asyncio.gather(*(flights.do("k", upstream) for _ in range(50)))
+
+        assert calls == 1
+        assert all(result == {"answer": "shared"} for result, _ in outcomes)
+        assert sum(shared for _, shared in outcomes) == 49
+        assert flights.get_stats()["inflight"] == 0
+
+        # Once finished, the next call goes upstream again
+        await flights.do("k", upstream)
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_propagates_to_all_callers(self):
+        flights = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        outcomes = await asyncio.gather(
+            flights.do("k", failing), flights.do("k", failing), return_exceptions=True
+        )
+        assert all(isinstance(o, RuntimeError) for o in outcomes)
+
+    @pytest.mark.asyncio
+    async def test_leader_cancellation_does_not_cancel_followers(self):
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def upstream():
+            await release.wait()
+            return "done"
+
+        leader = asyncio.ensure_future(flights.do("k", upstream))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("k", upstream))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        release.set()
+        assert await follower == ("done", True)
+
+
+class TestDistributedSingleFlight:
+    """Test cross-worker coalescing through the Redis lock"""
+
+    @pytest.mark.asyncio
+    async def test_second_worker_waits_for_published_result(self):
+        redis = FakeRedis()
+        shared_cache = {}
+        worker_a = SingleFlight(RedisFlightLock(redis, poll_interval=0.01))
+        worker_b = SingleFlight(RedisFlightLock(redis, poll_interval=0.01))
+        calls = []
+
+        def make_upstream(worker):
+            async def upstream():
+                calls.append(worker)
+                await asyncio.sleep(0.1)
+                shared_cache["k"] = {"answer": worker}
+                return shared_cache["k"]
+
+            return upstream
+
+        first = asyncio.ensure_future(
+            worker_a.do("k", make_upstream("a"), lookup=lambda: shared_cache.get("k"))
+        )
+        await asyncio.sleep(0.02)
+        second = await worker_b.do(
+            "k", make_upstream("b"), lookup=lambda: shared_cache.get("k")
+        )
+
+        assert await first == ({"answer": "a"}, False)
+        assert second == ({"answer": "a"}, False)
+        assert calls == ["a"]
+        assert redis.data == {}
+
+    @pytest.mark.asyncio
+    async def test_follower_calls_upstream_if_leader_publishes_nothing(self):
+        redis = FakeRedis()
+        lock = RedisFlightLock(redis, poll_interval=0.01)
+        redis.set(lock.prefix + "k", "other-worker", nx=True)
+
+        async def upstream():
+            return "fallback"
+
+        flights = SingleFlight(lock)
+        waiter = asyncio.ensure_future(flights.do("k", upstream, lookup=lambda: None))
+        await asyncio.sleep(0.03)
+        redis.eval(None, 1, lock.prefix + "k", "other-worker")
+
+        assert await waiter == ("fallback", False)
+
+    def test_release_only_own_lock(self):
+        redis = FakeRedis()
+        lock = RedisFlightLock(redis)
+        assert lock.acquire("k")
+        assert not lock.acquire("k")
+        redis.data[lock.prefix + "k"] = "stolen"
+        lock.release("k")
+        assert redis.data[lock.prefix + "k"] == "stolen"
@@ -0,0 +1,220 @@
+"""
+Tests for the durable remote store registry
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from flamehaven_filesearch import FlamehavenFileSearch
+from flamehaven_filesearch.config import Config
+from flamehaven_filesearch.store_registry import StoreRegistry
+
+
+def listing(*names):
+    return [SimpleNamespace(name=name) for name in names]
+
+
+class TestStoreRegistry:
+    """Test registry persistence"""
+
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / "nested" / "stores.db")
+        registry = StoreRegistry(path)
+        registry.put("docs", "fileSearchStores/docs", 1)
+        registry.put("faq", "fileSearchStores/faq")
+        registry.put("docs", "fileSearchStores/docs-2", 0)
+
+        assert StoreRegistry(path).load() == {
+            "docs": ("fileSearchStores/docs-2", 0),
+            "faq": ("fileSearchStores/faq", 0),
+        }
+
+        registry.remove("faq")
+        registry.remove("missing")
+        assert list(registry.load()) == ["docs"]
+
+    def test_claim_keeps_first_registration(self, tmp_path):
+        registry = StoreRegistry(str(tmp_path / "stores.db"))
+        assert registry.get("docs") is None
+        assert registry.claim("docs", "fileSearchStores/a", 1) == (
+            "fileSearchStores/a",
+            1,
+        )
+        assert registry.claim("docs", "fileSearchStores/b", 0) == (
+            "fileSearchStores/a",
+            1,
+        )
+        assert registry.get("docs") == ("fileSearchStores/a", 1)
+
+    def test_document_digests(self, tmp_path):
+        registry = StoreRegistry(str(tmp_path / "stores.db"))
+        registry.put("docs", "fileSearchStores/docs")
+        registry.add_document("docs", "abc", "a.txt")
+        registry.add_document("docs", "abc", "copy.txt")  # first upload wins
+        registry.add_document("faq", "def", "faq.txt")
+
+        assert registry.get_document("docs", "abc") == "a.txt"
+        assert registry.get_document("faq", "abc") is None
+        assert registry.load_documents() == {
+            "docs": {"abc": "a.txt"},
+            "faq": {"def": "faq.txt"},
+        }
+        registry.remove("docs")
+        assert registry.load_documents() == {"faq": {"def": "faq.txt"}}
+
+    def test_config_from_env(self, monkeypatch):
+        monkeypatch.setenv("STORE_REGISTRY_PATH", "/tmp/registry.db")
+        assert Config.from_env().store_registry_path == "/tmp/registry.db"
+        monkeypatch.setenv("STORE_REGISTRY_PATH", "")
+        assert Config.from_env().store_registry_path is None
+        assert Config().store_registry_path is None
+
+
+class TestCoreRehydration:
+    """Test startup reconciliation in FlamehavenFileSearch"""
+
+    @pytest.fixture
+    def searcher_factory(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        registry_path = str(tmp_path / "stores.db")
+        created = []
+
+        def make(*listings):
+            searcher = FlamehavenFileSearch(
+                config=Config(api_keys=["key-one", "key-two"]), allow_offline=True
+            )
+            searcher._use_native_client = True
+            searcher._clients = []
+            for names in listings:
+                client = MagicMock()
+                if isinstance(names, Exception):
+                    client.file_search_stores.list.side_effect = names
+                else:
+                    client.file_search_stores.list.return_value = listing(*names)
+                searcher._clients.append(client)
+            searcher._store_registry = StoreRegistry(registry_path)
+            searcher._rehydrate_stores()
+            created.append(searcher)
+            return searcher
+
+        yield make, StoreRegistry(registry_path)
+        for searcher in created:
+            searcher.close()
+
+    def test_restart_reuses_registered_stores(self, searcher_factory):
+        make, registry = searcher_factory
+        first = make((), ())
+        first._clients[1].file_search_stores.create.return_value = SimpleNamespace(
+            name="fileSearchStores/docs"
+        )
+        first._key_pool.assign()  # steer the new store to the second key
+        first.create_store("docs")
+        assert registry.load() == {"docs": ("fileSearchStores/docs", 1)}
+
+        second = make((), ("fileSearchStores/docs",))
+        assert second.stores == {"docs": "fileSearchStores/docs"}
+        assert second._store_keys == {"docs": 1}
+        assert second.create_store("docs") == "fileSearchStores/docs"
+        second._clients[1].file_search_stores.create.assert_not_called()
+        assert second.get_metrics()["api_keys"][1]["stores"] == 1
+
+    def test_reconcile_drops_stale_and_moves_owner(self, searcher_factory):
+        make, registry = searcher_factory
+        registry.put("gone", "fileSearchStores/gone", 0)
+        registry.put("moved", "fileSearchStores/moved", 0)
+
+        searcher = make((), ("fileSearchStores/moved", "fileSearchStores/other"))
+
+        assert searcher.stores == {"moved": "fileSearchStores/moved"}
+        assert registry.load() == {"moved": ("fileSearchStores/moved", 1)}
+
+    def test_failed_listing_keeps_entries(self, searcher_factory):
+        make, registry = searcher_factory
+        registry.put("docs", "fileSearchStores/docs", 1)
+
+        searcher = make((), ConnectionError("503"))
+
+        assert searcher.stores == {"docs": "fileSearchStores/docs"}
+        assert searcher._store_keys == {"docs": 1}
+        assert "docs" in registry.load()
+
+    def test_delete_unregisters(self, searcher_factory):
+        make, registry = searcher_factory
+        registry.put("docs", "fileSearchStores/docs", 0)
+        searcher = make(("fileSearchStores/docs",), ())
+
+        assert searcher.delete_store("docs")["status"] == "success"
+        assert registry.load() == {}
+        assert searcher.get_metrics()["api_keys"][0]["stores"] == 0
+
+    def test_upload_dedup_survives_restart(self, searcher_factory, tmp_path):
+        make, registry = searcher_factory
+        path = tmp_path / "a.txt"
+        path.write_text("remote payload", encoding="utf-8")
+        first = make((), ())
+        first._clients[0].file_search_stores.create.return_value = SimpleNamespace(
+            name="fileSearchStores/docs"
+        )
+        assert first.upload_file(str(path), store_name="docs")["status"] == "success"
+
+        restarted = make(("fileSearchStores/docs",), ())
+        assert restarted._content_hashes.get_stats()["stores"] == {"docs": 1}
+        result = restarted.upload_file(str(path), store_name="docs")
+        assert result["status"] == "duplicate"
+        assert result["duplicate_of"] == "a.txt"
+        upload = restarted._clients[0].file_search_stores.upload_to_file_search_store
+        upload.assert_not_called()
+
+    def test_upload_dedup_is_shared_between_workers(self, searcher_factory, tmp_path):
+        make, registry = searcher_factory
+        first, second = make((), ()), make((), ())
+        first._clients[0].file_search_stores.create.return_value = SimpleNamespace(
+            name="fileSearchStores/docs"
+        )
+        original = tmp_path / "a.txt"
+        copy = tmp_path / "copy.txt"
+        for path in (original, copy):
+            path.write_text("shared payload", encoding="utf-8")
+
+        first.upload_file(str(original), store_name="docs")
+        result = second.upload_file(str(copy), store_name="docs")
+
+        assert result["status"] == "duplicate"
+        for client in second._clients:
+            client.file_search_stores.upload_to_file_search_store.assert_not_called()
+
+    def test_store_created_by_another_worker_is_adopted(self, searcher_factory):
+        make, registry = searcher_factory
+        first, second = make((), ()), make((), ())
+        first._clients[0].file_search_stores.create.return_value = SimpleNamespace(
+            name="fileSearchStores/docs"
+        )
+        first.create_store("docs")
+
+        assert second.create_store("docs") == "fileSearchStores/docs"
+        for client in second._clients:
+            client.file_search_stores.create.assert_not_called()
+        assert second._store_keys == {"docs": 0}
+
+    def test_losing_a_create_race_deletes_the_duplicate(self, searcher_factory):
+        make, registry = searcher_factory
+        searcher = make((), ())
+        create = searcher._clients[0].file_search_stores.create
+
+        def racing_create():
+            # Another worker registers the name while this call is in flight
+            registry.claim("docs", "fileSearchStores/winner", 1)
+            return SimpleNamespace(name="fileSearchStores/loser")
+
+        create.side_effect = racing_create
+
+        assert searcher.create_store("docs") == "fileSearchStores/winner"
+        searcher._clients[0].file_search_stores.delete.assert_called_once_with(
+            name="fileSearchStores/loser"
+        )
+        assert registry.load() == {"docs": ("fileSearchStores/winner", 1)}
+        assert searcher._store_keys == {"docs": 1}
+        stores = [key["stores"] for key in searcher.get_metrics()["api_keys"]]
+        assert stores == [0, 1]
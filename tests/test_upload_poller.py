@@ -0,0 +1,163 @@
+"""
+Tests for the multiplexed upload operation poller
+"""
+
+import threading
+from itertools import islice
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from flamehaven_filesearch import FlamehavenFileSearch
+from flamehaven_filesearch.upload_poller import UploadOperationPoller, poll_delays
+
+
+class CountingOperations:
+    """Fake ``operations.get`` finishing each operation after N polls"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.threads = set()
+
+    def get(self, operation):
+        with self.lock:
+            self.calls += 1
+            self.threads.add(threading.current_thread().name)
+        remaining = operation.remaining - 1
+        return SimpleNamespace(done=remaining <= 0, remaining=remaining)
+
+
+class TestPollDelays:
+    """Test the adaptive schedule"""
+
+    def test_backs_off_to_maximum(self):
+        delays = list(islice(poll_delays(0.5, 2.0, backoff=2.0), 5))
+        assert delays == [0.5, 1.0, 2.0, 2.0, 2.0]
+
+    def test_initial_capped_by_maximum(self):
+        assert next(poll_delays(5.0, 1.0)) == 1.0
+
+
+class TestUploadOperationPoller:
+    """Test multiplexing, completion wake-ups, timeouts and errors"""
+
+    def test_done_operation_returns_without_polling(self):
+        get = MagicMock()
+        poller = UploadOperationPoller(get)
+        operation = SimpleNamespace(done=True)
+        assert poller.wait(operation, timeout=1) is operation
+        get.assert_not_called()
+
+    def test_single_thread_serves_concurrent_waiters(self):
+        ops = CountingOperations()
+        poller = UploadOperationPoller(ops.get, initial_interval=0.01, backoff=1.0)
+        results = []
+
+        def upload(polls):
+            done = poller.wait(SimpleNamespace(done=False, remaining=polls), 5)
+            results.append(done.done)
+
+        callers = [threading.Thread(target=upload, args=(n,)) for n in (1, 2, 3, 4)]
+        try:
+            for caller in callers:
+                caller.start()
+            for caller in callers:
+                caller.join()
+        finally:
+            poller.shutdown()
+
+        assert results == [True] * 4
+        assert ops.calls == 1 + 2 + 3 + 4
+        assert ops.threads == {"upload-poller"}
+        assert poller.get_stats() == {"pending": 0, "polls": 10}
+
+    def test_timeout_raises_and_forgets_operation(self):
+        poller = UploadOperationPoller(
+            lambda op: SimpleNamespace(done=False), initial_interval=0.01
+        )
+        try:
+            with pytest.raises(TimeoutError):
+                poller.wait(SimpleNamespace(done=False), timeout=0.05)
+            assert poller.get_stats()["pending"] == 0
+        finally:
+            poller.shutdown()
+
+    def test_polling_error_is_raised_to_caller(self):
+        def failing(op):
+            raise ConnectionError("network down")
+
+        poller = UploadOperationPoller(failing, initial_interval=0.01)
+        try:
+            with pytest.raises(ConnectionError):
+                poller.wait(SimpleNamespace(done=False), timeout=1)
+        finally:
+            poller.shutdown()
+
+    def test_shutdown_wakes_waiters_and_poller_restarts(self):
+        poller = UploadOperationPoller(
+            lambda op: SimpleNamespace(done=False), initial_interval=10
+        )
+        errors = []
+
+        def upload():
+            try:
+                poller.wait(SimpleNamespace(done=False), timeout=5)
+            except RuntimeError as e:
+                errors.append(e)
+
+        caller = threading.Thread(target=upload)
+        caller.start()
+        while poller.get_stats()["pending"] == 0:
+            pass
+        poller.shutdown()
+        caller.join()
+        assert len(errors) == 1
+
+        poller.get_operation = lambda op: SimpleNamespace(done=True)
+        poller.initial_interval = 0.01
+        assert poller.wait(SimpleNamespace(done=False), timeout=1).done
+        poller.shutdown()
+
+    def test_rejects_negative_intervals(self):
+        with pytest.raises(ValueError):
+            UploadOperationPoller(MagicMock(), initial_interval=-1)
+
+
+class TestCoreUploadPolling:
+    """Test core.upload_file waiting on the shared poller"""
+
+    @pytest.fixture
+    def remote(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        searcher = FlamehavenFileSearch(allow_offline=True)
+        client = MagicMock()
+        client.file_search_stores.upload_to_file_search_store.return_value = (
+            SimpleNamespace(done=False, remaining=2)
+        )
+        client.operations.get.side_effect = CountingOperations().get
+        searcher._use_native_client = True
+        searcher.client = client
+        searcher._upload_poller.initial_interval = 0.01
+        yield searcher
+        searcher.close()
+
+    def test_upload_completes_through_poller(self, remote, tmp_path):
+        path = tmp_path / "a.txt"
+        path.write_text("polled payload", encoding="utf-8")
+
+        result = remote.upload_file(str(path), store_name="r")
+
+        assert result["status"] == "success"
+        assert remote.client.operations.get.call_count == 2
+
+    def test_upload_timeout(self, remote, tmp_path):
+        remote.config.upload_timeout_sec = 0.05
+        remote.client.operations.get.side_effect = None
+        remote.client.operations.get.return_value = SimpleNamespace(done=False)
+        path = tmp_path / "slow.txt"
+        path.write_text("slow payload", encoding="utf-8")
+
+        result = remote.upload_file(str(path), store_name="r")
+        assert result == {"status": "error", "message": "Upload timeout"}
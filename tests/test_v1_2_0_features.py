@@ -8,6 +8,8 @@ Tests all new functionality added in v1.2.0:
 - Redis Cache Backend
 """
 
+from io import BytesIO
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -200,6 +202,31 @@ class TestBatchSearchAPI:
         # Parallel mode should be supported
         assert response.status_code in [200, 400, 404, 422]
 
+    def test_batch_search_retrieve_mode(self, authenticated_client):
+        """Test retrieval-only batch search"""
+        files = {"file": ("kb.txt", BytesIO(b"Retrieval batches skip answers."))}
+        response = authenticated_client.post(
+            "/upload", files=files, data={"store": "batch-retrieve"}
+        )
+        assert response.status_code == 200
+
+        batch_request = {
+            "queries": [
+                {"query": "retrieval batches", "store": "batch-retrieve"},
+                {"query": "anything", "store": "batch-missing"},
+            ],
+            "search_mode": "retrieve",
+            "max_results": 1,
+        }
+        response = authenticated_client.post("/api/batch-search", json=batch_request)
+        assert response.status_code == 200
+        found, missing = response.json()["results"]
+        assert found["status"] == "success"
+        assert found["answer"] is None
+        assert found["chunks"][0]["title"] == "kb.txt"
+        assert missing["status"] == "error"
+        assert "not found" in missing["error"]
+
     def test_batch_search_has_status_endpoint(self, authenticated_client):
         """Test batch search status endpoint"""
         response = authenticated_client.get("/api/batch-search/status")
@@ -8,6 +8,7 @@ from flamehaven_filesearch.cache import (
     get_search_cache,
     reset_all_caches,
 )
+from flamehaven_filesearch.cache_redis import SearchResultCacheRedis
 from flamehaven_filesearch.exceptions import (
     FileSizeExceededError,
     InvalidFilenameError,
@@ -164,3 +165,26 @@ def test_global_cache_helpers_provide_stats():
     reset_stats = get_all_cache_stats()
     assert reset_stats["search_cache"]["current_size"] == 0
     assert reset_stats["file_cache"]["current_size"] == 0
+
+
+def test_redis_search_cache_keys_include_search_parameters():
+    class DictCache:
+        ttl_seconds = 60
+
+        def __init__(self):
+            self.data = {}
+
+        def get(self, key):
+            return self.data.get(key)
+
+        def set(self, key, value, ttl=None):
+            self.data[key] = value
+
+    cache = SearchResultCacheRedis.__new__(SearchResultCacheRedis)
+    cache.cache = DictCache()
+    cache.set("q", "docs", {"answer": "generated"}, model="m")
+    cache.set("q", "docs", {"chunks": []}, mode="retrieve", model="m")
+
+    assert cache.get("q", "docs", model="m") == {"answer": "generated"}
+    assert cache.get("q", "docs", mode="retrieve", model="m") == {"chunks": []}
+    assert cache.get("q", "docs", model="other") is None
@@ -0,0 +1,249 @@
+"""
+Tests for dense local retrieval (NumPy backend)
+"""
+
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from flamehaven_filesearch import Config, FlamehavenFileSearch  # noqa: E402
+from flamehaven_filesearch.local_index import LocalStore, tokenize  # noqa: E402
+from flamehaven_filesearch.vector_index import (  # noqa: E402
+    DenseIndex,
+    HashingEncoder,
+    IVFIndex,
+    recall_at_k,
+    select_top_k,
+    train_kmeans,
+)
+
+
+class TestHashingEncoder:
+    """Test deterministic hashed encoder"""
+
+    def test_encode_is_deterministic_and_normalized(self):
+        encoder = HashingEncoder(dim=64)
+        first = encoder.encode([["alpha", "beta", "alpha"], []])
+        second = HashingEncoder(dim=64).encode([["alpha", "beta", "alpha"], []])
+
+        assert first.dtype == np.float32
+        assert first.shape == (2, 64)
+        np.testing.assert_array_equal(first, second)
+        assert np.linalg.norm(first[0]) == pytest.approx(1.0, rel=1e-5)
+        assert not first[1].any()
+
+    def test_query_weighting_uses_idf(self):
+        encoder = HashingEncoder(dim=512)
+        idf = {"rare": 3.0, "common": 0.1}
+        query = encoder.encode_query(["rare", "common"], idf.get)
+        passages = encoder.encode([["rare"], ["common"]])
+
+        scores = passages @ query
+        assert scores[0] > scores[1] > 0
+
+    def test_invalid_dim(self):
+        with pytest.raises(ValueError):
+            HashingEncoder(dim=0)
+
+
+class TestDenseIndex:
+    """Test contiguous matrix storage and top-k selection"""
+
+    def test_add_grows_contiguous_matrix(self):
+        index = DenseIndex(dim=4)
+        for _ in range(3):
+            index.add(np.eye(4, dtype=np.float32)[:50])
+        index.add(np.zeros((0, 4), dtype=np.float32))
+
+        assert len(index) == 12
+        assert index.vectors.shape == (12, 4)
+        assert index.vectors.flags["C_CONTIGUOUS"]
+
+    def test_search_returns_positive_scores_best_first(self):
+        index = DenseIndex(dim=3)
+        index.add(
+            np.array(
+                [[1, 0, 0], [0.5, 0.5, 0], [0, 1, 0], [-1, 0, 0]], dtype=np.float32
+            )
+        )
+
+        hits = index.search(np.array([1, 0, 0], dtype=np.float32), k=3)
+        assert [row for row, _ in hits] == [0, 1]
+        assert index.search(np.array([1, 0, 0], dtype=np.float32), k=0) == []
+
+    def test_select_top_k_matches_full_sort(self):
+        rng = np.random.default_rng(7)
+        scores = rng.random(1000).astype(np.float32)
+
+        hits = select_top_k(scores, 10)
+        expected = np.argsort(-scores)[:10]
+        assert [row for row, _ in hits] == expected.tolist()
+
+
+class TestDenseLocalStore:
+    """Test dense retrieval through LocalStore and the searcher"""
+
+    def test_dense_store_ranks_documents(self):
+        store = LocalStore(passage_size=80, passage_overlap=10, retrieval="dense")
+        store.add_document("a.txt", "/a", "invoice payment overdue reminder")
+        store.add_document("b.txt", "/b", "holiday schedule for the office")
+        store.add_document("c.txt", "/c", "payment terms net thirty")
+
+        results = store.search(tokenize("overdue payment"), k=2)
+        assert [doc_id for doc_id, _, _ in results] == [0, 2]
+        assert len(store.dense) == len(store.passages)
+
+    def test_dense_store_widens_to_distinct_documents(self):
+        store = LocalStore(passage_size=40, passage_overlap=0, retrieval="dense")
+        store.add_document("long.txt", "/l", "kernel panic report " * 20)
+        store.add_document("short.txt", "/s", "kernel upgrade notes")
+
+        results = store.search(["kernel"], k=2)
+        assert sorted(doc_id for doc_id, _, _ in results) == [0, 1]
+
+    def test_empty_dense_store_and_invalid_mode(self):
+        assert LocalStore(retrieval="dense").search(["x"], k=3) == []
+        with pytest.raises(ValueError):
+            LocalStore(retrieval="unknown")
+
+    def test_searcher_uses_dense_backend(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+        searcher = FlamehavenFileSearch(
+            config=Config(local_retrieval="dense"), allow_offline=True
+        )
+        searcher._use_native_client = False
+
+        path = tmp_path / "notes.txt"
+        path.write_text("The backup job runs nightly at two.", encoding="utf-8")
+        searcher.upload_file(str(path), store_name="dense")
+
+        result = searcher.search("backup nightly", store_name="dense")
+        assert result["sources"][0]["title"] == "notes.txt"
+        assert searcher._local_stores["dense"].dense is not None
+
+    def test_config_rejects_unknown_retrieval(self):
+        with pytest.raises(ValueError, match="local_retrieval"):
+            Config(api_key="k", local_retrieval="faiss").validate()
+
+
+class TestIVFIndex:
+    """Test approximate IVF search"""
+
+    @pytest.fixture
+    def clustered(self):
+        rng = np.random.default_rng(3)
+        centres = rng.standard_normal((8, 32)).astype(np.float32)
+        data = centres[rng.integers(0, 8, 2000)] + 0.3 * rng.standard_normal(
+            (2000, 32)
+        ).astype(np.float32)
+        data /= np.linalg.norm(data, axis=1, keepdims=True)
+        return data
+
+    def test_train_kmeans_returns_unit_centroids(self, clustered):
+        centroids = train_kmeans(clustered, 8)
+        assert centroids.shape == (8, 32)
+        np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1.0, rtol=1e-5)
+
+    def test_exact_scan_until_trained(self, clustered):
+        dense = DenseIndex(32)
+        ivf = IVFIndex(dense, nprobe=2, train_size=5000)
+        dense.add(clustered)
+        ivf.add(0, clustered)
+
+        assert not ivf.trained
+        assert ivf.search(clustered[0], 5) == dense.search(clustered[0], 5)
+
+    def test_full_probe_matches_exact_and_recall_improves(self, clustered):
+        dense = DenseIndex(32)
+        ivf = IVFIndex(dense, nprobe=1, train_size=1000)
+        dense.add(clustered[:1000])
+        ivf.add(0, clustered[:1000])
+        assert ivf.trained
+
+        # Incremental inserts are assigned to existing lists
+        dense.add(clustered[1000:])
+        ivf.add(1000, clustered[1000:])
+        assert sum(len(rows) for rows in ivf.lists) == 2000
+
+        queries = clustered[::97]
+        nlist = len(ivf.centroids)
+        recalls = {}
+        for nprobe in (1, nlist):
+            recalls[nprobe] = np.mean(
+                [
+                    recall_at_k(dense.search(q, 10), ivf.search(q, 10, nprobe=nprobe))
+                    for q in queries
+                ]
+            )
+        assert recalls[nlist] == pytest.approx(1.0)
+        assert recalls[1] <= recalls[nlist]
+        assert ivf.search(queries[0], 0) == []
+
+    def test_retrains_after_growth(self, clustered):
+        dense = DenseIndex(32)
+        ivf = IVFIndex(dense, train_size=100, retrain_factor=2.0)
+        dense.add(clustered[:100])
+        ivf.add(0, clustered[:100])
+        first = len(ivf.centroids)
+
+        dense.add(clustered[100:400])
+        ivf.add(100, clustered[100:400])
+        assert len(ivf.centroids) > first
+        assert sum(len(rows) for rows in ivf.lists) == 400
+
+    def test_search_during_retrain_sees_consistent_snapshot(self, clustered):
+        dense = DenseIndex(32)
+        ivf = IVFIndex(dense, nprobe=4, train_size=50, retrain_factor=1.1)
+        dense.add(clustered[:50])
+        ivf.add(0, clustered[:50])
+        errors = []
+        done = threading.Event()
+
+        def search():
+            while not done.is_set():
+                try:
+                    for _, score in ivf.search(clustered[7], 5):
+                        assert score > 0
+                except Exception as exc:  # pragma: no cover - failure path
+                    errors.append(exc)
+                    return
+
+        reader = threading.Thread(target=search)
+        reader.start()
+        try:
+            # Every insert crosses retrain_factor, so lists are rebuilt
+            for start in range(50, 2000, 25):
+                dense.add(clustered[start : start + 25])
+                ivf.add(start, clustered[start : start + 25])
+        finally:
+            done.set()
+            reader.join()
+
+        assert errors == []
+        assert sum(len(rows) for rows in ivf.lists) == 2000
+
+    def test_recall_at_k(self):
+        assert recall_at_k([], []) == 1.0
+        assert recall_at_k([(1, 0.9), (2, 0.8)], [(2, 0.8), (5, 0.1)]) == 0.5
+
+    def test_invalid_nprobe(self):
+        with pytest.raises(ValueError):
+            IVFIndex(DenseIndex(4), nprobe=0)
+
+    def test_local_store_with_ann(self):
+        store = LocalStore(
+            passage_size=60,
+            passage_overlap=0,
+            retrieval="dense",
+            ann_nprobe=64,
+            ann_train_size=10,
+        )
+        for i in range(30):
+            store.add_document(f"{i}.txt", f"/{i}", f"topic{i} shared words here")
+
+        assert store.ann.trained
+        results = store.search(["topic7"], k=1)
+        assert results[0][0] == 7
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+ANN Benchmark for FLAMEHAVEN FileSearch local dense retrieval
+
+Compares the IVF approximate index against the exact matrix scan on a
+synthetic clustered corpus and reports recall@k and per-query latency for a
+range of ``nprobe`` values.
+
+Usage:
+    python tools/ann_benchmark.py --passages 200000 --nprobe 1,4,8,16,32
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flamehaven_filesearch.vector_index import (  # noqa: E402
+    DenseIndex,
+    IVFIndex,
+    recall_at_k,
+)
+
+
+def make_corpus(
+    passages: int, dim: int, clusters: int, seed: int
+) -> Dict[str, np.ndarray]:
+    """Generate unit vectors drawn around random topic centres"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=passages)
+    data = centres[labels] + 0.6 * rng.standard_normal((passages, dim)).astype(
+        np.float32
+    )
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return {"data": data, "centres": centres}
+
+
+def run_benchmark(
+    passages: int,
+    dim: int,
+    queries: int,
+    k: int,
+    nprobes: List[int],
+    clusters: int = 64,
+    seed: int = 0,
+) -> Dict:
+    """
+    Build exact and IVF indexes and measure recall/latency
+
+    Returns:
+        Report dict with build time, exact latency and one row per nprobe
+    """
+    corpus = make_corpus(passages, dim, clusters, seed)
+    data = corpus["data"]
+
+    dense = DenseIndex(dim)
+    dense.add(data)
+
+    build_start = time.perf_counter()
+    ivf = IVFIndex(dense, train_size=1, seed=seed)
+    ivf.train()
+    build_seconds = time.perf_counter() - build_start
+
+    rng = np.random.default_rng(seed + 1)
+    query_rows = rng.choice(passages, size=queries, replace=False)
+    query_vectors = data[query_rows] + 0.3 * rng.standard_normal((queries, dim)).astype(
+        np.float32
+    )
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+
+    start = time.perf_counter()
+    exact = [dense.search(q, k) for q in query_vectors]
+    exact_ms = (time.perf_counter() - start) * 1000 / queries
+
+    rows = []
+    for nprobe in nprobes:
+        start = time.perf_counter()
+        approx = [ivf.search(q, k, nprobe=nprobe) for q in query_vectors]
+        latency_ms = (time.perf_counter() - start) * 1000 / queries
+        recall = float(np.mean([recall_at_k(e, a) for e, a in zip(exact, approx)]))
+        rows.append(
+            {
+                "nprobe": nprobe,
+                "recall_at_k": round(recall, 4),
+                "latency_ms": round(latency_ms, 3),
+                "speedup": round(exact_ms / latency_ms, 2) if latency_ms else None,
+            }
+        )
+
+    return {
+        "passages": passages,
+        "dim": dim,
+        "k": k,
+        "queries": queries,
+        "nlist": len(ivf.centroids),
+        "build_seconds": round(build_seconds, 3),
+        "exact_latency_ms": round(exact_ms, 3),
+        "results": rows,
+    }
+
+
+def main():
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description="IVF vs exact recall benchmark")
+    parser.add_argument("--passages", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", default="1,4,8,16,32")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print raw JSON report")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        passages=args.passages,
+        dim=args.dim,
+        queries=args.queries,
+        k=args.k,
+        nprobes=[int(n) for n in args.nprobe.split(",") if n],
+        seed=args.seed,
+    )
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("=" * 60)
+    print("ANN BENCHMARK (IVF vs exact scan)")
+    print("=" * 60)
+    print(f"Passages:        {report['passages']} x {report['dim']}d")
+    print(f"Lists (nlist):   {report['nlist']}")
+    print(f"Build time:      {report['build_seconds']:.3f}s")
+    print(f"Exact latency:   {report['exact_latency_ms']:.3f} ms/query")
+    print("-" * 60)
+    print(f"{'nprobe':>8} {'recall@' + str(report['k']):>12} {'ms/query':>10} {'x':>8}")
+    for row in report["results"]:
+        print(
+            f"{row['nprobe']:>8} {row['recall_at_k']:>12.4f} "
+            f"{row['latency_ms']:>10.3f} {row['speedup']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()